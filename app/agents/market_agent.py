@@ -1,56 +1,45 @@
 """Market Intelligence agent for the AI Career Strategy Planner.
 
 This module:
-- Calls Groq LLM via get_llm()
-- Uses the Market Intelligence prompt
-- Parses and validates JSON-only output
+- Declares the agent on the shared runtime (app.agents.runtime), which owns
+  caching, rate limiting, streaming, parsing and validation
+- Uses the Market Intelligence prompt and the MarketAnalysis schema
 """
 
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, List, Optional
 
-from app.llm.llm import get_llm
+from app.agents.runtime import AgentSpec, arun_agent, run_agent
+from app.llm.json_stream import PartialCallback
 from app.llm.prompts import MARKET_INTELLIGENCE_PROMPT
+from app.schemas.career import MarketAnalysis
 
 
-def _extract_json(text: str) -> Optional[Dict[str, Any]]:
-    """Extract the first JSON object from text.
-
-    Returns None if parsing fails.
-    """
-
-    if not text:
-        return None
-
-    text = text.strip()
-    if text.startswith("{") and text.endswith("}"):
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
-
-    candidate = text[start : end + 1]
-    try:
-        return json.loads(candidate)
-    except json.JSONDecodeError:
-        return None
+def _project(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Prompt variables for a market intelligence call."""
 
+    return {
+        "target_roles": inputs["target_roles"],
+        "skills": inputs["skills"],
+        "location": inputs.get("location") or "",
+        "experience_level": inputs.get("experience_level") or "",
+    }
 
-def _normalize_list(value: Any) -> List[Any]:
-    """Ensure a list output, falling back to an empty list."""
 
-    if isinstance(value, list):
-        return value
-    if value is None:
-        return []
-    return [value]
+MARKET_AGENT = AgentSpec(
+    name="market",
+    prompt_name="market_intelligence",
+    prompt=MARKET_INTELLIGENCE_PROMPT,
+    schema=MarketAnalysis,
+    defaults={
+        "in_demand_skills": [],
+        "emerging_skills": [],
+        "skill_gaps": [],
+        "market_summary": "Model returned invalid JSON.",
+    },
+    project=_project,
+)
 
 
 def analyze_market(
@@ -58,44 +47,45 @@ def analyze_market(
     skills: List[str],
     location: Optional[str] = None,
     experience_level: Optional[str] = None,
+    model: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Run market intelligence and return a clean structured dict.
 
     Returns a dict with keys: in_demand_skills, emerging_skills, skill_gaps, market_summary.
     If the model response is malformed, returns safe empty defaults.
+    model selects the Groq model (see app.llm.routing); defaults to DEFAULT_MODEL.
     """
 
-    llm = get_llm()
+    inputs = {
+        "target_roles": target_roles,
+        "skills": skills,
+        "location": location,
+        "experience_level": experience_level,
+    }
+    return run_agent(MARKET_AGENT, inputs, model=model)
 
-    prompt_messages = MARKET_INTELLIGENCE_PROMPT.format_messages(
-        target_roles=target_roles,
-        skills=skills,
-        location=location or "",
-        experience_level=experience_level or "",
-    )
 
-    response = llm.invoke(prompt_messages)
-    raw_text = getattr(response, "content", "") or str(response)
-
-    data = _extract_json(raw_text)
-    if not isinstance(data, dict):
-        return {
-            "in_demand_skills": [],
-            "emerging_skills": [],
-            "skill_gaps": [],
-            "market_summary": "Model returned invalid JSON.",
-        }
-
-    in_demand_skills = _normalize_list(data.get("in_demand_skills"))
-    emerging_skills = _normalize_list(data.get("emerging_skills"))
-    skill_gaps = _normalize_list(data.get("skill_gaps"))
-    market_summary = (
-        data.get("market_summary") if isinstance(data.get("market_summary"), str) else ""
-    )
+async def aanalyze_market(
+    target_roles: List[str],
+    skills: List[str],
+    location: Optional[str] = None,
+    experience_level: Optional[str] = None,
+    on_partial: Optional[PartialCallback] = None,
+    model: Optional[str] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """Async variant of analyze_market() that streams the completion.
 
-    return {
-        "in_demand_skills": in_demand_skills,
-        "emerging_skills": emerging_skills,
-        "skill_gaps": skill_gaps,
-        "market_summary": market_summary,
+    Partial fields are reported via on_partial (see arun_agent()); refresh
+    bypasses the response cache lookup.
+    """
+
+    inputs = {
+        "target_roles": target_roles,
+        "skills": skills,
+        "location": location,
+        "experience_level": experience_level,
     }
+    return await arun_agent(
+        MARKET_AGENT, inputs, model=model, on_partial=on_partial, refresh=refresh
+    )
@@ -0,0 +1,145 @@
+"""Resume ingestion agent for the AI Career Strategy Planner.
+
+This module:
+- Cleans resumes with the deterministic passes in app.utils.resume
+- Extracts sections and listed skills without an LLM call, canonicalized
+  against the local skill taxonomy
+- Map-reduces long resumes: chunks are summarized in parallel by the fast
+  model, so the skill analysis prompt stays bounded regardless of CV length
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from app.llm.llm import get_llm
+from app.llm.prompts import RESUME_CHUNK_SUMMARY_PROMPT
+from app.llm.rate_limit import acall_llm, call_llm
+from app.llm.routing import resolve_model
+from app.utils.helpers import normalize_skills
+from app.utils.resume import (
+    chunk_text,
+    extract_skills,
+    normalize_resume,
+    split_sections,
+    strip_boilerplate,
+)
+from config import settings
+
+
+def _prepare(resume_text: str) -> Tuple[Dict[str, Any], List[str]]:
+    """Run the deterministic passes and return (result, chunks to summarize).
+
+    chunks is empty when the cleaned text already fits RESUME_MAX_CHARS.
+    """
+
+    text = strip_boilerplate(normalize_resume(resume_text))
+    sections = split_sections(text)
+    result = {
+        "text": text,
+        "sections": list(sections),
+        "skills": normalize_skills(extract_skills(sections)),
+        "original_chars": len(resume_text or ""),
+        "chunked": False,
+    }
+    if len(text) <= settings.RESUME_MAX_CHARS:
+        return result, []
+
+    # Cap the fan-out by growing the chunks rather than dropping text: very
+    # long resumes get fewer, larger chunks.
+    max_chunks = max(1, settings.RESUME_MAX_CHUNKS)
+    size = max(settings.RESUME_CHUNK_CHARS, math.ceil(len(text) / max_chunks))
+    chunks = chunk_text(text, size)
+    while len(chunks) > max_chunks:
+        # Paragraph packing leaves chunks part-filled; retry a bit larger.
+        size += max(1, size // 4)
+        chunks = chunk_text(text, size)
+    return result, chunks
+
+
+def _chunk_messages(chunk: str, index: int, total: int) -> List[Any]:
+    """Format the prompt messages for one chunk summary."""
+
+    return RESUME_CHUNK_SUMMARY_PROMPT.format_messages(
+        chunk=chunk,
+        index=index + 1,
+        total=total,
+        max_words=settings.RESUME_SUMMARY_WORDS,
+    )
+
+
+def _fallback(chunk: str) -> str:
+    """Truncated chunk used when a summary call fails."""
+
+    return chunk[: settings.RESUME_CHUNK_CHARS // 4]
+
+
+def _reduce(result: Dict[str, Any], summaries: List[str]) -> Dict[str, Any]:
+    """Combine chunk summaries into the text passed to skill analysis."""
+
+    result["text"] = "\n\n".join(summary for summary in summaries if summary)
+    result["chunked"] = True
+    return result
+
+
+def resume_skills(resume_text: str) -> List[str]:
+    """Canonical skills listed on the resume (deterministic, no LLM call)."""
+
+    return _prepare(resume_text)[0]["skills"]
+
+
+def ingest_resume(resume_text: str) -> Dict[str, Any]:
+    """Clean a resume and, if it is long, summarize it map-reduce style.
+
+    Returns a dict with keys: text, sections, skills, original_chars, chunked.
+    """
+
+    result, chunks = _prepare(resume_text)
+    if not chunks:
+        return result
+
+    llm = get_llm(resolve_model(settings.RESUME_SUMMARY_MODEL))
+
+    def summarize(item: Tuple[int, str]) -> str:
+        index, chunk = item
+        messages = _chunk_messages(chunk, index, len(chunks))
+        try:
+            response = call_llm(
+                "resume", lambda: llm.invoke(messages), messages, model=llm.model_name
+            )
+        except Exception:
+            return _fallback(chunk)
+        return (getattr(response, "content", "") or "").strip() or _fallback(chunk)
+
+    # Map: chunks are summarized concurrently.
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        summaries = list(pool.map(summarize, enumerate(chunks)))
+    return _reduce(result, summaries)
+
+
+async def aingest_resume(resume_text: str) -> Dict[str, Any]:
+    """Async variant of ingest_resume(); chunk summaries run concurrently."""
+
+    result, chunks = _prepare(resume_text)
+    if not chunks:
+        return result
+
+    llm = get_llm(resolve_model(settings.RESUME_SUMMARY_MODEL))
+
+    async def summarize(index: int, chunk: str) -> str:
+        messages = _chunk_messages(chunk, index, len(chunks))
+        try:
+            response = await acall_llm(
+                "resume", lambda: llm.ainvoke(messages), messages, model=llm.model_name
+            )
+        except Exception:
+            return _fallback(chunk)
+        return (getattr(response, "content", "") or "").strip() or _fallback(chunk)
+
+    summaries = await asyncio.gather(
+        *(summarize(index, chunk) for index, chunk in enumerate(chunks))
+    )
+    return _reduce(result, list(summaries))
@@ -0,0 +1,511 @@
+"""Shared runtime for the JSON-producing career planning agents.
+
+An agent is declared, not coded: an AgentSpec names its prompt, output
+schema (app/schemas/career.py), fallback defaults and input projection.
+run_agent() / arun_agent() then own the single code path every agent uses:
+- response cache lookup and store (app.llm.cache), with concurrent
+  identical async calls coalesced onto one completion (single-flight)
+- prompt compaction to the prompt's token budget (app.llm.prompts)
+- rate limiting, retries and model health reporting (app.llm.rate_limit)
+- structured output: Groq JSON mode (or the schema itself) on the request
+- streaming with incremental field parsing (app.llm.json_stream)
+- JSON parsing (orjson when installed) and schema validation; output that
+  fails is repaired locally (app.llm.json_repair) and, failing that, fixed
+  by one cheap re-ask carrying the validation error
+- per-agent call, cache-hit, parse-failure, repair, re-ask and latency
+  counters, plus parse outcomes, time-to-first-token and streamed token
+  usage on /metrics (app.utils.metrics)
+
+Usage:
+    MARKET = AgentSpec(
+        name="market",
+        prompt_name="market_intelligence",
+        prompt=MARKET_INTELLIGENCE_PROMPT,
+        schema=MarketAnalysis,
+        defaults={...},
+        project=lambda inputs: {...},
+    )
+    result = await arun_agent(MARKET, inputs, model=model, on_partial=callback)
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, ValidationError
+
+from app.llm.cache import get_response_cache, make_cache_key
+from app.llm.json_repair import is_truncated, repair_json
+from app.llm.json_stream import (
+    IncrementalJSONParser,
+    PartialCallback,
+    StreamTrace,
+    astream_json,
+)
+from app.llm.llm import get_llm
+from app.llm.prompts import JSON_REPAIR_PROMPT, compact_prompt_inputs, prompt_budget
+from app.llm.rate_limit import acall_llm, call_llm, failed_generation
+from app.llm.routing import resolve_model
+from app.utils.metrics import LLM_PARSE, LLM_TTFT_SECONDS, record_tokens
+from app.utils.single_flight import SingleFlight
+from config import settings
+
+try:
+    # Optional: several times faster than json for typical agent payloads.
+    import orjson
+
+    _loads: Callable[[str], Any] = orjson.loads
+    _DECODE_ERRORS: Tuple[Type[Exception], ...] = (orjson.JSONDecodeError,)
+except ImportError:  # pragma: no cover - depends on the environment
+    _loads = json.loads
+    _DECODE_ERRORS = (json.JSONDecodeError,)
+
+Inputs = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """Declarative description of one JSON-producing agent.
+
+    name: label for rate limits, cache counters and stats ("market").
+    prompt_name: key for cache entries and token budgets ("market_intelligence").
+    project: maps call inputs to the prompt's variables (before compaction).
+    prepare / aprepare: optional enrichment run on a cache miss, before the
+        prompt is built (e.g. resume ingestion); aprepare is used by
+        arun_agent() when given, else prepare.
+    finalize: optional post-processing of the validated output.
+    """
+
+    name: str
+    prompt_name: str
+    prompt: ChatPromptTemplate
+    schema: Type[BaseModel]
+    defaults: Dict[str, Any]
+    project: Callable[[Inputs], Dict[str, Any]]
+    prepare: Optional[Callable[[Inputs], Inputs]] = None
+    aprepare: Optional[Callable[[Inputs], Awaitable[Inputs]]] = None
+    finalize: Optional[Callable[[Dict[str, Any], Inputs], Dict[str, Any]]] = None
+
+
+def parse_json(text: str) -> Optional[Dict[str, Any]]:
+    """Parse the first JSON object in text (None if there is none)."""
+
+    if not text:
+        return None
+
+    # Fast path: raw JSON object.
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        try:
+            data = _loads(text)
+            return data if isinstance(data, dict) else None
+        except _DECODE_ERRORS:
+            pass
+
+    # Fallback: the outermost {...} block, e.g. inside a markdown fence.
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = _loads(text[start : end + 1])
+    except _DECODE_ERRORS:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def check_output(
+    spec: AgentSpec, data: Optional[Dict[str, Any]]
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Validate parsed JSON against the agent's schema.
+
+    Returns (output, "") on success, else (None, reason). An object holding
+    none of the schema's fields (e.g. {"error": ...}) counts as a failure.
+    """
+
+    if not isinstance(data, dict):
+        return None, "no JSON object found"
+    expected = spec.schema.model_fields
+    if not any(field in data for field in expected):
+        return None, f"none of the expected fields: {', '.join(expected)}"
+    try:
+        return spec.schema.model_validate(data).model_dump(), ""
+    except ValidationError as exc:
+        return None, str(exc)
+
+
+def validate_output(
+    spec: AgentSpec, data: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], bool]:
+    """Validate parsed JSON, substituting the defaults when it is unusable.
+
+    The flag is False when the result holds the fallback defaults (those are
+    never cached).
+    """
+
+    output, _ = check_output(spec, data)
+    if output is None:
+        return copy.deepcopy(spec.defaults), False
+    return output, True
+
+
+def json_mode_llm(llm: Any, spec: AgentSpec, streaming: bool = False) -> Any:
+    """Bind the configured structured-output response_format to llm."""
+
+    mode = settings.LLM_JSON_MODE
+    if mode == "off" or (streaming and not settings.LLM_JSON_MODE_STREAM):
+        return llm
+    if mode == "json_schema":
+        response_format: Dict[str, Any] = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": spec.schema.__name__,
+                "schema": spec.schema.model_json_schema(),
+            },
+        }
+    else:
+        response_format = {"type": "json_object"}
+    return llm.bind(response_format=response_format)
+
+
+def build_messages(spec: AgentSpec, inputs: Inputs) -> List[Any]:
+    """Format prompt messages; variables are minified and budget-trimmed."""
+
+    variables = compact_prompt_inputs(
+        spec.prompt_name, spec.project(inputs), prompt_budget(spec.prompt_name)
+    )
+    return spec.prompt.format_messages(**variables)
+
+
+def _response_text(response: Any) -> str:
+    """Text content of a chat response."""
+
+    return getattr(response, "content", "") or str(response)
+
+
+# Per-agent counters. coalesced counts calls that shared another caller's
+# in-flight completion. parse_failures counts first-pass outputs that did not
+# parse or validate; repaired / reask_recovered count how they were rescued
+# and invalid counts those that fell back to the defaults.
+_COUNTERS = (
+    "calls",
+    "cache_hits",
+    "coalesced",
+    "parse_failures",
+    "repaired",
+    "reasks",
+    "reask_recovered",
+    "invalid",
+    "llm_seconds",
+)
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(name: str, **amounts: float) -> None:
+    """Add to an agent's counters."""
+
+    with _stats_lock:
+        stats = _stats.setdefault(name, dict.fromkeys(_COUNTERS, 0))
+        for key, amount in amounts.items():
+            stats[key] += amount
+
+
+def agent_stats() -> Dict[str, Dict[str, float]]:
+    """Per-agent counters plus mean LLM latency and parse-failure rate."""
+
+    with _stats_lock:
+        snapshot = {name: dict(stats) for name, stats in _stats.items()}
+    for stats in snapshot.values():
+        misses = stats["calls"] - stats["cache_hits"] - stats["coalesced"]
+        stats["mean_llm_seconds"] = stats["llm_seconds"] / misses if misses else 0.0
+        stats["parse_failure_rate"] = (
+            stats["parse_failures"] / misses if misses else 0.0
+        )
+    return snapshot
+
+
+# In-flight async agent calls, keyed like the response cache.
+_agent_flights = SingleFlight("agent")
+
+
+def agent_flight_stats() -> Dict[str, Any]:
+    """Single-flight leader/coalesced counts per agent."""
+
+    return _agent_flights.stats()
+
+
+def _cached(spec: AgentSpec, cache: Any, key: str) -> Optional[Dict[str, Any]]:
+    """Look up a cached output and count the call."""
+
+    cached = cache.get(spec.name, key) if cache is not None else None
+    _record(spec.name, calls=1, cache_hits=int(cached is not None))
+    return cached
+
+
+def _repair(
+    spec: AgentSpec, text: str, error: str
+) -> Tuple[Optional[Dict[str, Any]], str, List[Any]]:
+    """Count a parse failure and try the local repair pass.
+
+    Returns (output, error, reask messages); the messages are empty when the
+    output was repaired or re-asks are disabled.
+    """
+
+    _record(spec.name, parse_failures=1)
+    output, repair_error = check_output(spec, repair_json(text))
+    if output is not None:
+        _record(spec.name, repaired=1)
+        return output, "", []
+    if not settings.LLM_REASK_ENABLED or not text.strip():
+        return None, error, []
+    messages = JSON_REPAIR_PROMPT.format_messages(
+        schema=json.dumps(spec.schema.model_json_schema(), separators=(",", ":")),
+        error=(error or repair_error)[:1000],
+        output=text[: settings.LLM_REASK_MAX_CHARS],
+    )
+    return None, error, messages
+
+
+def _reask_llm(spec: AgentSpec) -> Tuple[Any, str]:
+    """JSON-mode client and model name for re-asks (LLM_REASK_TIER)."""
+
+    model = resolve_model(settings.LLM_REASK_TIER)
+    return json_mode_llm(get_llm(model), spec), model
+
+
+def _reasked(spec: AgentSpec, response: Any) -> Optional[Dict[str, Any]]:
+    """Validate a re-ask response and count the outcome."""
+
+    output, _ = check_output(spec, parse_json(_response_text(response)))
+    _record(spec.name, reasks=1, reask_recovered=int(output is not None))
+    return output
+
+
+def _reask_failed(spec: AgentSpec, exc: Exception) -> Optional[Dict[str, Any]]:
+    """Count a re-ask that raised; salvage the text JSON mode rejected, if any.
+
+    The re-ask is best effort: when it fails the caller falls back to the
+    defaults instead of failing the plan.
+    """
+
+    text = failed_generation(exc)
+    output = check_output(spec, repair_json(text))[0] if text else None
+    _record(spec.name, reasks=1, reask_recovered=int(output is not None))
+    return output
+
+
+def _finish(
+    spec: AgentSpec,
+    output: Optional[Dict[str, Any]],
+    inputs: Inputs,
+    started: float,
+    outcome: str,
+) -> Tuple[Dict[str, Any], bool]:
+    """Apply the defaults if needed, post-process and record one call.
+
+    outcome labels the parse metric: ok, repaired, reasked, partial or invalid.
+    """
+
+    valid = output is not None
+    LLM_PARSE.inc(agent=spec.name, outcome=outcome if valid else "invalid")
+    result = output if output is not None else copy.deepcopy(spec.defaults)
+    if spec.finalize is not None:
+        result = spec.finalize(result, inputs)
+    _record(
+        spec.name,
+        invalid=int(not valid),
+        llm_seconds=time.perf_counter() - started,
+    )
+    return result, valid
+
+
+def _cacheable(outcome: str, complete: bool) -> bool:
+    """Whether a valid output may be cached.
+
+    A truncated completion that was only patched up locally is a guess at
+    the missing tail, so it is not cached; after a successful re-ask it is.
+    """
+
+    if outcome == "partial":
+        return False
+    return complete or outcome == "reasked"
+
+
+def run_agent(
+    spec: AgentSpec,
+    inputs: Inputs,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run an agent with a blocking invoke() call."""
+
+    llm = get_llm(model)
+    cache = get_response_cache()
+    cache_key = make_cache_key(spec.prompt_name, llm.model_name, inputs)
+    cached = _cached(spec, cache, cache_key)
+    if cached is not None:
+        return cached
+
+    started = time.perf_counter()
+    prepared = spec.prepare(inputs) if spec.prepare is not None else inputs
+    messages = build_messages(spec, prepared)
+    structured = json_mode_llm(llm, spec)
+    try:
+        response = call_llm(
+            spec.name,
+            lambda: structured.invoke(messages),
+            messages,
+            model=llm.model_name,
+        )
+    except Exception as exc:
+        # JSON mode rejected the output: repair it like any other bad output.
+        text = failed_generation(exc)
+        if text is None:
+            raise
+        output, error = None, str(exc)
+    else:
+        text = _response_text(response)
+        output, error = check_output(spec, parse_json(text))
+    outcome = "ok"
+    if output is None:
+        output, error, reask = _repair(spec, text, error)
+        outcome = "repaired"
+        if reask:
+            outcome = "reasked"
+            reask_llm, reask_model = _reask_llm(spec)
+            try:
+                response = call_llm(
+                    spec.name, lambda: reask_llm.invoke(reask), reask, model=reask_model
+                )
+            except Exception as exc:
+                output = _reask_failed(spec, exc)
+            else:
+                output = _reasked(spec, response)
+
+    result, valid = _finish(spec, output, prepared, started, outcome)
+    if valid and _cacheable(outcome, not is_truncated(text)) and cache is not None:
+        cache.set(spec.name, cache_key, result)
+    return result
+
+
+async def arun_agent(
+    spec: AgentSpec,
+    inputs: Inputs,
+    model: Optional[str] = None,
+    on_partial: Optional[PartialCallback] = None,
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """Run an agent with a streamed completion.
+
+    Fields are parsed as soon as they close and reported via on_partial as
+    (path, value), e.g. ("summary", "...") or ("phases[0]", {...}). A
+    malformed or truncated stream goes through repair and re-ask like
+    run_agent(); if both fail, the valid prefix is still returned (but not
+    cached). refresh skips the cache lookup; the fresh result is still
+    stored.
+    """
+
+    llm = get_llm(model)
+    cache = get_response_cache()
+    cache_key = make_cache_key(spec.prompt_name, llm.model_name, inputs)
+    cached = _cached(spec, None if refresh else cache, cache_key)
+    if cached is not None:
+        return cached
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return await _arun_uncached(spec, inputs, llm, cache, cache_key, on_partial)
+
+    # Identical calls already in flight share one completion; only the
+    # first caller receives partial fields.
+    result, coalesced = await _agent_flights.run(
+        cache_key,
+        lambda: _arun_uncached(spec, inputs, llm, cache, cache_key, on_partial),
+        label=spec.name,
+    )
+    if coalesced:
+        _record(spec.name, coalesced=1)
+    return result
+
+
+async def _arun_uncached(
+    spec: AgentSpec,
+    inputs: Inputs,
+    llm: Any,
+    cache: Any,
+    cache_key: str,
+    on_partial: Optional[PartialCallback],
+) -> Dict[str, Any]:
+    """The cache-miss path of arun_agent()."""
+
+    started = time.perf_counter()
+    if spec.aprepare is not None:
+        prepared = await spec.aprepare(inputs)
+    elif spec.prepare is not None:
+        prepared = spec.prepare(inputs)
+    else:
+        prepared = inputs
+    messages = build_messages(spec, prepared)
+    structured = json_mode_llm(llm, spec, streaming=True)
+    # A fresh parser and trace per attempt, so a retry starts from scratch.
+    parsers: List[IncrementalJSONParser] = []
+    trace = StreamTrace()
+
+    def stream() -> Awaitable[Tuple[Optional[Dict[str, Any]], bool]]:
+        nonlocal trace
+        parsers.append(IncrementalJSONParser())
+        trace = StreamTrace()
+        return astream_json(
+            structured, messages, on_partial, parser=parsers[-1], trace=trace
+        )
+
+    rejected: Optional[str] = None
+    try:
+        data, complete = await acall_llm(
+            spec.name, stream, messages, model=llm.model_name
+        )
+    except Exception as exc:
+        # JSON mode rejected the output: repair it like any other bad output.
+        rejected = failed_generation(exc)
+        if rejected is None:
+            raise
+        data, complete = parsers[-1].snapshot() if parsers else {}, False
+    if trace.first_token_seconds is not None:
+        LLM_TTFT_SECONDS.observe(
+            trace.first_token_seconds, agent=spec.name, model=llm.model_name
+        )
+    record_tokens(spec.name, llm.model_name, trace.usage)
+
+    output, error = check_output(spec, data) if complete else (None, "truncated")
+    outcome = "ok"
+    if output is None:
+        text = rejected or (parsers[-1].text if parsers else "")
+        output, error, reask = _repair(spec, text, error)
+        outcome = "repaired"
+        if reask:
+            outcome = "reasked"
+            reask_llm, reask_model = _reask_llm(spec)
+            try:
+                response = await acall_llm(
+                    spec.name,
+                    lambda: reask_llm.ainvoke(reask),
+                    reask,
+                    model=reask_model,
+                )
+            except Exception as exc:
+                output = _reask_failed(spec, exc)
+            else:
+                output = _reasked(spec, response)
+        if output is None and not complete:
+            # Last resort: whatever prefix streamed before the tail broke.
+            output, _ = check_output(spec, data)
+            outcome = "partial"
+
+    result, valid = _finish(spec, output, prepared, started, outcome)
+    if valid and _cacheable(outcome, complete) and cache is not None:
+        cache.set(spec.name, cache_key, result)
+    return result
@@ -1,100 +1,201 @@
 """Skill Analyzer agent for the AI Career Strategy Planner.
 
 This module:
-- Calls Groq LLM via get_llm()
-- Uses the Skill Analyzer prompt
-- Parses and validates JSON-only output
+- Declares the agent on the shared runtime (app.agents.runtime), which owns
+  caching, rate limiting, streaming, parsing and validation
+- Cleans and, for long resumes, condenses the resume before prompting
+- Pre-scores role fit deterministically (app.utils.role_fit) and passes the
+  scores to the prompt; fast mode returns them without an LLM call
+- Uses the Skill Analyzer prompt and the SkillAnalysis schema
 """
 
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, List, Optional
 
-from app.llm.llm import get_llm
+from app.agents.resume_agent import aingest_resume, ingest_resume, resume_skills
+from app.agents.runtime import AgentSpec, arun_agent, run_agent
+from app.llm.json_stream import PartialCallback
 from app.llm.prompts import SKILL_ANALYZER_PROMPT
+from app.schemas.career import SkillAnalysis
+from app.utils.role_fit import score_role_fit
+from config import settings
 
+# Roles scored when the user gave no target roles.
+_UNTARGETED_ROLES = 3
 
-def _extract_json(text: str) -> Optional[Dict[str, Any]]:
-    """Extract the first JSON object from text.
 
-    Returns None if parsing fails.
-    """
+def _fit_scores(
+    skills: List[str],
+    listed_skills: List[str],
+    target_roles: Optional[List[str]],
+) -> List[Dict[str, Any]]:
+    """Deterministic role-fit scores for request plus resume-listed skills."""
+
+    scores = score_role_fit([*skills, *listed_skills], target_roles)
+    return scores if target_roles else scores[:_UNTARGETED_ROLES]
+
+
+def _role_fit_entries(scores: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert deterministic scores into the role_fit output shape."""
+
+    entries = []
+    for score in scores:
+        if score["fit_score"] is None:
+            notes = "Role not in the local role catalog; not scored."
+        else:
+            notes = f"Covers {score['matched']}/{score['required']} core skills."
+            if score["gaps"]:
+                notes += " Missing: " + ", ".join(score["gaps"]) + "."
+        entries.append(
+            {"role": score["role"], "fit_score": score["fit_score"], "notes": notes}
+        )
+    return entries
+
+
+def _fast_analysis(scores: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Skill analysis built from deterministic scores only (no LLM)."""
+
+    known = [s for s in scores if s["fit_score"] is not None]
+    strengths: List[str] = []
+    gaps: List[str] = []
+    for score in known:
+        strengths += [s for s in score["overlap"] if s not in strengths]
+        gaps += [g for g in score["gaps"] if g not in gaps]
+
+    if known:
+        best = max(known, key=lambda s: s["fit_score"])
+        summary = (
+            f"Closest fit: {best['matched_role']} "
+            f"({best['fit_score']}/100 core-skill coverage)."
+        )
+    else:
+        summary = "No target role matched the local role catalog."
+
+    return {
+        "summary": summary,
+        "strengths": strengths,
+        "gaps": gaps,
+        "role_fit": _role_fit_entries(scores),
+    }
+
+
+def _prepared(inputs: Dict[str, Any], resume: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the ingested resume and role-fit scores to the call inputs."""
+
+    scores = _fit_scores(inputs["skills"], resume["skills"], inputs["target_roles"])
+    return {**inputs, "resume": resume, "role_fit_scores": scores}
+
+
+def _prepare(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Ingest the resume (map-reduce for long ones) and pre-score role fit."""
+
+    return _prepared(inputs, ingest_resume(inputs["resume_text"]))
 
-    if not text:
-        return None
 
-    # Fast path: raw JSON object.
-    text = text.strip()
-    if text.startswith("{") and text.endswith("}"):
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
+async def _aprepare(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of _prepare()."""
 
-    # Fallback: find first {...} block.
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
+    return _prepared(inputs, await aingest_resume(inputs["resume_text"]))
 
-    candidate = text[start : end + 1]
-    try:
-        return json.loads(candidate)
-    except json.JSONDecodeError:
-        return None
 
+def _project(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Prompt variables for a skill analysis call."""
 
-def _normalize_list(value: Any) -> List[Any]:
-    """Ensure a list output, falling back to an empty list."""
+    resume = inputs["resume"]
+    return {
+        "user_profile": {
+            "resume_text": resume["text"],
+            # Skills listed on the resume, extracted without the LLM.
+            "resume_skills": resume["skills"],
+        },
+        "skills": inputs["skills"],
+        "target_roles": inputs["target_roles"] or [],
+        "role_fit_scores": inputs["role_fit_scores"],
+    }
 
-    if isinstance(value, list):
-        return value
-    if value is None:
-        return []
-    return [value]
+
+def _with_fit_fallback(
+    result: Dict[str, Any], inputs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Fill role_fit from the deterministic scores if the model left it empty."""
+
+    if not result["role_fit"]:
+        result["role_fit"] = _role_fit_entries(inputs["role_fit_scores"])
+    return result
+
+
+SKILL_AGENT = AgentSpec(
+    name="skill",
+    prompt_name="skill_analyzer",
+    prompt=SKILL_ANALYZER_PROMPT,
+    schema=SkillAnalysis,
+    defaults={
+        "summary": "Model returned invalid JSON.",
+        "strengths": [],
+        "gaps": [],
+        "role_fit": [],
+    },
+    project=_project,
+    prepare=_prepare,
+    aprepare=_aprepare,
+    finalize=_with_fit_fallback,
+)
 
 
 def analyze_skills(
     resume_text: str,
     skills: List[str],
     target_roles: Optional[List[str]] = None,
+    fast_mode: Optional[bool] = None,
+    model: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Run skill analysis using Groq and return a clean structured dict.
 
     Returns a dict with keys: summary, strengths, gaps, role_fit.
     If the model response is malformed, returns safe empty defaults.
+    model selects the Groq model (see app.llm.routing); defaults to DEFAULT_MODEL.
+    With fast_mode (default: SKILL_ANALYSIS_FAST_MODE) the result comes from
+    the deterministic role-fit scores without an LLM call.
     """
 
-    llm = get_llm()
+    if settings.SKILL_ANALYSIS_FAST_MODE if fast_mode is None else fast_mode:
+        listed = resume_skills(resume_text)
+        return _fast_analysis(_fit_scores(skills, listed, target_roles))
 
-    prompt_messages = SKILL_ANALYZER_PROMPT.format_messages(
-        user_profile={"resume_text": resume_text},
-        skills=skills,
-        target_roles=target_roles or [],
-    )
+    inputs = {
+        "resume_text": resume_text,
+        "skills": skills,
+        "target_roles": target_roles,
+    }
+    return run_agent(SKILL_AGENT, inputs, model=model)
 
-    response = llm.invoke(prompt_messages)
-    raw_text = getattr(response, "content", "") or str(response)
 
-    data = _extract_json(raw_text)
-    if not isinstance(data, dict):
-        return {
-            "summary": "Model returned invalid JSON.",
-            "strengths": [],
-            "gaps": [],
-            "role_fit": [],
-        }
+async def aanalyze_skills(
+    resume_text: str,
+    skills: List[str],
+    target_roles: Optional[List[str]] = None,
+    on_partial: Optional[PartialCallback] = None,
+    fast_mode: Optional[bool] = None,
+    model: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Async variant of analyze_skills() that streams the completion.
 
-    # Validate and normalize expected fields.
-    summary = data.get("summary") if isinstance(data.get("summary"), str) else ""
-    strengths = _normalize_list(data.get("strengths"))
-    gaps = _normalize_list(data.get("gaps"))
-    role_fit = _normalize_list(data.get("role_fit"))
+    Partial fields are reported via on_partial (see arun_agent()); in fast
+    mode every field is reported at once.
+    """
 
-    return {
-        "summary": summary,
-        "strengths": strengths,
-        "gaps": gaps,
-        "role_fit": role_fit,
+    if settings.SKILL_ANALYSIS_FAST_MODE if fast_mode is None else fast_mode:
+        listed = resume_skills(resume_text)
+        result = _fast_analysis(_fit_scores(skills, listed, target_roles))
+        if on_partial is not None:
+            for key, value in result.items():
+                on_partial(key, value)
+        return result
+
+    inputs = {
+        "resume_text": resume_text,
+        "skills": skills,
+        "target_roles": target_roles,
     }
+    return await arun_agent(SKILL_AGENT, inputs, model=model, on_partial=on_partial)
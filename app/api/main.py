@@ -1,14 +1,94 @@
 """FastAPI application entrypoint for the AI Career Strategy Planner."""
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import secrets
+import time
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from app.agents.runtime import agent_stats
+from app.api.planner import (
+    aget_plan,
+    aresume_plan,
+    arun_batch,
+    arun_plan,
+    astart_plan,
+    coalescing_stats,
+    plan_config,
+    section_report,
+)
+from app.api.schemas import (
+    CareerPlanBatchRequest,
+    CareerPlanBatchResponse,
+    CareerPlanEvent,
+    CareerPlanRequest,
+    CareerPlanResponse,
+    CareerPlanStatus,
+    RoleFitRequest,
+    RoleFitResponse,
+)
+from app.graph.graph import get_graph, get_graph_info, reload_graph, set_checkpointer
+from app.graph.market_snapshots import run_refresher, schedule_refresh, snapshot_stats
+from app.graph.retention import retention_stats, run_pruner
+from app.graph.speculation import speculation_stats
+from app.graph.state import SECTION_KEYS
+from app.llm.cache import get_response_cache
+from app.llm.rate_limit import LLMCallError
+from app.llm.routing import routing_info
+from app.utils.metrics import (
+    HTTP_SECONDS,
+    new_trace_id,
+    render_metrics,
+    reset_trace_id,
+    set_trace_id,
+)
+from app.utils.role_fit import score_role_fit_batch
+from config import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Compile the LangGraph workflow once when the process starts.
+
+    Also runs the checkpoint pruner and the market snapshot refresher while
+    the app is up.
+    """
+
+    background: List[asyncio.Task] = []
+    async with AsyncExitStack() as stack:
+        if settings.CHECKPOINT_SQLITE_PATH:
+            # Imported lazily so checkpointing stays optional.
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+            saver = await stack.enter_async_context(
+                AsyncSqliteSaver.from_conn_string(settings.CHECKPOINT_SQLITE_PATH)
+            )
+            set_checkpointer(saver)
+            background.append(asyncio.create_task(run_pruner(saver)))
+
+        # Each worker process compiles its own copy at startup; requests then
+        # share it instead of rebuilding the StateGraph per call.
+        reload_graph()
+        if settings.MARKET_SNAPSHOTS_ENABLED:
+            background.append(asyncio.create_task(run_refresher()))
+        try:
+            yield
+        finally:
+            for task in background:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+            set_checkpointer(None)
 
-from app.api.schemas import CareerPlanRequest, CareerPlanResponse
-from app.graph.graph import build_graph
 
 # Create the FastAPI app instance.
 # Additional routers will be attached here as the API grows.
-app = FastAPI(title="AI Career Strategy Planner")
+app = FastAPI(title="AI Career Strategy Planner", lifespan=lifespan)
 
 # CORS is required so the Next.js frontend (different origin) can call the API
 # without the browser blocking cross-origin requests.
@@ -21,6 +101,53 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def trace_requests(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Assign each request a trace ID and record its latency.
+
+    A well-formed X-Request-ID header is reused as the trace ID; it is
+    returned as X-Trace-ID and stamped on every generated section.
+    """
+
+    trace_id = new_trace_id(request.headers.get("x-request-id"))
+    token = set_trace_id(trace_id)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        reset_trace_id(token)
+        # Route templates keep the label set small (/career-plan/{thread_id}).
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            path=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+    response.headers["X-Trace-ID"] = trace_id
+    return response
+
+
+def require_admin(authorization: Optional[str] = Header(None)) -> None:
+    """Allow the request only with "Authorization: Bearer <ADMIN_TOKEN>"."""
+
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled.")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(
+        token.encode(), settings.ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid admin token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 @app.get("/health")
 def health_check() -> dict:
     """Basic health check endpoint."""
@@ -29,35 +156,235 @@ def health_check() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/graph/info")
+def graph_info() -> dict:
+    """Return the compiled graph version, compile timing, speculation and
+    checkpoint retention stats."""
+
+    return {
+        **get_graph_info(),
+        "speculation": speculation_stats(),
+        "retention": retention_stats(),
+    }
+
+
+@app.post("/graph/reload", dependencies=[Depends(require_admin)])
+def graph_reload() -> dict:
+    """Recompile the graph after prompt or workflow changes.
+
+    New requests pick up the fresh graph; in-flight requests finish on the
+    one they started with.
+    """
+
+    reload_graph()
+    return get_graph_info()
+
+
+@app.get("/cache/stats")
+def cache_stats() -> dict:
+    """Return per-agent response cache hit/miss counters."""
+
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/agents/stats")
+def agents_stats() -> dict:
+    """Return per-agent call, cache-hit, invalid-output and latency counters."""
+
+    return agent_stats()
+
+
+@app.get("/coalescing/stats")
+def coalescing() -> dict:
+    """Return single-flight leader/coalesced counts for plans and agents."""
+
+    return coalescing_stats()
+
+
+@app.get("/market/snapshots")
+def market_snapshots() -> dict:
+    """Return market snapshot hit rate, refresh counters and stored versions."""
+
+    return snapshot_stats()
+
+
+@app.post("/market/snapshots/refresh", dependencies=[Depends(require_admin)])
+async def market_snapshots_refresh(force: bool = False) -> dict:
+    """Refresh missing or due market snapshots in the background.
+
+    With force=true every target is regenerated. Progress shows up in
+    GET /market/snapshots. Nothing is scheduled while snapshots are disabled.
+    """
+
+    return {
+        "scheduled": schedule_refresh(force=force),
+        "enabled": settings.MARKET_SNAPSHOTS_ENABLED,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Prometheus metrics: node and LLM latency, queueing, tokens and cost."""
+
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/models/routing")
+def model_routing() -> dict:
+    """Return model tiers, per-agent routing and live fallback state."""
+
+    return routing_info()
+
+
 @app.post("/career-plan", response_model=CareerPlanResponse)
-def create_career_plan(payload: CareerPlanRequest) -> CareerPlanResponse:
-    """Generate a career plan using the LangGraph workflow."""
+async def create_career_plan(payload: CareerPlanRequest) -> CareerPlanResponse:
+    """Generate a career plan using the LangGraph workflow.
+
+    Runs fully async (graph.ainvoke -> agent ainvoke), so in-flight plans wait
+    on the event loop rather than occupying threadpool workers.
+    """
 
     try:
-        # Build the graph (sequential pipeline of analysis nodes).
-        graph = build_graph()
-
-        # Prepare the initial state expected by the graph.
-        initial_state = {
-            "user_profile": payload.user_profile,
-            "skills": payload.skills,
-            "target_roles": payload.target_roles,
-            "skill_analysis": {},
-            "market_analysis": {},
-            "strategy_analysis": {},
-            "roadmap": {},
-        }
-
-        # Invoke the graph and get the final state.
-        final_state = graph.invoke(initial_state)
-
-        # Return only the response fields defined by the API schema.
-        return CareerPlanResponse(
-            skill_analysis=final_state.get("skill_analysis", {}),
-            market_analysis=final_state.get("market_analysis", {}),
-            strategy_analysis=final_state.get("strategy_analysis", {}),
-            roadmap=final_state.get("roadmap", {}),
-        )
+        # Runs on the graph compiled at startup (skill/market fan out, then
+        # strategy and roadmap); a reused thread_id resumes a stored plan.
+        return await arun_plan(payload)
+    except LLMCallError as exc:
+        # Upstream throttling/outage after retries: tell the client to back off.
+        headers = None
+        if exc.retry_after:
+            headers = {"Retry-After": str(int(exc.retry_after) + 1)}
+        raise HTTPException(
+            status_code=exc.status_code, detail=str(exc), headers=headers
+        ) from exc
     except Exception as exc:  # pragma: no cover - runtime errors only
         # Gracefully map internal errors to an HTTP 500 response.
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@app.get("/career-plan/{thread_id}", response_model=CareerPlanStatus)
+async def get_career_plan(thread_id: str) -> CareerPlanStatus:
+    """Fetch a checkpointed plan (completed or partially completed)."""
+
+    status = await aget_plan(thread_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Plan not found.")
+    return status
+
+
+@app.post("/career-plan/{thread_id}/resume", response_model=CareerPlanResponse)
+async def resume_career_plan(thread_id: str) -> CareerPlanResponse:
+    """Finish a plan from its last completed node, reusing earlier sections."""
+
+    try:
+        response = await aresume_plan(thread_id)
+    except LLMCallError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover - runtime errors only
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if response is None:
+        raise HTTPException(status_code=404, detail="Plan not found.")
+    return response
+
+
+@app.post("/career-plan/batch", response_model=CareerPlanBatchResponse)
+async def create_career_plan_batch(
+    payload: CareerPlanBatchRequest,
+) -> CareerPlanBatchResponse:
+    """Generate plans for a whole cohort in one call.
+
+    Identical items are planned once and shared market analyses are computed
+    once per skills/roles set. Failures are reported per item.
+    """
+
+    if len(payload.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.BATCH_MAX_ITEMS} items.",
+        )
+
+    batch = await arun_batch(payload.items, max_concurrency=payload.max_concurrency)
+    return CareerPlanBatchResponse(**batch)
+
+
+@app.post("/role-fit", response_model=RoleFitResponse)
+def score_role_fit(payload: RoleFitRequest) -> RoleFitResponse:
+    """Score profiles against roles deterministically, without any LLM call.
+
+    All profiles are scored in one vectorized pass, so large cohorts are cheap.
+    """
+
+    if len(payload.profiles) > settings.ROLE_FIT_MAX_PROFILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request exceeds {settings.ROLE_FIT_MAX_PROFILES} profiles.",
+        )
+
+    results = score_role_fit_batch(
+        [(profile.skills, profile.target_roles) for profile in payload.profiles]
+    )
+    return RoleFitResponse(results=results)
+
+
+async def _career_plan_events(payload: CareerPlanRequest) -> AsyncIterator[str]:
+    """Yield NDJSON lines for partial fields and finished graph sections."""
+
+    # As for POST /career-plan, only runs with a thread_id are checkpointed.
+    graph = get_graph(checkpointed=bool(payload.thread_id))
+    thread_id = payload.thread_id
+    config = plan_config(thread_id or uuid.uuid4().hex)
+    try:
+        # Same resume / incremental decision as POST /career-plan; sections
+        # already stored for the thread are sent first.
+        start = await astart_plan(graph, payload, config)
+        status = dict(start.stored.get("section_status") or {})
+        for section in SECTION_KEYS:
+            if start.stored.get(section):
+                event = CareerPlanEvent(
+                    event="section", section=section, data=start.stored[section]
+                )
+                yield event.model_dump_json() + "\n"
+        if not start.finished:
+            # "custom" carries fields parsed mid-completion by the agents;
+            # "updates" yields {node_id: partial_update} after each node.
+            async for mode, chunk in graph.astream(
+                start.graph_input, config, stream_mode=["custom", "updates"]
+            ):
+                if mode == "custom":
+                    event = CareerPlanEvent(event="partial", **chunk)
+                    yield event.model_dump_json() + "\n"
+                    continue
+                for node_update in chunk.values():
+                    status.update((node_update or {}).get("section_status") or {})
+                    for section, data in (node_update or {}).items():
+                        if section not in SECTION_KEYS:
+                            continue
+                        event = CareerPlanEvent(
+                            event="section", section=section, data=data
+                        )
+                        yield event.model_dump_json() + "\n"
+        done = CareerPlanEvent(
+            event="done", data={"thread_id": thread_id, **section_report(status)}
+        )
+        yield done.model_dump_json() + "\n"
+    except Exception as exc:  # pragma: no cover - runtime errors only
+        # Headers are already sent, so errors are reported in-band.
+        yield CareerPlanEvent(event="error", detail=str(exc)).model_dump_json() + "\n"
+
+
+@app.post("/career-plan/stream")
+async def stream_career_plan(payload: CareerPlanRequest) -> StreamingResponse:
+    """Stream the career plan as NDJSON CareerPlanEvent lines.
+
+    Clients can render each section as soon as it arrives instead of waiting
+    for all four nodes to finish.
+    """
+
+    return StreamingResponse(
+        _career_plan_events(payload),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,533 @@
+"""Planning service shared by the API, batch runs and offline jobs.
+
+Wraps the compiled LangGraph workflow with helpers to build the initial
+state, run a single plan, and run many plans at once with bounded
+concurrency and de-duplication of shared work.
+
+Usage:
+    from app.api.planner import run_batch
+
+    results = run_batch([CareerPlanRequest(...), ...], max_concurrency=8)
+
+Offline job (resumable, streams the input file):
+    python -m app.api.planner run plans.jsonl --output results.jsonl --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.agents.market_agent import aanalyze_market
+from app.agents.runtime import agent_flight_stats
+from app.api.schemas import CareerPlanRequest, CareerPlanResponse, CareerPlanStatus
+from app.graph.graph import get_graph
+from app.graph.market_snapshots import serve_snapshot
+from app.graph.state import SECTION_KEYS
+from app.llm.routing import select_model
+from app.utils.blobs import aintern_text, blob_id, intern_text
+from app.utils.metrics import current_trace_id
+from app.utils.single_flight import SingleFlight
+from config import settings
+
+
+def _split_resume(user_profile: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+    """Profile without resume_text, and the resume text ("" if absent)."""
+
+    resume_text = user_profile.get("resume_text")
+    if not isinstance(resume_text, str):
+        return user_profile, ""
+    profile = {k: v for k, v in user_profile.items() if k != "resume_text"}
+    return profile, resume_text
+
+
+def build_initial_state(
+    payload: CareerPlanRequest, resume_ref: Optional[str] = None
+) -> Dict[str, Any]:
+    """Prepare the initial state expected by the graph.
+
+    The resume text is interned and referenced by blob ID (see
+    app.utils.blobs) rather than carried in user_profile. Pass resume_ref
+    if it was already interned; otherwise it is interned in memory.
+    """
+
+    profile, resume_text = _split_resume(payload.user_profile)
+    if resume_ref is None:
+        resume_ref = intern_text(resume_text)
+    return {
+        "user_profile": profile,
+        "resume_ref": resume_ref,
+        "skills": payload.skills,
+        "target_roles": payload.target_roles,
+        "model_overrides": payload.model_overrides or {},
+        "trace_id": current_trace_id(),
+        "skill_analysis": {},
+        "market_analysis": {},
+        "strategy_analysis": {},
+        "roadmap": {},
+        "previous": {},
+    }
+
+
+def plan_config(thread_id: str) -> Dict[str, Any]:
+    """Graph config addressing one plan's checkpoints."""
+
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def section_report(status: Dict[str, str]) -> Dict[str, List[str]]:
+    """Group sections by how this run produced them (see CareerPlanResponse)."""
+
+    return {
+        "recomputed": [k for k in SECTION_KEYS if status.get(k) == "recomputed"],
+        "reused": [
+            k for k in SECTION_KEYS if status.get(k) in ("reused", "shared", "snapshot")
+        ],
+        "speculated": [k for k in SECTION_KEYS if status.get(k) == "speculated"],
+    }
+
+
+def to_response(
+    final_state: Dict[str, Any],
+    thread_id: Optional[str] = None,
+) -> CareerPlanResponse:
+    """Return only the response fields defined by the API schema."""
+
+    return CareerPlanResponse(
+        skill_analysis=final_state.get("skill_analysis", {}),
+        market_analysis=final_state.get("market_analysis", {}),
+        strategy_analysis=final_state.get("strategy_analysis", {}),
+        roadmap=final_state.get("roadmap", {}),
+        thread_id=thread_id,
+        **section_report(final_state.get("section_status") or {}),
+        market_snapshot_version=final_state.get("market_analysis", {}).get(
+            "snapshot_version"
+        ),
+    )
+
+
+def _same_inputs(values: Dict[str, Any], payload: CareerPlanRequest) -> bool:
+    """True if a checkpointed plan was started from the same request."""
+
+    profile, resume_text = _split_resume(payload.user_profile)
+    resume_ref = blob_id(resume_text) if resume_text else ""
+    return (
+        values.get("user_profile") == profile
+        and values.get("resume_ref", "") == resume_ref
+        and values.get("skills") == payload.skills
+        and values.get("target_roles") == payload.target_roles
+        and (values.get("model_overrides") or {}) == (payload.model_overrides or {})
+    )
+
+
+def _as_reused(values: Dict[str, Any]) -> Dict[str, Any]:
+    """A finished plan's state, returned without running anything.
+
+    Its stored section_status describes the earlier run, so every section is
+    reported as reused instead.
+    """
+
+    return {**values, "section_status": dict.fromkeys(SECTION_KEYS, "reused")}
+
+
+@dataclass
+class PlanStart:
+    """How a plan request starts on its thread (see astart_plan())."""
+
+    # Graph input; None continues the stored run from its last checkpoint.
+    graph_input: Optional[Dict[str, Any]]
+    # Checkpointed values kept as they are (same inputs), else empty. For a
+    # finished plan, section_status reports every section as reused.
+    stored: Dict[str, Any]
+    # stored already holds the finished plan; nothing needs to run.
+    finished: bool = False
+
+
+async def astart_plan(
+    graph: Any,
+    payload: CareerPlanRequest,
+    config: Dict[str, Any],
+    market_analysis: Optional[Dict[str, Any]] = None,
+) -> PlanStart:
+    """Decide how to run a plan request on the thread addressed by config.
+
+    When the graph is checkpointed and the request reuses a thread_id, the
+    stored run is reused: a finished plan is returned as-is and a failed one
+    resumes from its last completed node. If the inputs changed (e.g. one
+    skill added), the new initial state carries the stored sections so only
+    nodes whose inputs changed are recomputed. A precomputed market_analysis
+    is passed through by the market node.
+    """
+
+    previous: Dict[str, Any] = {}
+    if graph.checkpointer is not None and payload.thread_id:
+        snapshot = await graph.aget_state(config)
+        if snapshot.values and _same_inputs(snapshot.values, payload):
+            if not snapshot.next:
+                return PlanStart(None, _as_reused(snapshot.values), finished=True)
+            # Passing None as input continues from the last checkpoint.
+            return PlanStart(None, snapshot.values)
+        if snapshot.values:
+            previous = {
+                "sections": {k: snapshot.values.get(k) for k in SECTION_KEYS},
+                "fingerprints": snapshot.values.get("fingerprints") or {},
+            }
+
+    # Only checkpointed runs need the resume to outlive the process.
+    resume_ref = await aintern_text(
+        _split_resume(payload.user_profile)[1],
+        persist=graph.checkpointer is not None,
+    )
+    initial_state = build_initial_state(payload, resume_ref)
+    initial_state["previous"] = previous
+    if market_analysis:
+        initial_state["market_analysis"] = dict(market_analysis)
+    return PlanStart(initial_state, {})
+
+
+# Identical plan requests for the same explicit thread_id in flight at the
+# same time share one graph run.
+_plan_flights = SingleFlight("plan")
+
+
+def coalescing_stats() -> Dict[str, Any]:
+    """Single-flight counts at plan level and per agent."""
+
+    return {"plan": _plan_flights.stats(), "agent": agent_flight_stats()}
+
+
+async def arun_plan(
+    payload: CareerPlanRequest,
+    market_analysis: Optional[Dict[str, Any]] = None,
+) -> CareerPlanResponse:
+    """Run one plan, coalescing concurrent identical requests.
+
+    Requests naming the same thread_id that arrive while an identical one
+    runs attach to it and receive a copy of its response (see _arun_plan()).
+    Without a thread_id every caller gets its own plan and thread_id; their
+    identical agent calls are still coalesced by the agent runtime.
+    """
+
+    if not settings.SINGLE_FLIGHT_ENABLED or not payload.thread_id:
+        return await _arun_plan(payload, market_analysis)
+    response, _ = await _plan_flights.run(
+        _fingerprint(payload.model_dump()),
+        lambda: _arun_plan(payload, market_analysis),
+    )
+    return response
+
+
+async def _arun_plan(
+    payload: CareerPlanRequest,
+    market_analysis: Optional[Dict[str, Any]] = None,
+) -> CareerPlanResponse:
+    """Run one plan through the shared graph (see astart_plan()).
+
+    Only plans with a caller-supplied thread_id are checkpointed; the others
+    run on the graph without a checkpointer and report no thread_id.
+    """
+
+    graph = get_graph(checkpointed=bool(payload.thread_id))
+    config = plan_config(payload.thread_id or uuid.uuid4().hex)
+
+    start = await astart_plan(graph, payload, config, market_analysis)
+    if start.finished:
+        final_state = start.stored
+    else:
+        final_state = await graph.ainvoke(start.graph_input, config)
+    return to_response(final_state, payload.thread_id)
+
+
+async def aget_plan(thread_id: str) -> Optional[CareerPlanStatus]:
+    """Return the stored state of a checkpointed plan, or None if unknown."""
+
+    graph = get_graph()
+    if graph.checkpointer is None:
+        return None
+    snapshot = await graph.aget_state(plan_config(thread_id))
+    if not snapshot.values:
+        return None
+    return CareerPlanStatus(
+        thread_id=thread_id,
+        status="pending" if snapshot.next else "completed",
+        next_steps=list(snapshot.next),
+        plan=to_response(snapshot.values, thread_id),
+    )
+
+
+async def aresume_plan(thread_id: str) -> Optional[CareerPlanResponse]:
+    """Finish a checkpointed plan from its last completed node.
+
+    Completed plans are returned without running anything; unknown IDs
+    return None.
+    """
+
+    graph = get_graph()
+    if graph.checkpointer is None:
+        return None
+    config = plan_config(thread_id)
+    snapshot = await graph.aget_state(config)
+    if not snapshot.values:
+        return None
+    if not snapshot.next:
+        return to_response(_as_reused(snapshot.values), thread_id)
+    final_state = await graph.ainvoke(None, config)
+    return to_response(final_state, thread_id)
+
+
+def _fingerprint(value: Any) -> str:
+    """Stable hash used to spot identical work inside a batch."""
+
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _market_fingerprint(payload: CareerPlanRequest) -> str:
+    """Market analysis only depends on the (unordered) skills and roles."""
+
+    return _fingerprint(
+        {
+            "skills": sorted({s.strip().lower() for s in payload.skills}),
+            "target_roles": sorted({r.strip().lower() for r in payload.target_roles}),
+            "model": select_model("market", payload.model_overrides),
+        }
+    )
+
+
+async def arun_batch(
+    payloads: List[CareerPlanRequest],
+    max_concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Run many plans with bounded concurrency and shared sub-results.
+
+    Identical requests are planned once, and each distinct skills/roles set
+    gets a single market analysis shared by every plan that needs it (from
+    its precomputed snapshot when there is one). LLM calls still go through
+    the process-wide Groq rate limiter.
+
+    Returns {"items": [...], "unique_plans": n, "unique_market_analyses": m}
+    where each item is {"index", "result", "error"} in input order.
+    """
+
+    semaphore = asyncio.Semaphore(max_concurrency or settings.BATCH_MAX_CONCURRENCY)
+
+    # Group identical plans and identical market inputs.
+    plan_keys = [_fingerprint(p.model_dump()) for p in payloads]
+    unique_plans: Dict[str, CareerPlanRequest] = {}
+    for key, payload in zip(plan_keys, payloads):
+        unique_plans.setdefault(key, payload)
+
+    market_inputs: Dict[str, CareerPlanRequest] = {}
+    for payload in unique_plans.values():
+        market_inputs.setdefault(_market_fingerprint(payload), payload)
+
+    async def market_for(payload: CareerPlanRequest) -> Optional[Dict[str, Any]]:
+        market_analysis = serve_snapshot(
+            payload.target_roles, payload.skills, payload.model_overrides
+        )
+        if market_analysis is None:
+            async with semaphore:
+                try:
+                    market_analysis = await aanalyze_market(
+                        target_roles=payload.target_roles,
+                        skills=payload.skills,
+                        model=select_model("market", payload.model_overrides),
+                    )
+                except Exception:
+                    # The plan's own market node will retry it.
+                    return None
+        market_analysis["generated_at"] = datetime.utcnow().isoformat()
+        return market_analysis
+
+    market_results = dict(
+        zip(
+            market_inputs.keys(),
+            await asyncio.gather(*(market_for(p) for p in market_inputs.values())),
+        )
+    )
+
+    async def plan_for(payload: CareerPlanRequest) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                response = await arun_plan(
+                    payload, market_results.get(_market_fingerprint(payload))
+                )
+                return {"result": response, "error": None}
+            except Exception as exc:
+                return {"result": None, "error": str(exc)}
+
+    plan_results = dict(
+        zip(
+            unique_plans.keys(),
+            await asyncio.gather(*(plan_for(p) for p in unique_plans.values())),
+        )
+    )
+
+    return {
+        "items": [
+            {"index": index, **plan_results[key]} for index, key in enumerate(plan_keys)
+        ],
+        "unique_plans": len(unique_plans),
+        "unique_market_analyses": len(market_inputs),
+    }
+
+
+def run_batch(
+    payloads: List[CareerPlanRequest],
+    max_concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Synchronous wrapper around arun_batch() for scripts and notebooks."""
+
+    return asyncio.run(arun_batch(payloads, max_concurrency=max_concurrency))
+
+
+def _read_jsonl(path: Path) -> Iterator[Tuple[int, str]]:
+    """Yield (line_number, line) lazily so large inputs are never loaded."""
+
+    with path.open("r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            if line.strip():
+                yield line_number, line
+
+
+def _load_checkpoint(path: Path) -> Set[str]:
+    """Return the IDs already completed by a previous run."""
+
+    if not path.exists():
+        return set()
+    with path.open("r", encoding="utf-8") as handle:
+        return {line.strip() for line in handle if line.strip()}
+
+
+async def arun_jsonl(
+    input_path: Path,
+    output_path: Path,
+    checkpoint_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, int]:
+    """Plan every request in a JSONL file with a fixed-size worker pool.
+
+    Each input line is a CareerPlanRequest object with an optional "id"
+    (falls back to "line-<n>"). Results are appended to output_path as
+    {"id", "result", "error"} lines as they finish. Successful IDs are
+    appended to the checkpoint file after their result is written, so an
+    interrupted run resumes without redoing them; failed items are retried
+    on the next run (the last record for an ID wins). A line repeating an
+    ID already queued in this run is not planned; it is recorded as an error
+    under "line-<n>" so the first line's result stands.
+
+    Memory is bounded by the queue size, not the input size (apart from the
+    sets of completed and queued IDs).
+    """
+
+    workers = workers or settings.BATCH_MAX_CONCURRENCY
+    checkpoint_path = checkpoint_path or output_path.with_name(output_path.name + ".done")
+    completed = _load_checkpoint(checkpoint_path)
+    # ID -> line number of every item queued by this run.
+    queued: Dict[str, int] = {}
+    summary = {"planned": 0, "failed": 0, "skipped": 0}
+
+    queue: "asyncio.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = asyncio.Queue(
+        maxsize=workers * 2
+    )
+    write_lock = asyncio.Lock()
+
+    with output_path.open("a", encoding="utf-8") as output, checkpoint_path.open(
+        "a", encoding="utf-8"
+    ) as checkpoint:
+
+        async def record(item_id: str, result: Any, error: Optional[str]) -> None:
+            line = json.dumps({"id": item_id, "result": result, "error": error})
+            async with write_lock:
+                output.write(line + "\n")
+                output.flush()
+                if error is None:
+                    checkpoint.write(item_id + "\n")
+                    checkpoint.flush()
+
+        async def worker() -> None:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                item_id, raw = item
+                try:
+                    response = await arun_plan(CareerPlanRequest(**raw))
+                except Exception as exc:
+                    summary["failed"] += 1
+                    await record(item_id, None, str(exc))
+                else:
+                    summary["planned"] += 1
+                    await record(item_id, response.model_dump(), None)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+
+        # Producer: feed lines as workers free up (put() blocks when full).
+        for line_number, line in _read_jsonl(input_path):
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError as exc:
+                summary["failed"] += 1
+                await record(f"line-{line_number}", None, f"Invalid JSON: {exc}")
+                continue
+            if not isinstance(raw, dict):
+                summary["failed"] += 1
+                await record(
+                    f"line-{line_number}",
+                    None,
+                    f"Expected a JSON object, got {type(raw).__name__}",
+                )
+                continue
+            item_id = str(raw.pop("id", None) or f"line-{line_number}")
+            if item_id in completed:
+                summary["skipped"] += 1
+                continue
+            if item_id in queued:
+                summary["failed"] += 1
+                await record(
+                    f"line-{line_number}",
+                    None,
+                    f"Duplicate id {item_id!r} (first seen on line {queued[item_id]})",
+                )
+                continue
+            queued[item_id] = line_number
+            await queue.put((item_id, raw))
+
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point: python -m app.api.planner run <input.jsonl>."""
+
+    parser = argparse.ArgumentParser(prog="python -m app.api.planner")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Generate plans for a JSONL file.")
+    run.add_argument("input", type=Path, help="JSONL file of CareerPlanRequest objects.")
+    run.add_argument("--output", type=Path, help="Results JSONL (default: <input>.results.jsonl).")
+    run.add_argument("--checkpoint", type=Path, help="Completed-ID file (default: <output>.done).")
+    run.add_argument("--workers", type=int, default=settings.BATCH_MAX_CONCURRENCY)
+
+    args = parser.parse_args(argv)
+    output = args.output or args.input.with_suffix(".results.jsonl")
+    summary = asyncio.run(
+        arun_jsonl(args.input, output, args.checkpoint, workers=args.workers)
+    )
+    print(json.dumps(summary))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
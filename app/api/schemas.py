@@ -1,8 +1,15 @@
 """Pydantic schemas for the Career Strategy Planner API."""
 
-from typing import Dict, List
+from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from app.llm.routing import is_allowed_model
+from app.utils.helpers import normalize_skills
+from config import settings
+
+# Keys accepted in CareerPlanRequest.model_overrides.
+ROUTABLE_AGENTS = ("skill", "market", "strategy", "roadmap", "default")
 
 
 class CareerPlanRequest(BaseModel):
@@ -11,6 +18,45 @@ class CareerPlanRequest(BaseModel):
     user_profile: Dict = Field(..., description="Raw user profile data.")
     skills: List[str] = Field(..., description="List of user skills.")
     target_roles: List[str] = Field(..., description="Target role titles.")
+    thread_id: Optional[str] = Field(
+        None,
+        description="Plan ID. Only plans with one are stored (when checkpointing "
+        "is on); reusing it retries/resumes the same plan from its last "
+        "completed step.",
+    )
+    model_overrides: Optional[Dict[str, str]] = Field(
+        None,
+        description='Per-agent model routing, e.g. {"roadmap": "fast"} or '
+        '{"default": "quality"}. Values are a tier ("fast"/"quality") or a Groq '
+        "model ID from ALLOWED_MODELS; keys are skill, market, strategy, roadmap or "
+        "default.",
+    )
+
+    @field_validator("skills")
+    @classmethod
+    def _canonical_skills(cls, skills: List[str]) -> List[str]:
+        """Map skills to canonical taxonomy names before any agent runs."""
+
+        return normalize_skills(skills)
+
+    @field_validator("model_overrides")
+    @classmethod
+    def _known_agents(
+        cls, overrides: Optional[Dict[str, str]]
+    ) -> Optional[Dict[str, str]]:
+        """Reject overrides for unknown agents or models that are not allowed."""
+
+        unknown = set(overrides or {}) - set(ROUTABLE_AGENTS)
+        if unknown:
+            raise ValueError(f"Unknown agents in model_overrides: {sorted(unknown)}")
+        models = {m for m in (overrides or {}).values() if not is_allowed_model(m)}
+        if models:
+            raise ValueError(
+                f"Unknown models in model_overrides: {sorted(models)}; use a tier "
+                f"{sorted(settings.MODEL_TIERS)} or a model in "
+                f"{sorted(settings.ALLOWED_MODELS)}"
+            )
+        return overrides
 
 
 class CareerPlanResponse(BaseModel):
@@ -20,3 +66,110 @@ class CareerPlanResponse(BaseModel):
     market_analysis: Dict = Field(..., description="Market intelligence output.")
     strategy_analysis: Dict = Field(..., description="Career strategy output.")
     roadmap: Dict = Field(..., description="Roadmap planning output.")
+    thread_id: Optional[str] = Field(
+        None, description="Plan ID for fetch/resume; None if the plan is not stored."
+    )
+    recomputed: List[str] = Field(
+        default_factory=list, description="Sections generated by this run."
+    )
+    reused: List[str] = Field(
+        default_factory=list,
+        description="Sections reused from a prior run, shared within a batch or "
+        "served from a precomputed market snapshot.",
+    )
+    speculated: List[str] = Field(
+        default_factory=list,
+        description="Sections taken from a draft started while their inputs "
+        "were still streaming (see ROADMAP_SPECULATION).",
+    )
+    market_snapshot_version: Optional[str] = Field(
+        None,
+        description="Version of the precomputed market snapshot behind "
+        "market_analysis; None when it was generated live.",
+    )
+
+
+class CareerPlanEvent(BaseModel):
+    """One NDJSON line emitted by the streaming career plan endpoint.
+
+    "partial" events carry a single field of a section (path such as
+    "summary" or "phases[0]") as soon as the model has finished writing it.
+    "section" events carry a finished graph section (skill_analysis,
+    market_analysis, strategy_analysis or roadmap) as soon as its node
+    completes. The stream ends with a single "done" or "error" event; "done"
+    carries the thread_id and the recomputed / reused / speculated section
+    lists of CareerPlanResponse.
+    """
+
+    event: Literal["partial", "section", "done", "error"] = Field(
+        ..., description="Event type."
+    )
+    section: Optional[str] = Field(None, description="Response field this event fills.")
+    path: Optional[str] = Field(None, description="Field path for partial events.")
+    value: Any = Field(None, description="Field value for partial events.")
+    data: Dict = Field(default_factory=dict, description="Section payload.")
+    detail: Optional[str] = Field(None, description="Error message for error events.")
+
+
+class CareerPlanBatchRequest(BaseModel):
+    """Request payload for planning a cohort in one call."""
+
+    items: List[CareerPlanRequest] = Field(..., description="Plans to generate.")
+    max_concurrency: Optional[int] = Field(
+        None, ge=1, description="Upper bound on plans running at once."
+    )
+
+
+class CareerPlanBatchItem(BaseModel):
+    """Outcome for one batch item; exactly one of result/error is set."""
+
+    index: int = Field(..., description="Position of the item in the request.")
+    result: Optional[CareerPlanResponse] = Field(None, description="Generated plan.")
+    error: Optional[str] = Field(None, description="Error message if the plan failed.")
+
+
+class CareerPlanBatchResponse(BaseModel):
+    """Response payload for a batch of career plans."""
+
+    items: List[CareerPlanBatchItem] = Field(..., description="Per-item outcomes.")
+    unique_plans: int = Field(..., description="Distinct plans actually generated.")
+    unique_market_analyses: int = Field(
+        ..., description="Distinct market analyses shared across the batch."
+    )
+
+
+class CareerPlanStatus(BaseModel):
+    """Stored state of a checkpointed plan."""
+
+    thread_id: str = Field(..., description="Plan ID.")
+    status: Literal["completed", "pending"] = Field(..., description="Run status.")
+    next_steps: List[str] = Field(
+        default_factory=list, description="Nodes still to run for pending plans."
+    )
+    plan: CareerPlanResponse = Field(..., description="Sections produced so far.")
+
+
+class RoleFitProfile(BaseModel):
+    """One profile to score deterministically against roles."""
+
+    skills: List[str] = Field(..., description="List of user skills.")
+    target_roles: List[str] = Field(
+        default_factory=list,
+        description="Roles to score; every catalog role (best first) when empty.",
+    )
+
+
+class RoleFitRequest(BaseModel):
+    """Request payload for batch role-fit scoring (no LLM calls)."""
+
+    profiles: List[RoleFitProfile] = Field(..., description="Profiles to score.")
+
+
+class RoleFitResponse(BaseModel):
+    """Per-profile role-fit scores, in request order."""
+
+    results: List[List[Dict]] = Field(
+        ...,
+        description="For each profile: role, matched_role, fit_score (0-100), "
+        "matched, required, overlap and gaps.",
+    )
@@ -1,33 +1,184 @@
 """LangGraph definition for the career strategy workflow."""
 
-from langgraph.graph import StateGraph
+import functools
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
 
 from app.graph.nodes import (
+    amarket_node,
+    aroadmap_node,
+    askill_node,
+    astrategy_node,
     market_node,
     roadmap_node,
     skill_node,
     strategy_node,
 )
 from app.graph.state import CareerState
+from app.utils.metrics import NODE_SECONDS
+
+NodeFunc = Callable[[CareerState], Dict[str, Any]]
+AsyncNodeFunc = Callable[[CareerState], Awaitable[Dict[str, Any]]]
+
+
+def _node_status(section: str, update: Dict[str, Any]) -> str:
+    """Status reported in the node's update (recomputed if none).
+
+    One of recomputed, reused, shared, snapshot or speculated; the timing
+    wrapper records "error" when the node raises.
+    """
+
+    return (update.get("section_status") or {}).get(section, "recomputed")
+
+
+def _timed_node(section: str, func: NodeFunc, afunc: AsyncNodeFunc) -> RunnableLambda:
+    """Wrap a node's sync and async variants to record their wall time."""
+
+    @functools.wraps(func)
+    def run(state: CareerState) -> Dict[str, Any]:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            update = func(state)
+            status = _node_status(section, update)
+            return update
+        finally:
+            NODE_SECONDS.observe(
+                time.perf_counter() - started, node=section, status=status
+            )
 
+    @functools.wraps(afunc)
+    async def arun(state: CareerState) -> Dict[str, Any]:
+        started = time.perf_counter()
+        status = "error"
+        try:
+            update = await afunc(state)
+            status = _node_status(section, update)
+            return update
+        finally:
+            NODE_SECONDS.observe(
+                time.perf_counter() - started, node=section, status=status
+            )
 
-def build_graph():
-    """Build and compile a sequential graph for career strategy analysis."""
+    return RunnableLambda(run, afunc=arun)
+
+
+def build_graph(checkpointer: Optional[Any] = None):
+    """Build and compile the career strategy analysis DAG.
+
+    Skill and market analysis are independent of each other, so they fan out
+    from the entry point and run concurrently. Strategy analysis joins on both,
+    and the roadmap runs last.
+
+    With a checkpointer, state is saved after every node, so a failed run can
+    resume from the last completed node (invoke with a thread_id).
+    """
 
     graph = StateGraph(CareerState)
 
     # IMPORTANT: Node IDs must match the semantic state keys.
     # If IDs mismatch, downstream steps won't receive the expected state fields.
-    graph.add_node("skill_analysis", skill_node)
-    graph.add_node("market_analysis", market_node)
-    graph.add_node("strategy_analysis", strategy_node)
-    graph.add_node("roadmap", roadmap_node)
-
-    # Sequential execution order.
-    graph.set_entry_point("skill_analysis")
-    graph.add_edge("skill_analysis", "market_analysis")
-    graph.add_edge("market_analysis", "strategy_analysis")
+    # Each node carries a sync and an async implementation, so the same
+    # compiled graph serves invoke() (scripts) and ainvoke() (the API). Both
+    # report their wall time to /metrics (career_node_seconds).
+    graph.add_node(
+        "skill_analysis", _timed_node("skill_analysis", skill_node, askill_node)
+    )
+    graph.add_node(
+        "market_analysis", _timed_node("market_analysis", market_node, amarket_node)
+    )
+    graph.add_node(
+        "strategy_analysis",
+        _timed_node("strategy_analysis", strategy_node, astrategy_node),
+    )
+    graph.add_node("roadmap", _timed_node("roadmap", roadmap_node, aroadmap_node))
+
+    # Fan out: both analyses only depend on the request inputs.
+    graph.add_edge(START, "skill_analysis")
+    graph.add_edge(START, "market_analysis")
+
+    # Join: strategy waits until both analyses have written their keys.
+    graph.add_edge(["skill_analysis", "market_analysis"], "strategy_analysis")
     graph.add_edge("strategy_analysis", "roadmap")
-    graph.set_finish_point("roadmap")
+    graph.add_edge("roadmap", END)
+
+    return graph.compile(checkpointer=checkpointer)
+
+
+# Process-wide compiled graph. Compiling a StateGraph is cheap compared to an
+# LLM call but is pure overhead per request, so it is built once and swapped
+# atomically when the workflow needs to be reloaded.
+_graph_lock = threading.Lock()
+_compiled_graph = None
+# The same graph without the checkpointer, for runs that are not stored.
+_unsaved_graph = None
+_checkpointer: Optional[Any] = None
+_graph_info: Dict[str, Any] = {
+    "version": 0,
+    "compiled_at": None,
+    "compile_seconds": None,
+    "checkpointing": False,
+}
+
+
+def set_checkpointer(checkpointer: Optional[Any]) -> None:
+    """Set the checkpointer used by subsequent reload_graph() calls."""
+
+    global _checkpointer
+
+    _checkpointer = checkpointer
+
+
+def reload_graph():
+    """Compile a fresh graph and swap it in for subsequent requests.
+
+    In-flight requests keep the graph object they already hold, so a reload
+    never interrupts a running plan.
+    """
+
+    global _compiled_graph, _unsaved_graph
+
+    started = time.perf_counter()
+    compiled = build_graph(checkpointer=_checkpointer)
+    unsaved = compiled
+    if _checkpointer is not None:
+        unsaved = compiled.copy(update={"checkpointer": None})
+    elapsed = time.perf_counter() - started
+
+    with _graph_lock:
+        _compiled_graph = compiled
+        _unsaved_graph = unsaved
+        _graph_info["version"] += 1
+        _graph_info["compiled_at"] = datetime.utcnow().isoformat()
+        _graph_info["compile_seconds"] = elapsed
+        _graph_info["checkpointing"] = _checkpointer is not None
+
+    return compiled
+
+
+def get_graph(checkpointed: bool = True):
+    """Return the shared compiled graph, compiling it on first use.
+
+    checkpointed=False returns the same graph without the checkpointer, for
+    runs whose state should not be stored.
+    """
+
+    compiled = _compiled_graph if checkpointed else _unsaved_graph
+    if compiled is None:
+        # Normally the API lifespan has compiled it already; scripts and
+        # workers that skip the lifespan compile lazily here instead.
+        reload_graph()
+        compiled = _compiled_graph if checkpointed else _unsaved_graph
+    return compiled
+
+
+def get_graph_info() -> Dict[str, Any]:
+    """Return version and compile timing for the current graph."""
 
-    return graph.compile()
+    with _graph_lock:
+        return dict(_graph_info)
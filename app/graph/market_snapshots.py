@@ -0,0 +1,434 @@
+"""Precomputed market intelligence snapshots.
+
+Market trends for a role move over weeks, yet the market node used to
+generate them for every request. With MARKET_SNAPSHOTS_ENABLED, a background
+refresher precomputes role-level market analyses into a local versioned
+store (SQLite at MARKET_SNAPSHOT_PATH). It covers:
+- the role combinations seen most often in traffic (at least
+  MARKET_SNAPSHOT_MIN_SEEN times),
+- the first MARKET_SNAPSHOT_TOP_ROLES roles of data/role_profiles.tsv, so a
+  fresh deployment starts warm.
+
+The market node serves a stored snapshot instead of calling the LLM. Role
+titles are matched through the role catalog, so aliases share a snapshot.
+Snapshots are generated without user skills; skill_gaps is derived per
+request from the snapshot's in_demand_skills and the user's skills. Each
+served section carries the snapshot_version it came from. Unseen role
+combinations, requests that override the market model and snapshots older
+than MARKET_SNAPSHOT_MAX_AGE_SECONDS fall back to live generation (and count
+towards the next refresh).
+
+Usage:
+    section = serve_snapshot(target_roles, skills, model_overrides)
+    if section is None:
+        section = await aanalyze_market(target_roles, skills)
+
+    # API lifespan:
+    task = asyncio.create_task(run_refresher())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.agents.market_agent import MARKET_AGENT, aanalyze_market
+from app.llm.routing import select_model
+from app.utils.helpers import get_skill_taxonomy
+from app.utils.role_fit import get_role_catalog
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS market_snapshots (
+    role_key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    roles TEXT NOT NULL,
+    data TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    PRIMARY KEY (role_key, version)
+);
+CREATE TABLE IF NOT EXISTS market_traffic (
+    role_key TEXT PRIMARY KEY,
+    roles TEXT NOT NULL,
+    seen INTEGER NOT NULL
+);
+"""
+
+
+def role_key(target_roles: Sequence[str]) -> Tuple[str, List[str]]:
+    """Order-insensitive key for a role combination, plus its display roles.
+
+    Catalog roles are keyed by their canonical title, so "Backend Developer"
+    and "Backend Engineer" share a snapshot; unknown titles by their
+    normalized text.
+    """
+
+    catalog = get_role_catalog()
+    roles: Dict[str, str] = {}
+    for title in target_roles:
+        if not isinstance(title, str) or not title.strip():
+            continue
+        row = catalog.role_row(title)
+        name = catalog.titles[row] if row is not None else " ".join(title.split())
+        roles.setdefault(name.casefold(), name)
+    key = "|".join(sorted(roles))
+    return key, [roles[k] for k in sorted(roles)]
+
+
+def _skill_gaps(in_demand: Sequence[Any], skills: Sequence[str]) -> List[str]:
+    """In-demand skills the user does not list (taxonomy aliases count)."""
+
+    taxonomy = get_skill_taxonomy()
+
+    def skill_id(name: str) -> str:
+        return taxonomy.lookup(name) or name.strip().casefold()
+
+    have = {skill_id(s) for s in skills if isinstance(s, str)}
+    return [s for s in in_demand if isinstance(s, str) and skill_id(s) not in have]
+
+
+class MarketSnapshotStore:
+    """Versioned market analyses per role combination, plus traffic counts.
+
+    The latest version of each snapshot is kept in memory; every version
+    (up to MARKET_SNAPSHOT_KEEP_VERSIONS per combination) is kept in SQLite.
+    An empty path keeps everything in memory.
+    """
+
+    def __init__(self, path: str = "") -> None:
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        # Lookups since the last refresh: key -> [roles, count].
+        self._seen: Dict[str, List[Any]] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        """Load the latest versions from SQLite, e.g. written by another worker."""
+
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT role_key, version, roles, data, refreshed_at"
+                " FROM market_snapshots ORDER BY refreshed_at"
+            ).fetchall()
+            for key, version, roles, data, refreshed_at in rows:
+                self._latest[key] = {
+                    "version": version,
+                    "roles": json.loads(roles),
+                    "data": json.loads(data),
+                    "refreshed_at": refreshed_at,
+                }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Latest snapshot for a role key: {version, roles, data, refreshed_at}."""
+
+        with self._lock:
+            return self._latest.get(key)
+
+    def note_lookup(self, key: str, roles: List[str]) -> None:
+        """Count a lookup so popular combinations get precomputed."""
+
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None:
+                # Role sets are user input: bound what one refresh interval
+                # can accumulate; later newcomers wait for the next one.
+                if len(self._seen) >= settings.MARKET_SNAPSHOT_MAX_TRACKED:
+                    return
+                entry = self._seen[key] = [roles, 0]
+            entry[1] += 1
+
+    def put(
+        self,
+        key: str,
+        roles: List[str],
+        data: Dict[str, Any],
+        version: str,
+        refreshed_at: float,
+    ) -> None:
+        """Store a new version and prune the oldest beyond the keep limit."""
+
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO market_snapshots"
+                " (role_key, version, roles, data, refreshed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, version, json.dumps(roles), json.dumps(data), refreshed_at),
+            )
+            self._db.execute(
+                "DELETE FROM market_snapshots WHERE role_key = ? AND version NOT IN"
+                " (SELECT version FROM market_snapshots WHERE role_key = ?"
+                " ORDER BY refreshed_at DESC LIMIT ?)",
+                (key, key, max(1, settings.MARKET_SNAPSHOT_KEEP_VERSIONS)),
+            )
+            self._db.commit()
+            self._latest[key] = {
+                "version": version,
+                "roles": roles,
+                "data": data,
+                "refreshed_at": refreshed_at,
+            }
+
+    def targets(self) -> List[Tuple[str, List[str]]]:
+        """Role combinations to keep precomputed, most requested first.
+
+        Flushes the lookup counts gathered since the last call into SQLite,
+        which keeps the MARKET_SNAPSHOT_MAX_TRACKED most requested ones.
+        """
+
+        with self._lock:
+            seen, self._seen = self._seen, {}
+            for key, (roles, count) in seen.items():
+                self._db.execute(
+                    "INSERT INTO market_traffic (role_key, roles, seen)"
+                    " VALUES (?, ?, ?) ON CONFLICT(role_key)"
+                    " DO UPDATE SET seen = seen + excluded.seen",
+                    (key, json.dumps(roles), count),
+                )
+            self._db.execute(
+                "DELETE FROM market_traffic WHERE role_key NOT IN"
+                " (SELECT role_key FROM market_traffic"
+                " ORDER BY seen DESC, role_key LIMIT ?)",
+                (max(1, settings.MARKET_SNAPSHOT_MAX_TRACKED),),
+            )
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT role_key, roles FROM market_traffic WHERE seen >= ?"
+                " ORDER BY seen DESC, role_key",
+                (max(1, settings.MARKET_SNAPSHOT_MIN_SEEN),),
+            ).fetchall()
+
+        targets: Dict[str, List[str]] = {key: json.loads(roles) for key, roles in rows}
+        for title in get_role_catalog().titles[: settings.MARKET_SNAPSHOT_TOP_ROLES]:
+            key, roles = role_key([title])
+            targets.setdefault(key, roles)
+        return list(targets.items())[: settings.MARKET_SNAPSHOT_MAX_ENTRIES]
+
+    def stats(self) -> Dict[str, Any]:
+        """Stored combinations, versions and pending lookup counts."""
+
+        with self._lock:
+            latest = {key: entry["version"] for key, entry in self._latest.items()}
+            pending = len(self._seen)
+            versions = self._db.execute(
+                "SELECT COUNT(*) FROM market_snapshots"
+            ).fetchone()[0]
+        return {
+            "snapshots": len(latest),
+            "stored_versions": versions,
+            "pending_lookups": pending,
+            "latest": latest,
+        }
+
+
+_store: Optional[MarketSnapshotStore] = None
+_store_lock = threading.Lock()
+_stats: Dict[str, Any] = {
+    "hits": 0,
+    "misses": 0,
+    "stale": 0,
+    "bypassed": 0,
+    "refreshes": 0,
+    "refreshed": 0,
+    "refresh_failures": 0,
+    "last_version": None,
+    "last_error": None,
+}
+_refreshing = False
+
+
+def _count(name: str, amount: int = 1) -> None:
+    """Bump a snapshot counter."""
+
+    with _store_lock:
+        _stats[name] += amount
+
+
+def get_snapshot_store() -> MarketSnapshotStore:
+    """Return the process-wide snapshot store, opening it on first use."""
+
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MarketSnapshotStore(settings.MARKET_SNAPSHOT_PATH)
+    return _store
+
+
+def serve_snapshot(
+    target_roles: Sequence[str],
+    skills: Sequence[str],
+    model_overrides: Optional[Dict[str, str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Market analysis for a request from its snapshot, or None to go live.
+
+    The snapshot's skill_gaps is replaced by the gaps of this user's skills,
+    and snapshot_version is added.
+    """
+
+    if not settings.MARKET_SNAPSHOTS_ENABLED:
+        return None
+    overrides = model_overrides or {}
+    if "market" in overrides or "default" in overrides:
+        # Snapshots come from the default market model.
+        _count("bypassed")
+        return None
+    key, roles = role_key(target_roles)
+    if not key:
+        return None
+
+    store = get_snapshot_store()
+    store.note_lookup(key, roles)
+    snapshot = store.get(key)
+    if snapshot is None:
+        _count("misses")
+        return None
+    age = time.time() - snapshot["refreshed_at"]
+    if age > settings.MARKET_SNAPSHOT_MAX_AGE_SECONDS:
+        _count("stale")
+        return None
+
+    _count("hits")
+    data = snapshot["data"]
+    return {
+        **data,
+        "skill_gaps": _skill_gaps(data.get("in_demand_skills") or [], skills),
+        "snapshot_version": snapshot["version"],
+    }
+
+
+def _due(snapshot: Optional[Dict[str, Any]], now: float) -> bool:
+    """True if a snapshot is missing or MARKET_SNAPSHOT_REFRESH_SECONDS old."""
+
+    if snapshot is None:
+        return True
+    return now - snapshot["refreshed_at"] >= settings.MARKET_SNAPSHOT_REFRESH_SECONDS
+
+
+async def refresh_snapshots(force: bool = False) -> Dict[str, Any]:
+    """Regenerate the target snapshots that are missing or due.
+
+    force regenerates every target. Everything refreshed in one pass shares a version.
+    Returns {"version", "refreshed", "failed"}.
+    """
+
+    global _refreshing
+
+    if _refreshing:
+        return {"version": None, "refreshed": 0, "failed": 0, "running": True}
+    _refreshing = True
+    try:
+        store = get_snapshot_store()
+        # Other workers sharing MARKET_SNAPSHOT_PATH may have refreshed some.
+        store.reload()
+        now = time.time()
+        due = [
+            (key, roles)
+            for key, roles in store.targets()
+            if force or _due(store.get(key), now)
+        ]
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        semaphore = asyncio.Semaphore(max(1, settings.MARKET_SNAPSHOT_CONCURRENCY))
+        model = select_model("market", None)
+        failed = 0
+
+        async def refresh(key: str, roles: List[str]) -> None:
+            nonlocal failed
+            async with semaphore:
+                try:
+                    # Skip the response cache, or a refresh within its TTL
+                    # would re-store the same analysis as a new version.
+                    data = await aanalyze_market(roles, [], model=model, refresh=True)
+                except Exception as exc:  # kept until the next pass
+                    failed += 1
+                    with _store_lock:
+                        _stats["last_error"] = f"{type(exc).__name__}: {exc}"
+                    return
+            if data.get("market_summary") == MARKET_AGENT.defaults["market_summary"]:
+                # The agent fell back to its defaults; keep the old snapshot.
+                failed += 1
+                return
+            store.put(key, roles, data, version, time.time())
+
+        await asyncio.gather(*(refresh(key, roles) for key, roles in due))
+        refreshed = len(due) - failed
+        _count("refreshes")
+        _count("refreshed", refreshed)
+        _count("refresh_failures", failed)
+        if refreshed:
+            with _store_lock:
+                _stats["last_version"] = version
+        return {"version": version, "refreshed": refreshed, "failed": failed}
+    finally:
+        _refreshing = False
+
+
+async def _guarded_refresh(force: bool = False) -> None:
+    """refresh_snapshots() for background use: errors are logged, not raised."""
+
+    try:
+        await refresh_snapshots(force=force)
+    except Exception as exc:
+        logger.exception("Market snapshot refresh failed")
+        with _store_lock:
+            _stats["last_error"] = f"{type(exc).__name__}: {exc}"
+
+
+_background: Optional["asyncio.Task[None]"] = None
+
+
+def schedule_refresh(force: bool = False) -> bool:
+    """Start refresh_snapshots() in the background.
+
+    Returns False if snapshots are disabled or a refresh is already running.
+    """
+
+    global _background
+
+    if not settings.MARKET_SNAPSHOTS_ENABLED:
+        return False
+    if _refreshing or (_background is not None and not _background.done()):
+        return False
+    _background = asyncio.ensure_future(_guarded_refresh(force=force))
+    return True
+
+
+async def run_refresher() -> None:
+    """Refresh due snapshots every MARKET_SNAPSHOT_POLL_SECONDS, forever.
+
+    A failed pass (LLM or SQLite error) is logged and retried on the next
+    poll instead of ending the task.
+    """
+
+    while True:
+        await _guarded_refresh()
+        await asyncio.sleep(settings.MARKET_SNAPSHOT_POLL_SECONDS)
+
+
+def snapshot_stats() -> Dict[str, Any]:
+    """Serve/refresh counters, hit rate and the store's contents.
+
+    The store is only opened (and its SQLite file created) when snapshots
+    are enabled.
+    """
+
+    with _store_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"] + stats["stale"]
+    stats["enabled"] = settings.MARKET_SNAPSHOTS_ENABLED
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["refreshing"] = _refreshing
+    if settings.MARKET_SNAPSHOTS_ENABLED:
+        stats["store"] = get_snapshot_store().stats()
+    return stats
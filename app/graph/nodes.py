@@ -1,90 +1,325 @@
-"""Placeholder node implementations for the career strategy graph."""
+"""Node implementations for the career strategy graph.
+
+Each node returns only the state keys it produces. LangGraph merges these
+partial updates into the shared state, which keeps concurrent branches
+(skill and market analysis) from overwriting each other.
+
+Every node has a sync and an async variant sharing the same input/output
+handling; the graph uses the sync one for invoke() and the async one for
+ainvoke()/astream(). Async nodes also publish partially parsed fields on the
+"custom" stream mode as {"section", "path", "value"} dicts.
+
+Nodes fingerprint the inputs they actually read. When a prior run of the
+same plan is supplied in state["previous"] and a node's fingerprint is
+unchanged, the prior section is reused instead of calling the agent.
+
+With ROADMAP_SPECULATION on, the async strategy node also starts a roadmap
+draft as soon as the strategy fields the roadmap prompt reads
+(SPECULATED_FIELDS, see app.graph.speculation) have streamed. The roadmap
+node keeps the draft if the final strategy has the same values for them.
+
+The market node serves precomputed market snapshots for known role
+combinations (see app.graph.market_snapshots) and only calls the agent for
+unseen ones.
+
+The model for each agent comes from app.llm.routing.select_model(), using the
+request's model_overrides from the state.
+
+Each section is stamped with generated_at and the request's trace_id, which
+also appears in the X-Trace-ID response header (see app.utils.metrics).
+"""
 
 from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from langgraph.config import get_stream_writer
 
-from app.agents.market_agent import analyze_market
-from app.agents.roadmap_agent import analyze_roadmap
-from app.agents.skill_agent import analyze_skills
-from app.agents.strategy_agent import analyze_strategy
+from app.agents.market_agent import aanalyze_market, analyze_market
+from app.agents.roadmap_agent import aanalyze_roadmap, analyze_roadmap
+from app.agents.skill_agent import aanalyze_skills, analyze_skills
+from app.agents.strategy_agent import aanalyze_strategy, analyze_strategy
+from app.graph.market_snapshots import serve_snapshot
+from app.graph.speculation import (
+    SPECULATED_FIELDS,
+    cancel_roadmap_draft,
+    start_roadmap_draft,
+    take_roadmap_draft,
+)
 from app.graph.state import CareerState
+from app.llm.cache import make_cache_key
+from app.llm.json_stream import PartialCallback
+from app.llm.routing import select_model
+from app.utils.blobs import resolve_text
+
+
+def _stamp(result: Dict[str, Any], state: CareerState) -> Dict[str, Any]:
+    """Keep a timestamp and trace ID to track when and by which request an
+    analysis was generated."""
+
+    result["generated_at"] = datetime.utcnow().isoformat()
+    result["trace_id"] = state.get("trace_id") or ""
+    return result
+
+
+def _previous_output(
+    state: CareerState, section: str, inputs: Dict[str, Any]
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Fingerprint a node's inputs and find a reusable prior output."""
+
+    # Same canonicalization as the response cache: order/case-insensitive
+    # lists, generated_at ignored.
+    fingerprint = make_cache_key(section, "", inputs)
+    previous = state.get("previous") or {}
+    if (previous.get("fingerprints") or {}).get(section) == fingerprint:
+        prior = (previous.get("sections") or {}).get(section)
+        if prior:
+            return fingerprint, prior
+    return fingerprint, None
+
+
+def _update(
+    section: str, result: Dict[str, Any], fingerprint: str, status: str
+) -> Dict[str, Any]:
+    """Build a node's partial state update."""
+
+    return {
+        section: result,
+        "fingerprints": {section: fingerprint},
+        "section_status": {section: status},
+    }
+
+
+def _partial_writer(section: str) -> Optional[PartialCallback]:
+    """Forward agent partial fields to the graph's custom stream, if any."""
+
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (e.g. directly from a script).
+        return None
+
+    def on_partial(path: str, value: Any) -> None:
+        writer({"section": section, "path": path, "value": value})
+
+    return on_partial
+
+
+def _model(state: CareerState, agent: str) -> str:
+    """Model for an agent, honoring the request's overrides and fallbacks."""
+
+    return select_model(agent, state.get("model_overrides"))
+
+
+def _resume_text(state: CareerState) -> str:
+    """Resume text from its blob reference, else inline in user_profile."""
+
+    if state.get("resume_ref"):
+        return resolve_text(state["resume_ref"])
+    user_profile = state.get("user_profile", {}) or {}
+    return user_profile.get("resume_text", "")
+
 
+def _skill_inputs(state: CareerState) -> Dict[str, Any]:
+    """Read skill analysis inputs, resolving the resume text blob."""
 
-def skill_node(state: CareerState) -> CareerState:
+    return {
+        "resume_text": _resume_text(state),
+        "skills": state.get("skills", []) or [],
+        "target_roles": state.get("target_roles", []) or [],
+    }
+
+
+def _market_inputs(state: CareerState) -> Dict[str, Any]:
+    """Read market intelligence inputs; independent of skill analysis."""
+
+    return {
+        "target_roles": state.get("target_roles", []) or [],
+        "skills": state.get("skills", []) or [],
+    }
+
+
+def _strategy_inputs(state: CareerState) -> Dict[str, Any]:
+    """Read strategy inputs produced by the skill and market nodes."""
+
+    return {
+        "skill_analysis": state.get("skill_analysis", {}) or {},
+        "market_analysis": state.get("market_analysis", {}) or {},
+        "target_roles": state.get("target_roles", []) or [],
+    }
+
+
+def _roadmap_inputs(state: CareerState) -> Dict[str, Any]:
+    """Read roadmap inputs produced by the strategy and skill nodes."""
+
+    return {
+        "strategy_analysis": state.get("strategy_analysis", {}) or {},
+        "skill_analysis": state.get("skill_analysis", {}) or {},
+        "target_roles": state.get("target_roles", []) or [],
+    }
+
+
+def skill_node(state: CareerState) -> Dict[str, Any]:
     """Skill analysis node.
 
-    Pulls inputs from the shared state and stores structured output back.
+    Pulls inputs from the shared state and returns the structured output.
     """
 
-    # Read inputs from the state (resume text is expected in user_profile).
-    user_profile = state.get("user_profile", {}) or {}
-    resume_text = user_profile.get("resume_text", "")
-    skills = state.get("skills", []) or []
-    target_roles = state.get("target_roles", []) or []
-
-    # Run the Skill Analyzer agent and store the results in state.
-    state["skill_analysis"] = analyze_skills(
-        resume_text=resume_text,
-        skills=skills,
-        target_roles=target_roles,
+    inputs = _skill_inputs(state)
+    fingerprint, prior = _previous_output(state, "skill_analysis", inputs)
+    if prior is not None:
+        return _update("skill_analysis", prior, fingerprint, "reused")
+    result = _stamp(analyze_skills(**inputs, model=_model(state, "skill")), state)
+    return _update("skill_analysis", result, fingerprint, "recomputed")
+
+
+async def askill_node(state: CareerState) -> Dict[str, Any]:
+    """Async skill analysis node."""
+
+    inputs = _skill_inputs(state)
+    fingerprint, prior = _previous_output(state, "skill_analysis", inputs)
+    if prior is not None:
+        return _update("skill_analysis", prior, fingerprint, "reused")
+    result = await aanalyze_skills(
+        **inputs,
+        on_partial=_partial_writer("skill_analysis"),
+        model=_model(state, "skill"),
     )
-    # Keep a timestamp to track when this analysis was generated.
-    state["skill_analysis"]["generated_at"] = datetime.utcnow().isoformat()
-    return state
+    return _update("skill_analysis", _stamp(result, state), fingerprint, "recomputed")
 
 
-def market_node(state: CareerState) -> CareerState:
-    """Market intelligence node using Groq."""
+def market_node(state: CareerState) -> Dict[str, Any]:
+    """Market intelligence node using Groq.
 
-    target_roles = state.get("target_roles", []) or []
-    skills = state.get("skills", []) or []
+    A market analysis already present in the input state (e.g. computed once
+    for a whole batch) is passed through instead of calling the agent, and a
+    precomputed snapshot for the target roles is served when one exists
+    (see app.graph.market_snapshots).
+    """
+
+    inputs = _market_inputs(state)
+    fingerprint, prior = _previous_output(state, "market_analysis", inputs)
+    if state.get("market_analysis"):
+        return _update("market_analysis", state["market_analysis"], fingerprint, "shared")
+    if prior is not None:
+        return _update("market_analysis", prior, fingerprint, "reused")
+    snapshot = serve_snapshot(**inputs, model_overrides=state.get("model_overrides"))
+    if snapshot is not None:
+        result = _stamp(snapshot, state)
+        return _update("market_analysis", result, fingerprint, "snapshot")
+    result = _stamp(analyze_market(**inputs, model=_model(state, "market")), state)
+    return _update("market_analysis", result, fingerprint, "recomputed")
+
+
+async def amarket_node(state: CareerState) -> Dict[str, Any]:
+    """Async market intelligence node."""
 
-    state["market_analysis"] = analyze_market(
-        target_roles=target_roles,
-        skills=skills,
+    inputs = _market_inputs(state)
+    fingerprint, prior = _previous_output(state, "market_analysis", inputs)
+    if state.get("market_analysis"):
+        return _update("market_analysis", state["market_analysis"], fingerprint, "shared")
+    if prior is not None:
+        return _update("market_analysis", prior, fingerprint, "reused")
+    snapshot = serve_snapshot(**inputs, model_overrides=state.get("model_overrides"))
+    if snapshot is not None:
+        result = _stamp(snapshot, state)
+        return _update("market_analysis", result, fingerprint, "snapshot")
+    result = await aanalyze_market(
+        **inputs,
+        on_partial=_partial_writer("market_analysis"),
+        model=_model(state, "market"),
     )
-    state["market_analysis"]["generated_at"] = datetime.utcnow().isoformat()
+    return _update("market_analysis", _stamp(result, state), fingerprint, "recomputed")
 
-    return state
 
-def strategy_node(state: CareerState) -> CareerState:
-    """Mock strategy analysis node.
+def strategy_node(state: CareerState) -> Dict[str, Any]:
+    """Career strategy node.
 
-    Adds a lightweight strategy plan based on prior analyses.
+    Joins on the skill and market analyses and returns a strategy decision.
     """
 
-    # Read inputs from state produced by previous nodes.
-    skill_analysis = state.get("skill_analysis", {}) or {}
-    market_analysis = state.get("market_analysis", {}) or {}
-    target_roles = state.get("target_roles", []) or []
+    inputs = _strategy_inputs(state)
+    fingerprint, prior = _previous_output(state, "strategy_analysis", inputs)
+    if prior is not None:
+        return _update("strategy_analysis", prior, fingerprint, "reused")
+    result = _stamp(analyze_strategy(**inputs, model=_model(state, "strategy")), state)
+    return _update("strategy_analysis", result, fingerprint, "recomputed")
+
+
+async def astrategy_node(state: CareerState) -> Dict[str, Any]:
+    """Async career strategy node."""
+
+    inputs = _strategy_inputs(state)
+    fingerprint, prior = _previous_output(state, "strategy_analysis", inputs)
+    if prior is not None:
+        return _update("strategy_analysis", prior, fingerprint, "reused")
 
-    # Call the Career Strategy agent and store its structured output.
-    state["strategy_analysis"] = analyze_strategy(
-        skill_analysis=skill_analysis,
-        market_analysis=market_analysis,
-        target_roles=target_roles,
+    def draft_roadmap(strategy: Dict[str, Any]):
+        # Partials are not streamed: the draft may still be discarded.
+        return aanalyze_roadmap(
+            strategy_analysis=strategy,
+            skill_analysis=state.get("skill_analysis", {}) or {},
+            target_roles=state.get("target_roles", []) or [],
+            model=_model(state, "roadmap"),
+        )
+
+    writer = _partial_writer("strategy_analysis")
+    streamed: Dict[str, Any] = {}
+    speculation: Dict[str, Any] = {}
+
+    def on_partial(path: str, value: Any) -> None:
+        nonlocal speculation
+        if writer is not None:
+            writer(path, value)
+        if path in SPECULATED_FIELDS and not speculation:
+            # Draft the roadmap as soon as the fields it reads have streamed.
+            streamed[path] = value
+            speculation = start_roadmap_draft(streamed, draft_roadmap)
+
+    try:
+        result = await aanalyze_strategy(
+            **inputs, on_partial=on_partial, model=_model(state, "strategy")
+        )
+    except BaseException:
+        cancel_roadmap_draft(speculation)
+        raise
+    update = _update(
+        "strategy_analysis", _stamp(result, state), fingerprint, "recomputed"
     )
-    # Track when the strategy analysis was generated.
-    state["strategy_analysis"]["generated_at"] = datetime.utcnow().isoformat()
-    return state
+    update["speculation"] = speculation
+    return update
 
 
-def roadmap_node(state: CareerState) -> CareerState:
-    """Mock roadmap node.
+def roadmap_node(state: CareerState) -> Dict[str, Any]:
+    """Roadmap planning node.
 
-    Adds a stub timeline with milestones.
+    Builds a phased roadmap from the strategy and skill analyses.
     """
 
-    # Read inputs from state produced by previous nodes.
-    strategy_analysis = state.get("strategy_analysis", {}) or {}
-    skill_analysis = state.get("skill_analysis", {}) or {}
-    target_roles = state.get("target_roles", []) or []
+    inputs = _roadmap_inputs(state)
+    fingerprint, prior = _previous_output(state, "roadmap", inputs)
+    if prior is not None:
+        return _update("roadmap", prior, fingerprint, "reused")
+    result = _stamp(analyze_roadmap(**inputs, model=_model(state, "roadmap")), state)
+    return _update("roadmap", result, fingerprint, "recomputed")
+
 
-    # Call the Roadmap Planning agent and store its structured output.
-    state["roadmap"] = analyze_roadmap(
-        strategy_analysis=strategy_analysis,
-        skill_analysis=skill_analysis,
-        target_roles=target_roles,
+async def aroadmap_node(state: CareerState) -> Dict[str, Any]:
+    """Async roadmap planning node."""
+
+    inputs = _roadmap_inputs(state)
+    fingerprint, prior = _previous_output(state, "roadmap", inputs)
+    if prior is not None:
+        cancel_roadmap_draft(state.get("speculation"))
+        return _update("roadmap", prior, fingerprint, "reused")
+
+    result = await take_roadmap_draft(
+        state.get("speculation"), inputs["strategy_analysis"]
+    )
+    if result is not None:
+        return _update("roadmap", _stamp(result, state), fingerprint, "speculated")
+    result = await aanalyze_roadmap(
+        **inputs,
+        on_partial=_partial_writer("roadmap"),
+        model=_model(state, "roadmap"),
     )
-    # Track when the roadmap was generated.
-    state["roadmap"]["generated_at"] = datetime.utcnow().isoformat()
-    return state
+    return _update("roadmap", _stamp(result, state), fingerprint, "recomputed")
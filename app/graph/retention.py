@@ -0,0 +1,102 @@
+"""Retention for checkpointed plans.
+
+Checkpoints hold the whole user_profile and every section of a plan, so
+threads that have not run for CHECKPOINT_TTL_SECONDS are deleted. A
+thread's age is taken from its newest checkpoint ID: LangGraph checkpoint
+IDs are time-ordered UUIDv6 values, so no extra bookkeeping is needed.
+
+Usage:
+    deleted = await prune_threads(saver)
+
+    # API lifespan:
+    task = asyncio.create_task(run_pruner(saver))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.base.id import UUID
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 100 ns intervals between the UUID epoch (1582-10-15) and the Unix epoch.
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {"runs": 0, "deleted": 0, "last_error": None}
+
+
+def checkpoint_time(checkpoint_id: str) -> Optional[float]:
+    """Unix time a checkpoint was written, from its UUIDv6 ID (None if not one)."""
+
+    try:
+        value = UUID(checkpoint_id)
+    except (TypeError, ValueError):
+        return None
+    if value.version != 6:
+        return None
+    return (value.time - _UUID_EPOCH_OFFSET) / 1e7
+
+
+async def prune_threads(saver: Any, ttl_seconds: Optional[float] = None) -> int:
+    """Delete threads whose newest checkpoint is older than ttl_seconds.
+
+    ttl_seconds defaults to CHECKPOINT_TTL_SECONDS (0 keeps everything).
+    saver is the API's AsyncSqliteSaver. Returns the number of threads
+    deleted.
+    """
+
+    ttl = settings.CHECKPOINT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    if not ttl:
+        return 0
+    await saver.setup()
+    async with saver.lock:
+        cursor = await saver.conn.execute(
+            "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id"
+        )
+        rows = await cursor.fetchall()
+
+    cutoff = time.time() - ttl
+    expired = []
+    for thread_id, checkpoint_id in rows:
+        written = checkpoint_time(checkpoint_id)
+        if written is not None and written < cutoff:
+            expired.append(thread_id)
+    for thread_id in expired:
+        await saver.adelete_thread(thread_id)
+    with _stats_lock:
+        _stats["runs"] += 1
+        _stats["deleted"] += len(expired)
+    return len(expired)
+
+
+async def run_pruner(saver: Any) -> None:
+    """Prune expired threads every CHECKPOINT_PRUNE_SECONDS, forever.
+
+    A failed pass is logged and retried on the next one.
+    """
+
+    while True:
+        try:
+            await prune_threads(saver)
+        except Exception as exc:
+            logger.exception("Checkpoint pruning failed")
+            with _stats_lock:
+                _stats["last_error"] = f"{type(exc).__name__}: {exc}"
+        await asyncio.sleep(settings.CHECKPOINT_PRUNE_SECONDS)
+
+
+def retention_stats() -> Dict[str, Any]:
+    """Pruning passes, threads deleted and the configured TTL."""
+
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["ttl_seconds"] = settings.CHECKPOINT_TTL_SECONDS
+    return stats
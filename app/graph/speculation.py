@@ -0,0 +1,196 @@
+"""Speculative roadmap drafting while strategy analysis runs.
+
+The roadmap normally waits for strategy analysis, and both are long
+generations. The roadmap prompt only uses a few strategy fields
+(SPECULATED_FIELDS), which the strategy model writes before its long
+decision_rationale. With ROADMAP_SPECULATION enabled, the async strategy
+node starts a roadmap draft from those fields as soon as they have streamed.
+When strategy is done, the roadmap node:
+- keeps the draft if the final strategy has the same values for them,
+- otherwise cancels it and generates the roadmap as usual.
+
+Draft tasks live in a process-local registry; only {"id", "role"} goes into
+graph state, so checkpoints stay serializable. A plan resumed in another
+process just finds no draft and computes the roadmap normally.
+
+Usage:
+    speculation = start_roadmap_draft(streamed_fields, draft)
+    ...
+    draft = await take_roadmap_draft(speculation, strategy_analysis)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.llm.prompts import PROMPT_SECTION_FIELDS
+from config import settings
+
+# Strategy fields the roadmap prompt reads; a draft needs all of them.
+SPECULATED_FIELDS: Tuple[str, ...] = tuple(
+    PROMPT_SECTION_FIELDS["roadmap_planner"]["strategy_analysis"]
+)
+
+
+@dataclass
+class _Draft:
+    """One in-flight or finished roadmap draft."""
+
+    task: "asyncio.Future[Dict[str, Any]]"
+    fields: Dict[str, Any]
+    started: float
+    finished: Optional[float] = None
+
+
+_drafts: Dict[str, _Draft] = {}
+_drafts_lock = threading.Lock()
+_stats: Dict[str, float] = {
+    "started": 0,
+    "hits": 0,
+    "misses": 0,
+    "failed": 0,
+    "expired": 0,
+    "latency_saved_seconds": 0.0,
+    "wasted_seconds": 0.0,
+}
+
+
+def _count(name: str, amount: float = 1) -> None:
+    """Bump a speculation counter."""
+
+    with _drafts_lock:
+        _stats[name] += amount
+
+
+def _same_fields(speculated: Dict[str, Any], strategy: Dict[str, Any]) -> bool:
+    """True if the final strategy has the values the draft was built on."""
+
+    return all(strategy.get(key) == speculated[key] for key in SPECULATED_FIELDS)
+
+
+def _on_done(draft: _Draft) -> Callable[["asyncio.Future[Any]"], None]:
+    """Done callback: record the finish time and retrieve any exception."""
+
+    def callback(task: "asyncio.Future[Any]") -> None:
+        draft.finished = time.monotonic()
+        if not task.cancelled():
+            # Mark the exception as retrieved; take_roadmap_draft reports it.
+            task.exception()
+
+    return callback
+
+
+def _expire_stale() -> None:
+    """Cancel drafts whose plan never reached the roadmap node."""
+
+    cutoff = time.monotonic() - 2 * settings.LLM_CALL_DEADLINE
+    with _drafts_lock:
+        stale = [key for key, draft in _drafts.items() if draft.started < cutoff]
+        drafts = [_drafts.pop(key) for key in stale]
+        _stats["expired"] += len(drafts)
+    for draft in drafts:
+        draft.task.cancel()
+
+
+def start_roadmap_draft(
+    fields: Dict[str, Any],
+    draft: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """Start drafting the roadmap once fields holds all SPECULATED_FIELDS.
+
+    fields are the strategy fields streamed so far; draft(strategy) must
+    return the roadmap for that strategy. Returns the {"id", "role"} handle
+    to store in state, or {} if speculation is off or fields are missing.
+    Must be called from a running event loop.
+    """
+
+    if not settings.ROADMAP_SPECULATION or any(
+        key not in fields for key in SPECULATED_FIELDS
+    ):
+        return {}
+
+    _expire_stale()
+    strategy = {key: fields[key] for key in SPECULATED_FIELDS}
+    entry = _Draft(
+        task=asyncio.ensure_future(draft(dict(strategy))),
+        fields=strategy,
+        started=time.monotonic(),
+    )
+    entry.task.add_done_callback(_on_done(entry))
+    draft_id = uuid.uuid4().hex
+    with _drafts_lock:
+        _drafts[draft_id] = entry
+        _stats["started"] += 1
+    return {"id": draft_id, "role": strategy.get("recommended_role", "")}
+
+
+def cancel_roadmap_draft(speculation: Optional[Dict[str, Any]]) -> None:
+    """Drop a draft without using it (e.g. strategy failed or was reused)."""
+
+    if not speculation:
+        return
+    with _drafts_lock:
+        draft = _drafts.pop(speculation.get("id", ""), None)
+    if draft is not None:
+        draft.task.cancel()
+
+
+async def take_roadmap_draft(
+    speculation: Optional[Dict[str, Any]],
+    strategy_analysis: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Return the draft if it was built on the final strategy, else None.
+
+    A mismatching draft (e.g. the final strategy was repaired or re-asked)
+    is cancelled. On a miss or a failed draft the caller generates the
+    roadmap normally.
+    """
+
+    if not speculation:
+        return None
+    with _drafts_lock:
+        draft = _drafts.pop(speculation.get("id", ""), None)
+    if draft is None:
+        return None
+
+    now = time.monotonic()
+    if not _same_fields(draft.fields, strategy_analysis):
+        draft.task.cancel()
+        _count("misses")
+        _count("wasted_seconds", (draft.finished or now) - draft.started)
+        return None
+
+    # The draft overlapped strategy analysis from its start until now (or
+    # until it finished, if that was earlier).
+    saved = min(draft.finished or now, now) - draft.started
+    if draft.task.cancelled():
+        _count("failed")
+        return None
+    try:
+        result = await draft.task
+    except Exception:
+        _count("failed")
+        return None
+    _count("hits")
+    _count("latency_saved_seconds", saved)
+    return result
+
+
+def speculation_stats() -> Dict[str, Any]:
+    """Counters plus hit rate and mean latency saved per hit."""
+
+    with _drafts_lock:
+        stats = dict(_stats)
+        stats["in_flight"] = len(_drafts)
+    decided = stats["hits"] + stats["misses"]
+    stats["enabled"] = settings.ROADMAP_SPECULATION
+    stats["hit_rate"] = stats["hits"] / decided if decided else 0.0
+    stats["mean_latency_saved_seconds"] = (
+        stats["latency_saved_seconds"] / stats["hits"] if stats["hits"] else 0.0
+    )
+    return stats
@@ -1,18 +1,46 @@
 """Typed state for LangGraph workflows."""
 
-from typing import List, TypedDict, Dict, Any
+from typing import Annotated, Any, Dict, List, TypedDict
+
+# Output sections, in the order the graph completes them.
+SECTION_KEYS = ("skill_analysis", "market_analysis", "strategy_analysis", "roadmap")
+
+
+def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer merging per-section entries written by concurrent nodes."""
+
+    return {**(left or {}), **(right or {})}
 
 
 class CareerState(TypedDict):
     """Shared state for the career strategy graph."""
 
-    # Inputs
+    # Inputs. The resume text is not part of user_profile: resume_ref holds
+    # its interned blob ID (app.utils.blobs), so state snapshots and
+    # checkpoints don't carry a copy of it.
     user_profile: Dict[str, Any]
+    resume_ref: str
     skills: List[str]
     target_roles: List[str]
+    # Per-request model routing: {"skill": "quality", "default": "fast", ...}.
+    model_overrides: Dict[str, str]
+    # Request trace ID, stamped on every section next to generated_at.
+    trace_id: str
+
+    # Prior run of the same plan: {"sections": {...}, "fingerprints": {...}}.
+    # Nodes whose input fingerprint is unchanged reuse the prior section.
+    previous: Dict[str, Any]
 
     # Outputs (semantic, not function names)
     skill_analysis: Dict[str, Any]
     market_analysis: Dict[str, Any]
     strategy_analysis: Dict[str, Any]
     roadmap: Dict[str, Any]
+
+    # Speculative roadmap draft started by the strategy node: {"id", "role"}.
+    speculation: Dict[str, Any]
+
+    # Bookkeeping: input fingerprint and status per section ("recomputed",
+    # "reused", "shared", "snapshot" or "speculated").
+    fingerprints: Annotated[Dict[str, str], merge_dicts]
+    section_status: Annotated[Dict[str, str], merge_dicts]
@@ -0,0 +1,185 @@
+"""Content-addressed response cache for agent LLM calls.
+
+Keys are a SHA-256 over the prompt name, model and canonicalized inputs, so
+requests that differ only in list order, casing or generated_at/trace_id
+stamps share an entry. Entries live in an in-memory LRU with a TTL and can optionally
+be persisted to SQLite so a warm cache survives restarts.
+
+Usage:
+    from app.llm.cache import get_response_cache, make_cache_key
+
+    cache = get_response_cache()
+    key = make_cache_key("market_intelligence", model, inputs)
+    cached = cache.get("market", key)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+# Volatile fields that should never influence a cache key.
+_IGNORED_KEYS = {"generated_at", "trace_id", "snapshot_version"}
+
+
+def _canonicalize(value: Any) -> Any:
+    """Normalize inputs so equivalent requests hash identically.
+
+    Lists of strings are stripped, lower-cased, de-duplicated and sorted;
+    dicts drop volatile keys and are sorted by json.dumps(sort_keys=True).
+    """
+
+    if isinstance(value, dict):
+        return {
+            str(k): _canonicalize(v)
+            for k, v in value.items()
+            if k not in _IGNORED_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(item, str) for item in value):
+            return sorted({item.strip().lower() for item in value if item.strip()})
+        return [_canonicalize(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def make_cache_key(prompt_name: str, model: str, inputs: Dict[str, Any]) -> str:
+    """Build a content-addressed key for one agent call."""
+
+    payload = {
+        "prompt": prompt_name,
+        "model": model,
+        "inputs": _canonicalize(inputs),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of parsed agent outputs with optional SQLite backing.
+
+    Values are stored as JSON text, so every hit returns an independent copy
+    that callers may mutate (nodes add generated_at to their results).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 6 * 3600,
+        sqlite_path: Optional[str] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, agent TEXT, value TEXT, expires_at REAL)"
+            )
+            self._db.commit()
+
+    def _count(self, agent: str, field: str) -> None:
+        counters = self._stats.setdefault(agent, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entries."""
+
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, agent: str, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result for the key, or None on a miss."""
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._count(agent, "hits")
+                return json.loads(entry[1])
+            if entry is not None:
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._remember(key, row[1], row[0])
+                    self._count(agent, "hits")
+                    return json.loads(row[0])
+
+            self._count(agent, "misses")
+            return None
+
+    def set(self, agent: str, key: str, value: Dict[str, Any]) -> None:
+        """Store a parsed result under the key."""
+
+        encoded = json.dumps(value, default=str)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, encoded)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, agent, value, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, agent, encoded, expires_at),
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-agent hit/miss counters and the current size."""
+
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "persistent": self._db is not None,
+                "agents": {agent: dict(c) for agent, c in self._stats.items()},
+            }
+
+    def clear(self) -> None:
+        """Drop all entries (memory and SQLite) and reset counters."""
+
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache, or None when caching is disabled."""
+
+    global _cache
+
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                    sqlite_path=settings.LLM_CACHE_SQLITE_PATH or None,
+                )
+    return _cache
@@ -0,0 +1,324 @@
+"""Deterministic offline chat model for benchmarks and local runs.
+
+FakeChatModel answers every agent prompt with canned JSON after a simulated
+latency, without network access:
+- the agent is recognized from its system prompt (skill, market, strategy,
+  roadmap, resume summary, JSON repair)
+- latency is fixed, uniform or lognormal around latency_seconds; streamed
+  calls deliver the first chunk after ttft_fraction of it
+- malformed_rate of answers are truncated (repairable locally) or prose
+  (needs a re-ask), per malformed_kind; with reject_invalid_json, calls
+  bound to a response_format fail on them like Groq JSON mode (400
+  json_validate_failed carrying the failed_generation)
+- usage_metadata carries estimated token counts, like Groq's responses
+
+Every random choice is derived from (seed, model, prompt), so a given request
+gets the same latency and output on every run regardless of scheduling.
+
+Usage:
+    from app.llm.fake_llm import FakeChatModel, install_fake_llm
+
+    install_fake_llm(FakeChatModel(latency_seconds=0.3, malformed_rate=0.05))
+    # get_llm() now returns fakes for every configured model.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import groq
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.llm.llm import register_llm_client
+from app.llm.prompts import estimate_tokens
+from app.llm.routing import resolve_model
+from config import settings
+
+# System-prompt phrases identifying each prompt in app/llm/prompts.py.
+_PROMPT_MARKERS = (
+    ("skill", "skill analysis engine"),
+    ("market", "market intelligence engine"),
+    ("strategy", "career strategist"),
+    ("roadmap", "roadmap planning engine"),
+    ("resume_summary", "condense resume excerpts"),
+    ("repair", "fix malformed JSON"),
+)
+# Output schema titles (app/schemas/career.py) named in JSON repair prompts.
+_SCHEMA_AGENTS = {
+    "SkillAnalysis": "skill",
+    "MarketAnalysis": "market",
+    "StrategyAnalysis": "strategy",
+    "Roadmap": "roadmap",
+}
+_TARGET_ROLES = re.compile(r"target_roles: (\[.*?\])")
+# Request URL attached to simulated Groq errors.
+_GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+
+def _first_target_role(text: str) -> str:
+    """First target role named in a prompt, for role-consistent answers."""
+
+    match = _TARGET_ROLES.search(text)
+    if match:
+        try:
+            roles = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            roles = []
+        if roles and isinstance(roles[0], str):
+            return roles[0]
+    return "Backend Engineer"
+
+
+def _canned(agent: str, role: str) -> Dict[str, Any]:
+    """A plausible, schema-complete answer for an agent."""
+
+    if agent == "skill":
+        return {
+            "summary": f"Solid foundation for {role} with gaps in cloud operations.",
+            "strengths": ["Python", "SQL", "REST APIs", "Git"],
+            "gaps": ["Kubernetes", "Terraform", "Observability"],
+            "missing_skills": ["Kubernetes", "Terraform"],
+            "role_fit": [
+                {"role": role, "fit_score": 68, "notes": "Core skills present."}
+            ],
+            "reasoning": "Most core skills are present; infrastructure is missing.",
+        }
+    if agent == "market":
+        return {
+            "in_demand_skills": ["Python", "Kubernetes", "AWS", "PostgreSQL"],
+            "emerging_skills": ["LLM integration", "Platform engineering"],
+            "skill_gaps": ["Kubernetes", "Cloud cost management"],
+            "market_summary": f"Steady demand for {role} roles in most regions.",
+            "reasoning": "Postings emphasize cloud-native delivery.",
+        }
+    if agent == "strategy":
+        return {
+            "recommended_role": role,
+            "alternative_roles": ["Platform Engineer", "Data Engineer"],
+            "priority_focus_areas": ["Kubernetes", "Terraform", "Observability"],
+            "decision_rationale": f"{role} builds on current strengths.",
+        }
+    if agent == "roadmap":
+        return {
+            "duration_months": 4,
+            "phases": [
+                {"name": "Foundations", "focus": "Containers", "weeks": [1, 2, 3, 4]},
+                {"name": "Infrastructure", "focus": "Terraform", "weeks": [5, 6, 7, 8]},
+                {"name": "Production", "focus": "Observability", "weeks": [9, 10]},
+            ],
+            "weekly_plan": [
+                {"week": week, "tasks": [f"Study block {week}", f"Project step {week}"]}
+                for week in range(1, 11)
+            ],
+            "final_outcome": f"Job-ready portfolio for {role} positions.",
+        }
+    return {}
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model returning canned agent JSON after a simulated latency."""
+
+    model_name: str = "fake"
+    # Mean simulated latency of a whole completion, in seconds.
+    latency_seconds: float = 0.3
+    # "none", "uniform" (+/- jitter_scale * latency) or "lognormal" (sigma).
+    jitter: str = "none"
+    jitter_scale: float = 0.5
+    # Share of the latency spent before the first streamed chunk.
+    ttft_fraction: float = 0.3
+    # Share of answers that are malformed, and how: "truncated", "garbage"
+    # or "mixed" (half each).
+    malformed_rate: float = 0.0
+    malformed_kind: str = "mixed"
+    # Reject malformed answers to response_format calls like Groq JSON mode.
+    reject_invalid_json: bool = False
+    chunk_chars: int = 24
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-career-chat"
+
+    def _plan(self, messages: List[BaseMessage]) -> Tuple[str, float, int]:
+        """Decide (content, latency, prompt tokens) for a prompt."""
+
+        text = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha256(
+            f"{self.seed}|{self.model_name}|{text}".encode("utf-8")
+        ).digest()
+        rng = random.Random(digest)
+
+        system = str(messages[0].content) if messages else ""
+        agent = next((name for name, mark in _PROMPT_MARKERS if mark in system), "")
+        if agent == "repair":
+            agent = next(
+                (
+                    name
+                    for title, name in _SCHEMA_AGENTS.items()
+                    if f'"title":"{title}"' in text
+                ),
+                "",
+            )
+            content = json.dumps(_canned(agent, _first_target_role(text)))
+        elif agent == "resume_summary":
+            content = "Backend engineer: Python, FastAPI, PostgreSQL, AWS APIs."
+        else:
+            content = json.dumps(_canned(agent, _first_target_role(text)))
+            if agent and rng.random() < self.malformed_rate:
+                content = self._malform(content, rng)
+
+        latency = self.latency_seconds
+        if self.jitter == "uniform":
+            latency *= 1.0 + rng.uniform(-self.jitter_scale, self.jitter_scale)
+        elif self.jitter == "lognormal":
+            latency *= rng.lognormvariate(0.0, self.jitter_scale)
+        return content, max(0.0, latency), estimate_tokens(text)
+
+    def _malform(self, content: str, rng: random.Random) -> str:
+        kind = self.malformed_kind
+        if kind == "mixed":
+            kind = "truncated" if rng.random() < 0.5 else "garbage"
+        if kind == "truncated":
+            return "```json\n" + content[: max(1, int(len(content) * 0.7))]
+        return "Sorry, I can only describe the plan in prose right now."
+
+    def _check_json_mode(self, content: str, kwargs: Dict[str, Any]) -> None:
+        """Raise Groq's JSON mode error if content is not a JSON object."""
+
+        if not self.reject_invalid_json or "response_format" not in kwargs:
+            return
+        try:
+            if isinstance(json.loads(content), dict):
+                return
+        except json.JSONDecodeError:
+            pass
+        request = httpx.Request("POST", _GROQ_CHAT_URL)
+        error = {
+            "message": "Failed to generate JSON. Please adjust your prompt.",
+            "type": "invalid_request_error",
+            "code": "json_validate_failed",
+            "failed_generation": content,
+        }
+        raise groq.BadRequestError(
+            f"Error code: 400 - {error['message']}",
+            response=httpx.Response(400, request=request),
+            body={"error": error},
+        )
+
+    def _message(self, content: str, prompt_tokens: int) -> AIMessage:
+        completion_tokens = estimate_tokens(content)
+        return AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            response_metadata={
+                "model_name": self.model_name,
+                "token_usage": {"queue_time": 0.0},
+            },
+        )
+
+    def _chunks(self, content: str, prompt_tokens: int) -> Iterator[AIMessageChunk]:
+        for start in range(0, len(content), self.chunk_chars):
+            yield AIMessageChunk(content=content[start : start + self.chunk_chars])
+        completion_tokens = estimate_tokens(content)
+        yield AIMessageChunk(
+            content="",
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content, latency, prompt_tokens = self._plan(messages)
+        self._check_json_mode(content, kwargs)
+        time.sleep(latency)
+        message = self._message(content, prompt_tokens)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content, latency, prompt_tokens = self._plan(messages)
+        self._check_json_mode(content, kwargs)
+        await asyncio.sleep(latency)
+        message = self._message(content, prompt_tokens)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        content, latency, prompt_tokens = self._plan(messages)
+        self._check_json_mode(content, kwargs)
+        chunks = list(self._chunks(content, prompt_tokens))
+        time.sleep(latency * self.ttft_fraction)
+        gap = latency * (1.0 - self.ttft_fraction) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(gap)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        content, latency, prompt_tokens = self._plan(messages)
+        self._check_json_mode(content, kwargs)
+        chunks = list(self._chunks(content, prompt_tokens))
+        await asyncio.sleep(latency * self.ttft_fraction)
+        gap = latency * (1.0 - self.ttft_fraction) / max(1, len(chunks) - 1)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(gap)
+            yield ChatGenerationChunk(message=chunk)
+
+
+def install_fake_llm(
+    template: Optional[FakeChatModel] = None, models: Iterable[str] = ()
+) -> List[str]:
+    """Serve get_llm() from fakes for every configured model (plus models).
+
+    Each model gets a copy of template with its own model_name. Undo with
+    app.llm.llm.reset_llm_clients(). Returns the model names installed.
+    """
+
+    template = template or FakeChatModel()
+    names = {
+        settings.DEFAULT_MODEL,
+        resolve_model(settings.RESUME_SUMMARY_MODEL),
+        *settings.MODEL_TIERS.values(),
+        *models,
+    }
+    for name in sorted(names):
+        register_llm_client(name, template.model_copy(update={"model_name": name}))
+    return sorted(names)
@@ -0,0 +1,123 @@
+"""Local repair of malformed or truncated JSON objects.
+
+Before paying for a re-ask, repair_json() fixes the usual model mistakes:
+- markdown fences and prose around the object
+- curly quotes used as JSON quotes
+- raw newlines/control characters inside strings
+- trailing commas before } or ]
+- truncation: an unterminated string, a dangling key or value, and unclosed
+  brackets (members after the last complete one are dropped)
+
+Usage:
+    from app.llm.json_repair import repair_json
+
+    repair_json('```json\\n{"a": [1, 2,], "b": "trunc')  # {"a": [1, 2], "b": "trunc"}
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_CURLY_QUOTES = str.maketrans({"“": '"', "”": '"'})
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+# Bounds the number of truncation cut-backs tried.
+_MAX_CUTS = 16
+
+
+def _scan(text: str) -> Tuple[int, List[str], bool]:
+    """Scan from the first "{" and return (end, open closers, inside string).
+
+    end is the index just past the top-level object if it closed, else
+    len(text).
+    """
+
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+        elif c in "}]" and stack:
+            stack.pop()
+            if not stack:
+                return i + 1, [], False
+    return len(text), stack, in_string
+
+
+def _close(prefix: str) -> str:
+    """Terminate a truncated prefix: close the string, drop a dangling
+    separator and close every open bracket."""
+
+    _, stack, in_string = _scan(prefix)
+    if in_string:
+        if prefix.endswith("\\"):
+            prefix = prefix[:-1]
+        prefix += '"'
+    prefix = prefix.rstrip()
+    while prefix and prefix[-1] in ",:":
+        prefix = prefix[:-1].rstrip()
+    return prefix + "".join(reversed(stack))
+
+
+def _loads(text: str) -> Optional[Dict[str, Any]]:
+    """json.loads tolerating control characters; dicts only."""
+
+    for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            data = json.loads(candidate, strict=False)
+        except json.JSONDecodeError:
+            continue
+        return data if isinstance(data, dict) else None
+    return None
+
+
+def is_truncated(text: str) -> bool:
+    """True if text opens a JSON object that never closes (cut-off output)."""
+
+    start = (text or "").find("{")
+    if start == -1:
+        return False
+    _, stack, in_string = _scan(text[start:].translate(_CURLY_QUOTES))
+    return bool(stack) or in_string
+
+
+def repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """Best-effort parse of a malformed JSON object (None if hopeless)."""
+
+    if not text:
+        return None
+    text = text.translate(_CURLY_QUOTES)
+    start = text.find("{")
+    if start == -1:
+        return None
+    text = text[start:]
+
+    end, stack, in_string = _scan(text)
+    if not stack and not in_string:
+        # The object closed; ignore anything after it (e.g. a closing fence).
+        return _loads(text[:end])
+
+    # Truncated: close it, cutting back to earlier members until it parses.
+    prefix = text
+    for _ in range(_MAX_CUTS):
+        data = _loads(_close(prefix))
+        if data is not None:
+            return data
+        cut = prefix.rfind(",")
+        if cut <= 0:
+            return None
+        prefix = prefix[:cut]
+    return None
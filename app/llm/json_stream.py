@@ -0,0 +1,220 @@
+"""Incremental JSON parsing for streamed agent outputs.
+
+Agents ask the model for a single JSON object. Instead of waiting for the full
+completion, IncrementalJSONParser is fed token chunks and reports each
+top-level field (e.g. "summary") and each element of a top-level array
+(e.g. "phases[0]") as soon as it closes. If the stream ends with a malformed
+or truncated tail, the fields that did close are kept.
+
+Usage:
+    from app.llm.json_stream import astream_json
+
+    data, complete = await astream_json(llm, messages, on_partial=callback)
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Callback receiving ("summary", value) or ("phases[0]", value).
+PartialCallback = Callable[[str, Any], None]
+
+_WHITESPACE = " \t\r\n"
+
+
+@dataclass
+class StreamTrace:
+    """Timing and usage of one streamed completion (filled by astream_json).
+
+    first_token_seconds: time from the request to the first content chunk.
+    usage: LangChain usage_metadata from the chunk that carried it (Groq
+        reports usage on the final chunk).
+    """
+
+    first_token_seconds: Optional[float] = None
+    usage: Dict[str, Any] = field(default_factory=dict)
+
+
+class IncrementalJSONParser:
+    """Character-level scanner over a streamed top-level JSON object.
+
+    Only structure is tracked while scanning (nesting, strings, escapes);
+    each closed member or array element is decoded with json.loads on its own
+    slice, so a bad value only loses that value and not the whole object.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._member_start: Optional[int] = None
+        self._array_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._items: List[Any] = []
+        self._fields: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the (path, value) pairs it completed."""
+
+        events: List[Tuple[str, Any]] = []
+        self.text += chunk or ""
+
+        while self._pos < len(self.text) and not self.complete:
+            i = self._pos
+            c = self.text[i]
+            self._pos += 1
+
+            if not self._started:
+                # Skip any preamble (e.g. stray prose) before the object.
+                if c == "{":
+                    self._started = True
+                    self._stack.append("{")
+                    self._member_start = i + 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._mark_item_start(i)
+            elif c in "{[":
+                self._mark_item_start(i)
+                self._stack.append(c)
+                if c == "[" and len(self._stack) == 2:
+                    self._open_array()
+            elif c in "}]":
+                if len(self._stack) == 2 and self._array_key is not None:
+                    self._close_item(i, events)
+                if len(self._stack) == 1:
+                    self._close_member(i, events)
+                if self._stack:
+                    self._stack.pop()
+            elif c == ",":
+                if len(self._stack) == 1:
+                    self._close_member(i, events)
+                    self._member_start = i + 1
+                elif len(self._stack) == 2 and self._array_key is not None:
+                    self._close_item(i, events)
+            elif c not in _WHITESPACE:
+                self._mark_item_start(i)
+
+        return events
+
+    def _mark_item_start(self, i: int) -> None:
+        """Record where an element of the open top-level array begins."""
+
+        if (
+            len(self._stack) == 2
+            and self._array_key is not None
+            and self._item_start is None
+        ):
+            self._item_start = i
+
+    def _open_array(self) -> None:
+        """A top-level member's value is an array; start tracking items."""
+
+        head = self.text[self._member_start : self._pos - 1].strip()
+        try:
+            self._array_key = json.loads(head.rstrip(":").strip())
+        except (json.JSONDecodeError, TypeError):
+            self._array_key = None
+        self._items = []
+        self._item_start = None
+
+    def _close_item(self, end: int, events: List[Tuple[str, Any]]) -> None:
+        """Decode one finished element of the open top-level array."""
+
+        if self._item_start is None:
+            return
+        raw = self.text[self._item_start : end]
+        self._item_start = None
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        events.append((f"{self._array_key}[{len(self._items)}]", value))
+        self._items.append(value)
+
+    def _close_member(self, end: int, events: List[Tuple[str, Any]]) -> None:
+        """Decode one finished "key": value member of the top-level object."""
+
+        if self._member_start is None:
+            return
+        raw = self.text[self._member_start : end].strip()
+        self._member_start = None
+        self._array_key = None
+        self._items = []
+        if not raw:
+            return
+        try:
+            member = json.loads("{" + raw + "}")
+        except json.JSONDecodeError:
+            return
+        for key, value in member.items():
+            self._fields[key] = value
+            events.append((key, value))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every field closed so far, plus items of an open array."""
+
+        data = dict(self._fields)
+        if self._array_key is not None and self._array_key not in data:
+            data[self._array_key] = list(self._items)
+        return data
+
+    @property
+    def complete(self) -> bool:
+        """True once the top-level object has been closed."""
+
+        return self._started and not self._stack
+
+
+async def astream_json(
+    llm: Any,
+    messages: List[Any],
+    on_partial: Optional[PartialCallback] = None,
+    parser: Optional[IncrementalJSONParser] = None,
+    trace: Optional[StreamTrace] = None,
+) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Stream a completion through the incremental parser.
+
+    Returns (data, complete). data is the full object when the stream closed
+    cleanly, otherwise the valid prefix (None if nothing usable arrived).
+    Pass a parser to keep access to the raw text (parser.text) afterwards,
+    and a trace to collect time-to-first-token and token usage.
+    """
+
+    parser = parser if parser is not None else IncrementalJSONParser()
+    started = time.perf_counter()
+    async for chunk in llm.astream(messages):
+        if trace is not None:
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                trace.usage = dict(usage)
+        text = getattr(chunk, "content", "") or ""
+        if not isinstance(text, str):
+            continue
+        if trace is not None and text and trace.first_token_seconds is None:
+            trace.first_token_seconds = time.perf_counter() - started
+        for path, value in parser.feed(text):
+            if on_partial is not None:
+                on_partial(path, value)
+
+    if parser.complete:
+        return parser.snapshot(), True
+
+    data = parser.snapshot()
+    return (data or None), False
@@ -5,31 +5,128 @@ Usage:
 
     llm = get_llm()  # uses default model
     llm = get_llm(model_name="llama-3.1-8b-instant")
+
+Clients are long-lived: the first call for a model builds a ChatGroq instance
+and later calls return the same one. All instances share one keep-alive HTTP
+connection pool, so connection setup and TLS handshakes are paid once per
+process instead of once per agent call.
 """
 
 import os
-from typing import Optional
+import threading
+from typing import Any, Dict, Optional, Tuple
 
-from dotenv import load_dotenv
+import httpx
 from langchain_groq import ChatGroq
 
+from app.llm.rate_limit import aobserve_response, observe_response
+from config import settings
+
+# Registry of ChatGroq instances keyed by model name.
+_clients: Dict[str, ChatGroq] = {}
+_clients_lock = threading.Lock()
+
+# Shared HTTP clients (sync + async) backing every ChatGroq instance.
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+
+
+def _pool_limits() -> httpx.Limits:
+    """Connection pool limits from config/settings.py."""
+
+    return httpx.Limits(
+        max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY,
+    )
+
+
+def _get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Return the shared HTTP clients, creating them on first use.
+
+    Callers must hold _clients_lock.
+    """
+
+    global _http_client, _http_async_client
+
+    if _http_client is None:
+        _http_client = httpx.Client(
+            limits=_pool_limits(),
+            timeout=settings.LLM_REQUEST_TIMEOUT,
+            # Feed Groq's rate-limit headers into the shared limiter.
+            event_hooks={"response": [observe_response]},
+        )
+    if _http_async_client is None:
+        _http_async_client = httpx.AsyncClient(
+            limits=_pool_limits(),
+            timeout=settings.LLM_REQUEST_TIMEOUT,
+            event_hooks={"response": [aobserve_response]},
+        )
+    return _http_client, _http_async_client
+
 
 def get_llm(model_name: Optional[str] = None) -> ChatGroq:
-    """Create a configured ChatGroq instance.
+    """Return the shared ChatGroq instance for a model.
 
     Loads GROQ_API_KEY from the environment (supports .env via python-dotenv).
     The model can be overridden via the model_name argument.
     """
 
-    # Load environment variables from a local .env file if present.
-    load_dotenv()
+    model = model_name or settings.DEFAULT_MODEL
 
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY is not set in the environment.")
+    # Fast path: no lock needed once the client exists.
+    llm = _clients.get(model)
+    if llm is not None:
+        return llm
 
-    return ChatGroq(
-        api_key=api_key,
-        # Default updated per Groq deprecations.
-        model=model_name or "llama-3.3-70b-versatile",
-    )
+    with _clients_lock:
+        llm = _clients.get(model)
+        if llm is not None:
+            return llm
+
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            raise ValueError("GROQ_API_KEY is not set in the environment.")
+
+        http_client, http_async_client = _get_http_clients()
+        llm = ChatGroq(
+            api_key=api_key,
+            model=model,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            # Retries are handled by app.llm.rate_limit with backoff and a
+            # deadline; client-level retries would multiply them.
+            max_retries=0,
+        )
+        _clients[model] = llm
+        return llm
+
+
+def register_llm_client(model_name: str, client: Any) -> None:
+    """Serve get_llm(model_name) from a prebuilt client.
+
+    Used to plug in offline stand-ins such as app.llm.fake_llm.FakeChatModel;
+    reset_llm_clients() removes them again.
+    """
+
+    with _clients_lock:
+        _clients[model_name] = client
+
+
+def reset_llm_clients() -> None:
+    """Drop cached clients and close the shared connection pool.
+
+    The next get_llm() call rebuilds everything, e.g. after rotating the API
+    key or changing pool settings.
+    """
+
+    global _http_client, _http_async_client
+
+    with _clients_lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+        # The async client is closed by garbage collection; closing it here
+        # would require a running event loop.
+        _http_client = None
+        _http_async_client = None
@@ -1,10 +1,18 @@
 """Prompt templates for the AI Career Strategy Planner."""
 
+import json
+import math
+import re
+from typing import Any, Dict, Iterable, Mapping
+
 from langchain_core.prompts import ChatPromptTemplate
 
+from config import settings
+
 # Note: These prompts request JSON-only output for easy parsing by agents.
 
 
+# role_fit_scores defaults to an empty list for callers without scores.
 SKILL_ANALYZER_PROMPT = ChatPromptTemplate.from_messages(
     [
         (
@@ -27,6 +35,11 @@ Inputs (JSON):
 - user_profile: {user_profile}
 - skills: {skills}
 - target_roles: {target_roles}
+- role_fit_scores: {role_fit_scores}
+
+role_fit_scores are deterministic: fit_score (0-100) is the weighted share of
+each role's core skills the user has, with overlap and gaps listed. Use them as
+the baseline for role_fit and adjust a score only for evidence in the resume.
 
 Output JSON schema:
 {{
@@ -40,7 +53,7 @@ Output JSON schema:
 """,
         ),
     ]
-)
+).partial(role_fit_scores="[]")
 
 
 MARKET_INTELLIGENCE_PROMPT = ChatPromptTemplate.from_messages(
@@ -110,8 +123,8 @@ Output JSON schema (must be complete):
 {{
   "recommended_role": string,
   "alternative_roles": string[],
-  "decision_rationale": string,
-  "priority_focus_areas": string[]
+  "priority_focus_areas": string[],
+  "decision_rationale": string
 }}
 
 Constraints:
@@ -165,3 +178,164 @@ Constraints:
         ),
     ]
 )
+
+
+RESUME_CHUNK_SUMMARY_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """
+You condense resume excerpts for a downstream skill analysis.
+
+Rules:
+- Return plain text only, no markdown headings.
+- Keep roles, employers, dates, technologies, tools and measurable outcomes.
+- Drop contact details, filler and repeated statements.
+- Use at most {max_words} words.
+""",
+        ),
+        (
+            "human",
+            """
+Resume excerpt ({index} of {total}):
+{chunk}
+""",
+        ),
+    ]
+)
+
+
+JSON_REPAIR_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """
+You fix malformed JSON produced by another model.
+
+Rules:
+- Return one valid JSON object only, no markdown, no prose.
+- The object must match this JSON schema: {schema}
+- Keep the original content; do not add facts that are not in the output.
+""",
+        ),
+        (
+            "human",
+            """
+Validation error: {error}
+
+Malformed output:
+{output}
+""",
+        ),
+    ]
+)
+
+
+# ---------------------------------------------------------------------------
+# Prompt input compaction
+# ---------------------------------------------------------------------------
+
+# Upstream fields each downstream prompt actually uses. Everything else
+# (generated_at, reasoning, bookkeeping) is dropped before serialization.
+PROMPT_SECTION_FIELDS: Dict[str, Dict[str, Iterable[str]]] = {
+    "career_strategy": {
+        "skill_analysis": ("summary", "strengths", "gaps", "role_fit"),
+        "market_analysis": (
+            "in_demand_skills",
+            "emerging_skills",
+            "skill_gaps",
+            "market_summary",
+        ),
+    },
+    "roadmap_planner": {
+        "strategy_analysis": (
+            "recommended_role",
+            "alternative_roles",
+            "priority_focus_areas",
+        ),
+        "skill_analysis": ("strengths", "gaps"),
+    },
+}
+
+# Words, numbers and single punctuation marks, roughly how BPE splits text.
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the model token count of text.
+
+    Long words count as several sub-word tokens (about 4 chars each); digits
+    and punctuation count individually, which matches JSON-heavy prompts much
+    better than a flat characters/4 ratio.
+    """
+
+    return sum(math.ceil(len(piece) / 4) for piece in _TOKEN_PATTERN.findall(text or ""))
+
+
+def compact_json(value: Any) -> str:
+    """Serialize as minified JSON (no repr quotes, no padding)."""
+
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _project(value: Any, fields: Iterable[str]) -> Any:
+    """Keep only the listed fields of an upstream section."""
+
+    if not isinstance(value, Mapping):
+        return value
+    return {key: value[key] for key in fields if value.get(key) not in (None, "", [], {})}
+
+
+def _shrink(value: Any) -> Any:
+    """Return a smaller version of value, or value itself if it cannot shrink."""
+
+    if isinstance(value, str) and len(value) > 32:
+        return value[: int(len(value) * 0.75)]
+    if isinstance(value, list) and len(value) > 1:
+        return value[: max(1, int(len(value) * 0.75))]
+    if isinstance(value, list) and value:
+        return [_shrink(value[0])]
+    if isinstance(value, dict) and value:
+        largest = max(value, key=lambda k: len(compact_json(value[k])))
+        return {**value, largest: _shrink(value[largest])}
+    return value
+
+
+def compact_prompt_inputs(
+    prompt_name: str,
+    inputs: Dict[str, Any],
+    budget: int = 0,
+) -> Dict[str, str]:
+    """Prepare prompt variables as minified JSON within a token budget.
+
+    Upstream sections are projected to the fields listed in
+    PROMPT_SECTION_FIELDS. While the estimate is over budget, the largest
+    variable is trimmed (long strings and lists first); budget <= 0 disables
+    trimming.
+    """
+
+    fields = PROMPT_SECTION_FIELDS.get(prompt_name, {})
+    values = {
+        name: _project(value, fields[name]) if name in fields else value
+        for name, value in inputs.items()
+    }
+
+    if budget > 0:
+        # Bounded so a pathological input can never spin here.
+        for _ in range(64):
+            encoded = {name: compact_json(value) for name, value in values.items()}
+            if sum(estimate_tokens(text) for text in encoded.values()) <= budget:
+                break
+            largest = max(encoded, key=lambda name: len(encoded[name]))
+            shrunk = _shrink(values[largest])
+            if shrunk == values[largest]:
+                break
+            values[largest] = shrunk
+
+    return {name: compact_json(value) for name, value in values.items()}
+
+
+def prompt_budget(prompt_name: str) -> int:
+    """Input-token budget for a prompt, from config/settings.py."""
+
+    return settings.PROMPT_TOKEN_BUDGETS.get(prompt_name, 0)
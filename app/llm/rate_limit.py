@@ -0,0 +1,419 @@
+"""Adaptive Groq rate limiting, retries and per-agent concurrency caps.
+
+Every agent LLM call goes through call_llm() / acall_llm(), which:
+- caps how many calls each agent may have in flight,
+- reserves request and token budget from a process-wide token bucket,
+- retries 429s, timeouts and 5xx with jittered exponential backoff,
+- gives up once the per-call deadline would be exceeded,
+- reports each attempt's outcome and queue time to app.llm.routing,
+- records attempt latency, queue time, tokens and cost on /metrics.
+
+The bucket starts from the configured requests/tokens per minute and is
+corrected by Groq's x-ratelimit-* and retry-after response headers, which the
+shared HTTP client reports via RateLimiter.observe().
+
+Usage:
+    from app.llm.rate_limit import acall_llm
+
+    response = await acall_llm("market", lambda: llm.ainvoke(messages), messages)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, TypeVar
+
+import groq
+import httpx
+
+from app.llm.prompts import estimate_tokens as estimate_text_tokens
+from app.llm.routing import record_model_call
+from app.utils.metrics import LLM_CALL_SECONDS, LLM_QUEUE_SECONDS, record_tokens
+from config import settings
+
+T = TypeVar("T")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class LLMCallError(RuntimeError):
+    """An LLM call that still failed after retries or ran out of time.
+
+    status_code is the HTTP status the API should surface (503 for upstream
+    rate limiting/outages, 504 for deadline exhaustion).
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: int = 503,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset durations such as "7.66s", "2m59.56s" or "120ms"."""
+
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class _Bucket:
+    """Token bucket that allows debt, so callers queue in reservation order."""
+
+    def __init__(self, per_minute: float, capacity: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self, amount: float, now: float) -> float:
+        """Take amount and return the seconds until it is actually covered."""
+
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def clamp(self, remaining: float) -> None:
+        """Never believe we have more budget than the server reports."""
+
+        self.tokens = min(self.tokens, remaining)
+
+
+class RateLimiter:
+    """Requests/min + tokens/min budget shared by all agents (0 disables)."""
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float = 0,
+        burst: Optional[int] = None,
+    ) -> None:
+        self.requests = _Bucket(
+            requests_per_minute, burst or max(1, int(requests_per_minute // 6))
+        )
+        # Groq's token window is a full minute, so allow a minute's burst;
+        # observe() clamps it to what the server says is actually left.
+        self.tokens = _Bucket(tokens_per_minute, tokens_per_minute)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve one request plus an estimated token count.
+
+        Returns the seconds to wait before sending it.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.requests.take(1.0, now),
+                self.tokens.take(float(tokens), now),
+                self._paused_until - now,
+            )
+            return max(0.0, wait)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every new reservation for the given time (e.g. retry-after)."""
+
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adapt the budget from Groq's rate-limit response headers."""
+
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None:
+            try:
+                with self._lock:
+                    self.tokens.clamp(float(remaining_tokens))
+            except ValueError:
+                pass
+
+        # Groq's request limit is per day; only back off once it is spent.
+        if headers.get("x-ratelimit-remaining-requests") == "0":
+            reset = _parse_duration(headers.get("x-ratelimit-reset-requests"))
+            if reset:
+                self.pause(reset)
+
+        if status_code == 429:
+            retry_after = _parse_duration(headers.get("retry-after")) or _parse_duration(
+                headers.get("x-ratelimit-reset-tokens")
+            )
+            if retry_after:
+                self.pause(retry_after)
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block the current thread until the reservation is covered."""
+
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: int = 0) -> None:
+        """Wait (without blocking the loop) until the reservation is covered."""
+
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the shared limiter configured from config/settings.py."""
+
+    global _limiter
+
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    settings.GROQ_REQUESTS_PER_MINUTE,
+                    settings.GROQ_TOKENS_PER_MINUTE,
+                    burst=settings.GROQ_REQUEST_BURST or None,
+                )
+    return _limiter
+
+
+def observe_response(response: httpx.Response) -> None:
+    """httpx response hook feeding rate-limit headers to the limiter."""
+
+    get_rate_limiter().observe(response.status_code, response.headers)
+
+
+async def aobserve_response(response: httpx.Response) -> None:
+    """Async httpx response hook (httpx requires a coroutine here)."""
+
+    observe_response(response)
+
+
+# Per-agent concurrency caps (separate primitives for threads and the loop).
+# asyncio primitives are bound to one event loop, and sync callers (batch
+# runs, tests) each start their own, so async slots are kept per loop.
+_thread_slots: Dict[str, threading.BoundedSemaphore] = {}
+_async_slots: "weakref.WeakKeyDictionary[Any, Dict[str, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+_slots_lock = threading.Lock()
+
+
+def _thread_slot(agent: str) -> threading.BoundedSemaphore:
+    """Concurrency cap for sync calls made by one agent."""
+
+    with _slots_lock:
+        if agent not in _thread_slots:
+            _thread_slots[agent] = threading.BoundedSemaphore(
+                settings.AGENT_MAX_CONCURRENCY
+            )
+        return _thread_slots[agent]
+
+
+def _async_slot(agent: str) -> asyncio.Semaphore:
+    """Concurrency cap for async calls made by one agent on the running loop."""
+
+    loop = asyncio.get_running_loop()
+    with _slots_lock:
+        slots = _async_slots.setdefault(loop, {})
+        if agent not in slots:
+            slots[agent] = asyncio.Semaphore(settings.AGENT_MAX_CONCURRENCY)
+        return slots[agent]
+
+
+def estimate_tokens(messages: List[Any]) -> int:
+    """Rough prompt + completion token estimate used for budgeting."""
+
+    prompt_tokens = sum(
+        estimate_text_tokens(str(getattr(m, "content", m))) for m in messages
+    )
+    return prompt_tokens + settings.LLM_EXPECTED_COMPLETION_TOKENS
+
+
+def _retry_delay(exc: BaseException, attempt: int) -> Optional[float]:
+    """Backoff for a retryable error, or None if the error is final."""
+
+    retryable = isinstance(exc, (groq.APIConnectionError, httpx.TimeoutException))
+    if isinstance(exc, groq.APIStatusError):
+        if exc.status_code == 429:
+            retry_after = _parse_duration(exc.response.headers.get("retry-after"))
+            if retry_after:
+                return retry_after
+        retryable = exc.status_code == 429 or exc.status_code >= 500
+    if not retryable:
+        return None
+
+    # Full jitter keeps concurrent callers from retrying in lockstep.
+    ceiling = min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def failed_generation(exc: BaseException) -> Optional[str]:
+    """Output Groq JSON mode rejected (400 json_validate_failed), if exc is that.
+
+    Returns the rejected text ("" if Groq sent none), or None for any other
+    error. These are final (not retried): the caller repairs the text or
+    re-asks instead.
+    """
+
+    if not isinstance(exc, groq.APIError):
+        return None
+    body = exc.body
+    # Status errors carry {"error": {...}}; errors inside a stream the inner dict.
+    error = body.get("error", body) if isinstance(body, dict) else None
+    if not isinstance(error, dict) or error.get("code") != "json_validate_failed":
+        return None
+    text = error.get("failed_generation")
+    return text if isinstance(text, str) else ""
+
+
+def _server_queue_time(response: Any) -> float:
+    """Groq-reported queue time of a chat response, if it carries one."""
+
+    metadata = getattr(response, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or {}
+    try:
+        return float(usage.get("queue_time") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _record_attempt(
+    agent: str,
+    model: Optional[str],
+    response: Any,
+    queued: float,
+    call_started: float,
+) -> None:
+    """Report one attempt to model health and the metrics.
+
+    response is None for a failed attempt. Token usage is only available
+    here for non-streamed responses; streamed calls report it themselves.
+    """
+
+    ok = response is not None
+    if ok:
+        queued += _server_queue_time(response)
+    record_model_call(model, ok, queued)
+    labels = {"agent": agent, "model": model or ""}
+    LLM_QUEUE_SECONDS.observe(queued, **labels)
+    LLM_CALL_SECONDS.observe(
+        time.monotonic() - call_started, outcome="ok" if ok else "error", **labels
+    )
+    if ok:
+        record_tokens(agent, model, getattr(response, "usage_metadata", None))
+
+
+def _give_up(agent: str, exc: BaseException, deadline_hit: bool) -> LLMCallError:
+    """Wrap the last upstream error in an LLMCallError for the API layer."""
+
+    if deadline_hit:
+        return LLMCallError(f"{agent} LLM call exceeded its deadline: {exc}", 504)
+    retry_after = None
+    if isinstance(exc, groq.APIStatusError):
+        retry_after = _parse_duration(exc.response.headers.get("retry-after"))
+    return LLMCallError(f"{agent} LLM call failed after retries: {exc}", 503, retry_after)
+
+
+def call_llm(
+    agent: str,
+    call: Callable[[], T],
+    messages: List[Any],
+    model: Optional[str] = None,
+) -> T:
+    """Run a blocking LLM call with rate limiting, retries and a deadline.
+
+    model labels attempt health (for routing fallbacks) and metrics.
+    """
+
+    started = time.monotonic()
+    deadline = started + settings.LLM_CALL_DEADLINE
+    tokens = estimate_tokens(messages)
+
+    with _thread_slot(agent):
+        attempt = 0
+        while True:
+            get_rate_limiter().acquire(tokens)
+            call_started = time.monotonic()
+            queued = call_started - started
+            try:
+                response = call()
+            except Exception as exc:
+                delay = _retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                _record_attempt(agent, model, None, queued, call_started)
+                attempt += 1
+                if attempt > settings.LLM_MAX_RETRIES:
+                    raise _give_up(agent, exc, False) from exc
+                if time.monotonic() + delay > deadline:
+                    raise _give_up(agent, exc, True) from exc
+                time.sleep(delay)
+                started = time.monotonic()
+            else:
+                _record_attempt(agent, model, response, queued, call_started)
+                return response
+
+
+async def acall_llm(
+    agent: str,
+    call: Callable[[], Awaitable[T]],
+    messages: List[Any],
+    model: Optional[str] = None,
+) -> T:
+    """Async counterpart of call_llm(); each attempt is bounded by the deadline."""
+
+    started = time.monotonic()
+    deadline = started + settings.LLM_CALL_DEADLINE
+    tokens = estimate_tokens(messages)
+
+    async with _async_slot(agent):
+        attempt = 0
+        while True:
+            await get_rate_limiter().acquire_async(tokens)
+            call_started = time.monotonic()
+            queued = call_started - started
+            try:
+                remaining = max(0.0, deadline - time.monotonic())
+                response = await asyncio.wait_for(call(), timeout=remaining)
+            except asyncio.TimeoutError as exc:
+                _record_attempt(agent, model, None, queued, call_started)
+                raise _give_up(agent, exc, True) from exc
+            except Exception as exc:
+                delay = _retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                _record_attempt(agent, model, None, queued, call_started)
+                attempt += 1
+                if attempt > settings.LLM_MAX_RETRIES:
+                    raise _give_up(agent, exc, False) from exc
+                if time.monotonic() + delay > deadline:
+                    raise _give_up(agent, exc, True) from exc
+                await asyncio.sleep(delay)
+                started = time.monotonic()
+            else:
+                _record_attempt(agent, model, response, queued, call_started)
+                return response
@@ -0,0 +1,179 @@
+"""Per-agent model routing with automatic fallback to the fast tier.
+
+Each agent is mapped to a tier in config/settings.py (AGENT_MODEL_TIERS):
+"fast" (latency-optimized, e.g. llama-3.1-8b-instant) for structured
+extraction, "quality" (e.g. llama-3.3-70b-versatile) where reasoning matters.
+A request can override the tier or pin a model per agent.
+
+call_llm()/acall_llm() report every attempt to ModelHealth. When a model's
+recent error rate or queue time crosses its threshold, select_model() routes
+its agents to the fast tier for a cooldown period, then tries it again.
+
+Usage:
+    from app.llm.routing import select_model
+
+    model = select_model("strategy", {"strategy": "fast"})
+    llm = get_llm(model)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+from config import settings
+
+# Fewer recent calls than this are not enough to judge a model.
+_MIN_SAMPLES = 5
+
+
+class ModelHealth:
+    """Sliding-window error rate and average queue time per model."""
+
+    def __init__(
+        self,
+        window: int,
+        max_error_rate: float,
+        max_queue_seconds: float,
+        cooldown_seconds: float,
+    ) -> None:
+        self.window = max(_MIN_SAMPLES, window)
+        self.max_error_rate = max_error_rate
+        self.max_queue_seconds = max_queue_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._samples: Dict[str, Deque[Tuple[bool, float]]] = {}
+        self._tripped_until: Dict[str, float] = {}
+        self._fallbacks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, ok: bool, queue_seconds: float = 0.0) -> None:
+        """Record one attempt and trip the model if it looks unhealthy."""
+
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=self.window))
+            samples.append((ok, queue_seconds))
+            if len(samples) < _MIN_SAMPLES:
+                return
+
+            error_rate = sum(1 for ok, _ in samples if not ok) / len(samples)
+            queue = sum(q for _, q in samples) / len(samples)
+            if (self.max_error_rate and error_rate >= self.max_error_rate) or (
+                self.max_queue_seconds and queue >= self.max_queue_seconds
+            ):
+                self._tripped_until[model] = time.monotonic() + self.cooldown_seconds
+                # Judge the model afresh once the cooldown is over.
+                samples.clear()
+
+    def degraded(self, model: str) -> bool:
+        """True while the model is in its fallback cooldown."""
+
+        return self._tripped_until.get(model, 0.0) > time.monotonic()
+
+    def count_fallback(self, model: str) -> None:
+        """Count a call routed away from model."""
+
+        with self._lock:
+            self._fallbacks[model] = self._fallbacks.get(model, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model error rate, mean queue time and fallback state."""
+
+        with self._lock:
+            models = set(self._samples) | set(self._fallbacks)
+            result = {}
+            for model in sorted(models):
+                samples = self._samples.get(model) or ()
+                count = len(samples)
+                result[model] = {
+                    "samples": count,
+                    "error_rate": (
+                        sum(1 for ok, _ in samples if not ok) / count if count else 0.0
+                    ),
+                    "queue_seconds": (
+                        sum(q for _, q in samples) / count if count else 0.0
+                    ),
+                    "degraded": self.degraded(model),
+                    "fallbacks": self._fallbacks.get(model, 0),
+                }
+            return result
+
+
+_health: Optional[ModelHealth] = None
+_health_lock = threading.Lock()
+
+
+def get_model_health() -> ModelHealth:
+    """Return the shared model health tracker configured from settings."""
+
+    global _health
+
+    if _health is None:
+        with _health_lock:
+            if _health is None:
+                _health = ModelHealth(
+                    settings.MODEL_FALLBACK_WINDOW,
+                    settings.MODEL_FALLBACK_ERROR_RATE,
+                    settings.MODEL_FALLBACK_QUEUE_SECONDS,
+                    settings.MODEL_FALLBACK_COOLDOWN,
+                )
+    return _health
+
+
+def record_model_call(
+    model: Optional[str], ok: bool, queue_seconds: float = 0.0
+) -> None:
+    """Report one LLM attempt (no-op when the model is unknown)."""
+
+    if model:
+        get_model_health().record(model, ok, queue_seconds)
+
+
+def resolve_model(name: str) -> str:
+    """Map a tier name ("fast"/"quality") to its model; model IDs pass through."""
+
+    return settings.MODEL_TIERS.get(name, name)
+
+
+def is_allowed_model(name: str) -> bool:
+    """True for a tier name or a model ID in ALLOWED_MODELS."""
+
+    return name in settings.MODEL_TIERS or name in settings.ALLOWED_MODELS
+
+
+def select_model(agent: str, overrides: Optional[Mapping[str, str]] = None) -> str:
+    """Pick the model for an agent call.
+
+    Precedence: overrides[agent], overrides["default"], AGENT_MODEL_TIERS,
+    then DEFAULT_MODEL. A degraded model falls back to the fast tier.
+    """
+
+    overrides = overrides or {}
+    choice = (
+        overrides.get(agent)
+        or overrides.get("default")
+        or settings.AGENT_MODEL_TIERS.get(agent)
+        or settings.DEFAULT_MODEL
+    )
+    model = resolve_model(choice)
+
+    fallback = settings.MODEL_TIERS["fast"]
+    health = get_model_health()
+    if model != fallback and health.degraded(model):
+        health.count_fallback(model)
+        return fallback
+    return model
+
+
+def routing_info() -> Dict[str, Any]:
+    """Configured tiers, per-agent routing and live model health."""
+
+    return {
+        "tiers": dict(settings.MODEL_TIERS),
+        "agents": {
+            agent: resolve_model(tier)
+            for agent, tier in settings.AGENT_MODEL_TIERS.items()
+        },
+        "health": get_model_health().stats(),
+    }
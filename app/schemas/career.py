@@ -0,0 +1,100 @@
+"""Pydantic output schemas for the career planning agents.
+
+Models tend to drift from the requested shape (a string where a list was
+asked for, a number for a string), so AgentOutput coerces before validating:
+- list fields: None becomes [], a single value becomes [value]
+- str fields: anything that is not a string becomes ""
+Unknown keys are ignored, and missing keys take the field defaults.
+"""
+
+from typing import Any, Dict, List, Union, get_origin
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Ensure a list, wrapping single values and mapping None to []."""
+
+    if isinstance(value, list):
+        return value
+    if value is None:
+        return []
+    return [value]
+
+
+class AgentOutput(BaseModel):
+    """Base for agent outputs with lenient, shape-preserving coercion."""
+
+    model_config = ConfigDict(extra="ignore")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _coerce(cls, data: Any) -> Any:
+        """Coerce list/str fields the way the agents always have."""
+
+        if not isinstance(data, dict):
+            return data
+        coerced: Dict[str, Any] = {}
+        for name, field in cls.model_fields.items():
+            if name not in data:
+                continue
+            value = data[name]
+            if get_origin(field.annotation) is list:
+                value = _as_list(value)
+            elif field.annotation is str and not isinstance(value, str):
+                value = ""
+            coerced[name] = value
+        return coerced
+
+
+class SkillAnalysis(AgentOutput):
+    """Skill analyzer output."""
+
+    summary: str = ""
+    strengths: List[Any] = Field(default_factory=list)
+    gaps: List[Any] = Field(default_factory=list)
+    role_fit: List[Any] = Field(
+        default_factory=list, description='Items: {"role", "fit_score", "notes"}.'
+    )
+
+
+class MarketAnalysis(AgentOutput):
+    """Market intelligence output."""
+
+    in_demand_skills: List[Any] = Field(default_factory=list)
+    emerging_skills: List[Any] = Field(default_factory=list)
+    skill_gaps: List[Any] = Field(default_factory=list)
+    market_summary: str = ""
+
+
+class StrategyAnalysis(AgentOutput):
+    """Career strategy output."""
+
+    recommended_role: str = ""
+    alternative_roles: List[Any] = Field(default_factory=list)
+    priority_focus_areas: List[Any] = Field(default_factory=list)
+    decision_rationale: str = ""
+
+
+class Roadmap(AgentOutput):
+    """Roadmap planner output."""
+
+    duration_months: Union[int, float, str] = ""
+    phases: List[Any] = Field(
+        default_factory=list, description='Items: {"name", "focus", "weeks"}.'
+    )
+    weekly_plan: List[Any] = Field(
+        default_factory=list, description='Items: {"week", "tasks"}.'
+    )
+    final_outcome: str = ""
+
+    @model_validator(mode="before")
+    @classmethod
+    def _duration(cls, data: Any) -> Any:
+        """Keep numeric or string durations; drop anything else."""
+
+        if isinstance(data, dict) and not isinstance(
+            data.get("duration_months", ""), (int, float, str)
+        ):
+            data = {**data, "duration_months": ""}
+        return data
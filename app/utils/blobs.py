@@ -0,0 +1,251 @@
+"""Interned storage for large request inputs such as resume text.
+
+Graph state carries a short content-addressed ID ("blob:<sha256>") instead
+of the text itself, so the text is not copied into every state snapshot and
+checkpoint. Identical texts share one entry (interning). Entries live in a
+size-bounded in-memory LRU. Texts of checkpointed runs are also written to
+SQLite (BLOB_SQLITE_PATH, by default next to the LangGraph checkpoints) so
+those plans can still be resumed after a restart. Entries expire after
+BLOB_TTL_SECONDS and SQLite keeps at most BLOB_SQLITE_MAX_ENTRIES, since
+resumes are personal data.
+
+Usage:
+    from app.utils.blobs import aintern_text, intern_text, resolve_text
+
+    ref = intern_text(resume_text)   # "blob:3f2a...", memory only
+    ref = await aintern_text(resume_text, persist=True)
+    text = resolve_text(ref)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import settings
+
+BLOB_PREFIX = "blob:"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    id TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_stored_at ON blobs (stored_at);
+"""
+
+
+def blob_id(text: str) -> str:
+    """Content-addressed ID of a text (without storing it)."""
+
+    return BLOB_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Interned texts keyed by blob_id(), LRU-bounded by total characters.
+
+    ttl_seconds (0 = never) expires entries in memory and in SQLite;
+    max_rows (0 = unbounded) caps SQLite, dropping the oldest rows first.
+    The SQLite file is only opened once a persistent entry is written or a
+    lookup misses in memory.
+    """
+
+    def __init__(
+        self,
+        max_chars: int = 0,
+        sqlite_path: Optional[str] = None,
+        ttl_seconds: float = 0,
+        max_rows: int = 0,
+    ) -> None:
+        self.max_chars = max_chars
+        self.sqlite_path = sqlite_path
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._chars = 0
+        self._stats = {"puts": 0, "interned": 0, "misses": 0, "expired": 0}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - stored_at > self.ttl_seconds
+
+    def _remember(self, ref: str, text: str, stored_at: float) -> None:
+        """Insert into the LRU, evicting the oldest entries over max_chars."""
+
+        old = self._entries.pop(ref, None)
+        if old is not None:
+            self._chars -= len(old[0])
+        self._entries[ref] = (text, stored_at)
+        self._chars += len(text)
+        while (
+            self.max_chars and self._chars > self.max_chars and len(self._entries) > 1
+        ):
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._chars -= len(evicted)
+
+    def _intern(self, text: str) -> str:
+        """Store text in memory (refreshing its age) and return its ID."""
+
+        ref = blob_id(text)
+        with self._lock:
+            self._stats["puts"] += 1
+            if ref in self._entries:
+                self._stats["interned"] += 1
+            self._remember(ref, text, time.time())
+        return ref
+
+    def _connect(self, create: bool) -> Optional[sqlite3.Connection]:
+        """The SQLite connection, opened on first use (None if unavailable)."""
+
+        if self._db is None and self.sqlite_path:
+            if not create and not os.path.exists(self.sqlite_path):
+                return None
+            self._db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _persist(self, ref: str, text: str) -> None:
+        """Write one entry to SQLite and drop expired or surplus rows."""
+
+        now = time.time()
+        with self._db_lock:
+            db = self._connect(create=True)
+            if db is None:
+                return
+            db.execute(
+                "INSERT INTO blobs (id, value, stored_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET stored_at = excluded.stored_at",
+                (ref, text, now),
+            )
+            if self.ttl_seconds:
+                db.execute(
+                    "DELETE FROM blobs WHERE stored_at < ?", (now - self.ttl_seconds,)
+                )
+            if self.max_rows:
+                db.execute(
+                    "DELETE FROM blobs WHERE id IN (SELECT id FROM blobs"
+                    " ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_rows,),
+                )
+            db.commit()
+
+    def put(self, text: str, persist: bool = False) -> str:
+        """Store text (once per distinct content) and return its ID.
+
+        persist also writes it to SQLite, synchronously; use aput() on the
+        event loop.
+        """
+
+        ref = self._intern(text)
+        if persist:
+            self._persist(ref, text)
+        return ref
+
+    async def aput(self, text: str, persist: bool = False) -> str:
+        """put() with the SQLite write run in a worker thread."""
+
+        ref = self._intern(text)
+        if persist and self.sqlite_path:
+            await asyncio.to_thread(self._persist, ref, text)
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        """Return the text for an ID, or None if it is unknown or expired."""
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(ref)
+            if entry is not None and self._expired(entry[1], now):
+                self._entries.pop(ref)
+                self._chars -= len(entry[0])
+                self._stats["expired"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(ref)
+                return entry[0]
+        with self._db_lock:
+            db = self._connect(create=False)
+            row = None
+            if db is not None:
+                row = db.execute(
+                    "SELECT value, stored_at FROM blobs WHERE id = ?", (ref,)
+                ).fetchone()
+        with self._lock:
+            if row is not None and not self._expired(row[1], now):
+                self._remember(ref, row[0], row[1])
+                return row[0]
+            self._stats["misses"] += 1
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, resident characters and put/intern/miss counters."""
+
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "chars": self._chars,
+                "persistent": bool(self.sqlite_path),
+                "ttl_seconds": self.ttl_seconds,
+                **self._stats,
+            }
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store configured from settings."""
+
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BlobStore(
+                    max_chars=settings.BLOB_STORE_MAX_CHARS,
+                    sqlite_path=settings.BLOB_SQLITE_PATH or None,
+                    ttl_seconds=settings.BLOB_TTL_SECONDS,
+                    max_rows=settings.BLOB_SQLITE_MAX_ENTRIES,
+                )
+    return _store
+
+
+def intern_text(text: str) -> str:
+    """Store text in memory in the process-wide store; "" for empty text."""
+
+    return get_blob_store().put(text) if text else ""
+
+
+async def aintern_text(text: str, persist: bool = False) -> str:
+    """Store text in the process-wide store; "" for empty text.
+
+    Pass persist=True for checkpointed runs so the text survives a restart.
+    """
+
+    return await get_blob_store().aput(text, persist=persist) if text else ""
+
+
+def resolve_text(ref: str) -> str:
+    """Text for an ID from intern_text() ("" for an empty ID).
+
+    Raises LookupError if the blob is gone (expired, evicted without
+    persistence, or a checkpoint from another process without
+    BLOB_SQLITE_PATH).
+    """
+
+    if not ref:
+        return ""
+    text = get_blob_store().get(ref)
+    if text is None:
+        raise LookupError(f"Input blob {ref} is no longer available.")
+    return text
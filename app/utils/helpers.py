@@ -0,0 +1,197 @@
+"""Shared helpers: deterministic skill taxonomy lookup.
+
+Skills arrive as free text ("py", "React.js", "kubernets"). The local taxonomy
+maps them to canonical IDs before any agent runs, so equivalent inputs produce
+identical prompts, cache keys and batch fingerprints.
+
+The taxonomy lives in data/skill_taxonomy.tsv, one skill per line:
+
+    id<TAB>display name<TAB>alias|alias|...
+
+The file is parsed once into a hash index over normalized alias keys, giving
+O(1) exact lookups. Misses fall back to fuzzy matching (difflib) for typos,
+limited to aliases with the same words ("kubernets" -> "Kubernetes", but not
+"TensorFlow.js" -> "TensorFlow"); anything still unknown is kept as
+cleaned-up text.
+The same TSV reader and AliasIndex back the role catalog in app.utils.role_fit.
+
+Usage:
+    from app.utils.helpers import normalize_skills
+
+    normalize_skills(["py", "ReactJS", "kubernets", "Underwater basket"])
+    # ["Python", "React", "Kubernetes", "Underwater basket"]
+"""
+
+from __future__ import annotations
+
+import difflib
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from config import settings
+
+_SPACES = re.compile(r"\s+")
+_LOOSE = re.compile(r"[\s.\-_/]+")
+
+# Short keys ("go", "r", "c") are too ambiguous to fuzzy-match.
+_FUZZY_MIN_LENGTH = 4
+
+
+def _key(text: str) -> str:
+    """Exact lookup key: lowercase with collapsed whitespace."""
+
+    return _SPACES.sub(" ", text.strip().lower())
+
+
+def _loose_key(text: str) -> str:
+    """Looser key ignoring spaces, dots, dashes and slashes ("node.js" == "nodejs")."""
+
+    return _LOOSE.sub("", text.strip().lower())
+
+
+def _initials(text: str) -> str:
+    """First letter of each word ("TensorFlow.js" -> "tj"), for fuzzy matching."""
+
+    return "".join(word[0] for word in _LOOSE.split(text.strip().lower()) if word)
+
+
+def iter_tsv_rows(path: Path) -> Iterator[List[str]]:
+    """Yield the stripped columns of each data line in a TSV file.
+
+    Blank lines and "#" comments are skipped.
+    """
+
+    with path.open("r", encoding="utf-8") as handle:
+        for raw in handle:
+            line = raw.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            yield [column.strip() for column in line.split("\t")]
+
+
+def split_aliases(value: str) -> List[str]:
+    """Split a "a|b|c" alias column, dropping empty entries."""
+
+    return [alias.strip() for alias in value.split("|") if alias.strip()]
+
+
+class AliasIndex:
+    """Hash index from free-text aliases to IDs, with a fuzzy fallback."""
+
+    def __init__(self) -> None:
+        self._exact: Dict[str, str] = {}
+        self._loose: Dict[str, str] = {}
+        self._fuzzy_keys: List[str] = []
+        # Loose key -> initials of the aliases that produce it.
+        self._fuzzy_initials: Dict[str, Set[str]] = {}
+
+    def add(self, item_id: str, aliases: List[str]) -> None:
+        """Register aliases for an ID; the first ID to claim an alias keeps it."""
+
+        for alias in aliases:
+            self._exact.setdefault(_key(alias), item_id)
+            loose = _loose_key(alias)
+            if loose and loose not in self._loose:
+                self._loose[loose] = item_id
+                if len(loose) >= _FUZZY_MIN_LENGTH:
+                    self._fuzzy_keys.append(loose)
+            if self._loose.get(loose) == item_id and len(loose) >= _FUZZY_MIN_LENGTH:
+                self._fuzzy_initials.setdefault(loose, set()).add(_initials(alias))
+
+    def get(self, text: str) -> Optional[str]:
+        """Return the ID for text: exact, then loose, then fuzzy match.
+
+        A fuzzy match must have the same number of words as text, each
+        starting with the same letter, so "Unix" does not become "Linux"
+        and "TensorFlow.js" does not become "TensorFlow".
+        """
+
+        item_id = self._exact.get(_key(text))
+        if item_id:
+            return item_id
+
+        loose = _loose_key(text)
+        item_id = self._loose.get(loose)
+        if item_id or len(loose) < _FUZZY_MIN_LENGTH or not settings.SKILL_FUZZY_CUTOFF:
+            return item_id
+
+        initials = _initials(text)
+        for match in difflib.get_close_matches(
+            loose, self._fuzzy_keys, n=3, cutoff=settings.SKILL_FUZZY_CUTOFF
+        ):
+            if initials in self._fuzzy_initials[match]:
+                return self._loose[match]
+        return None
+
+
+class SkillTaxonomy:
+    """Canonical skills plus an alias index for exact and fuzzy lookup."""
+
+    def __init__(self, rows: List[Tuple[str, str, List[str]]]) -> None:
+        self.names: Dict[str, str] = {}
+        self._index = AliasIndex()
+        for skill_id, name, aliases in rows:
+            self.names[skill_id] = name
+            self._index.add(skill_id, [skill_id, name, *aliases])
+        # Return the canonical skill ID for free text, or None if unknown.
+        self.lookup = lru_cache(maxsize=4096)(self._index.get)
+
+    @classmethod
+    def load(cls, path: Path) -> "SkillTaxonomy":
+        """Build the taxonomy from a TSV file (empty if the file is missing)."""
+
+        if not path.is_file():
+            return cls([])
+        rows = []
+        for columns in iter_tsv_rows(path):
+            columns += [""] * (3 - len(columns))
+            skill_id, name, aliases = columns[:3]
+            rows.append((skill_id, name or skill_id, split_aliases(aliases)))
+        return cls(rows)
+
+    def canonical(self, text: str) -> str:
+        """Display name for a known skill, else the input with tidied whitespace."""
+
+        skill_id = self.lookup(text)
+        if skill_id:
+            return self.names[skill_id]
+        return _SPACES.sub(" ", text.strip())
+
+    def normalize(self, skills: List[str]) -> List[str]:
+        """Canonicalize and de-duplicate skills, keeping first-seen order."""
+
+        normalized: List[str] = []
+        seen = set()
+        for skill in skills:
+            if not isinstance(skill, str) or not skill.strip():
+                continue
+            name = self.canonical(skill)
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                normalized.append(name)
+        return normalized
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Return the process-wide taxonomy, loading it on first use."""
+
+    global _taxonomy
+
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = SkillTaxonomy.load(Path(settings.SKILL_TAXONOMY_PATH))
+    return _taxonomy
+
+
+def normalize_skills(skills: List[str]) -> List[str]:
+    """Map free-text skills to canonical names (see SkillTaxonomy.normalize)."""
+
+    return get_skill_taxonomy().normalize(skills)
@@ -0,0 +1,308 @@
+"""Prometheus metrics and per-request trace IDs.
+
+This module:
+- Keeps a small in-process metrics registry (counters and histograms with
+  labels) rendered in the Prometheus text format by GET /metrics
+- Declares the metrics recorded by the graph nodes, the LLM call path and
+  the HTTP middleware
+- Holds the current request's trace ID in a context variable; it is copied
+  into the graph state and stamped next to generated_at on every section
+
+The registry is self-contained so /metrics needs no extra dependency; each
+worker process exposes its own counters.
+
+Usage:
+    from app.utils.metrics import NODE_SECONDS, render_metrics
+
+    NODE_SECONDS.observe(0.42, node="market_analysis", status="recomputed")
+    text = render_metrics()
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import re
+import threading
+import uuid
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from config import settings
+
+LabelKey = Tuple[str, ...]
+
+# Latency buckets (seconds) spanning cache hits to slow 70B completions.
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render {name="value",...} (empty string without labels)."""
+
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value; whole numbers without a trailing .0."""
+
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Mapping[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _lines(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(header + self._lines())
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def summary(self) -> Dict[LabelKey, float]:
+        """Value per label combination."""
+
+        with self._lock:
+            return dict(self._values)
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (count, sum, cumulative buckets) per labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per labels: [per-bucket counts (last one is +Inf), sum].
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def summary(self) -> Dict[LabelKey, Tuple[int, float]]:
+        """(count, sum) per label combination."""
+
+        with self._lock:
+            return {k: (sum(c), s[0]) for k, (c, s) in self._values.items()}
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        lines: List[str] = []
+        names = self.labels + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+_REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text format (version 0.0.4)."""
+
+    return "\n".join(metric.render() for metric in _REGISTRY) + "\n"
+
+
+def reset_metrics() -> None:
+    """Clear every metric (used by benchmarks between runs)."""
+
+    for metric in _REGISTRY:
+        metric.clear()
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+HTTP_SECONDS = Histogram(
+    "career_http_request_seconds",
+    "API request wall time (streaming responses: until the headers are sent).",
+    ("method", "path", "status"),
+)
+NODE_SECONDS = Histogram(
+    "career_node_seconds",
+    "Graph node wall time; status is recomputed, reused, shared, snapshot, "
+    "speculated or error.",
+    ("node", "status"),
+)
+LLM_CALL_SECONDS = Histogram(
+    "career_llm_call_seconds",
+    "LLM request wall time per attempt, excluding queueing.",
+    ("agent", "model", "outcome"),
+)
+LLM_QUEUE_SECONDS = Histogram(
+    "career_llm_queue_seconds",
+    "Time an LLM attempt waited for a concurrency slot, rate-limit budget "
+    "and Groq's own queue.",
+    ("agent", "model"),
+)
+LLM_TTFT_SECONDS = Histogram(
+    "career_llm_time_to_first_token_seconds",
+    "Time from sending a streamed LLM request to its first content chunk.",
+    ("agent", "model"),
+)
+LLM_TOKENS = Counter(
+    "career_llm_tokens_total",
+    "LLM tokens reported by Groq; kind is prompt or completion.",
+    ("agent", "model", "kind"),
+)
+LLM_COST = Counter(
+    "career_llm_cost_usd_total",
+    "Estimated LLM spend from LLM_TOKEN_PRICES.",
+    ("agent", "model"),
+)
+COALESCED = Counter(
+    "career_coalesced_total",
+    "Requests that attached to an identical in-flight plan or agent call; "
+    "scope is plan or the agent name.",
+    ("scope",),
+)
+LLM_PARSE = Counter(
+    "career_llm_parse_total",
+    "Agent outputs by parse outcome: ok, repaired, reasked, partial or invalid.",
+    ("agent", "outcome"),
+)
+
+
+def usage_tokens(usage: Optional[Mapping[str, Any]]) -> Tuple[int, int]:
+    """(prompt, completion) tokens from a LangChain usage_metadata dict."""
+
+    if not usage:
+        return 0, 0
+    return int(usage.get("input_tokens") or 0), int(usage.get("output_tokens") or 0)
+
+
+def record_tokens(
+    agent: str, model: Optional[str], usage: Optional[Mapping[str, Any]]
+) -> None:
+    """Count an LLM call's tokens and estimated cost."""
+
+    prompt, completion = usage_tokens(usage)
+    if not prompt and not completion:
+        return
+    model = model or ""
+    LLM_TOKENS.inc(prompt, agent=agent, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion, agent=agent, model=model, kind="completion")
+    input_price, output_price = settings.LLM_TOKEN_PRICES.get(model, (0.0, 0.0))
+    cost = (prompt * input_price + completion * output_price) / 1_000_000
+    LLM_COST.inc(cost, agent=agent, model=model)
+
+
+# ---------------------------------------------------------------------------
+# Trace IDs
+# ---------------------------------------------------------------------------
+
+_TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "trace_id", default=None
+)
+
+
+def new_trace_id(candidate: Optional[str] = None) -> str:
+    """Use a caller-supplied ID if it is well-formed, else a fresh one."""
+
+    if candidate and _TRACE_ID_PATTERN.match(candidate):
+        return candidate
+    return uuid.uuid4().hex
+
+
+def set_trace_id(trace_id: str) -> contextvars.Token:
+    """Make trace_id current for this context; returns a reset token."""
+
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token: contextvars.Token) -> None:
+    _trace_id.reset(token)
+
+
+def current_trace_id() -> str:
+    """The current request's trace ID, or a fresh one outside a request."""
+
+    return _trace_id.get() or new_trace_id()
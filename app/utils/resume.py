@@ -0,0 +1,194 @@
+"""Deterministic resume preprocessing.
+
+Cheap, LLM-free passes run before skill analysis:
+- normalize_resume(): unicode/whitespace/bullet normalization
+- strip_boilerplate(): drop page furniture and headers/footers repeated across pages
+- split_sections(): map known headings (Experience, Skills, ...) to text
+- extract_skills(): pull skill names out of the Skills section
+- chunk_text(): split long text on paragraph boundaries
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, List
+
+_BULLETS = re.compile(r"^[ \t]*[•▪●◦‣⁃–—*>\-]+[ \t]*", re.M)
+_BOILERPLATE = re.compile(
+    r"^(page \d+( of \d+)?|\d+\s*/\s*\d+|curriculum vitae|resume|résumé|"
+    r"references (are )?available (up)?on request\.?|confidential)$",
+    re.I,
+)
+_PAGE_NUMBER = re.compile(r"^(page \d+( of \d+)?|\d+\s*/\s*\d+)$", re.I)
+# Headers and footers are short lines among the first or last few lines of
+# a page.
+_FURNITURE_MAX_CHARS = 80
+_PAGE_EDGE_LINES = 2
+_SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "professional summary", "about me", "objective"),
+    "experience": (
+        "experience",
+        "work experience",
+        "professional experience",
+        "employment history",
+        "work history",
+    ),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "technologies"),
+    "projects": ("projects", "selected projects", "personal projects"),
+    "education": ("education", "academic background"),
+    "certifications": ("certifications", "certificates", "licenses"),
+}
+_HEADING_LOOKUP = {
+    alias: name for name, aliases in _SECTION_HEADINGS.items() for alias in aliases
+}
+_SKILL_SEPARATORS = re.compile(r"[,;|/\n·]")
+
+
+def normalize_resume(text: str) -> str:
+    """Normalize unicode, bullets and whitespace.
+
+    Form feeds (page breaks in text extracted from PDFs) are kept on lines
+    of their own for strip_boilerplate().
+    """
+
+    text = unicodedata.normalize("NFKC", text or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\t", " ")
+    text = text.replace("\f", "\n\f\n")
+    text = _BULLETS.sub("- ", text)
+    text = re.sub(r" {2,}", " ", text)
+    lines = [line if line == "\f" else line.strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _page_edges(lines: List[str]) -> List[List[int]]:
+    """Indexes of the first and last few non-empty lines of each page.
+
+    Pages end at form feeds and at page-number lines ("Page 2 of 3").
+    """
+
+    pages: List[List[int]] = [[]]
+    for index, line in enumerate(lines):
+        if line == "\f" or _PAGE_NUMBER.match(line):
+            pages.append([])
+        elif line:
+            pages[-1].append(index)
+    return [
+        sorted(set(page[:_PAGE_EDGE_LINES] + page[-_PAGE_EDGE_LINES:]))
+        for page in pages
+        if page
+    ]
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop page furniture and repeated headers/footers.
+
+    A header or footer is a short non-bullet line found at the top or bottom
+    of two or more pages; only its first occurrence is kept. Lines repeated
+    elsewhere (e.g. the same job title at two employers) are left alone.
+    """
+
+    lines = text.split("\n")
+    edges = _page_edges(lines)
+    pages_seen: Dict[str, int] = {}
+    for page in edges:
+        for key in {lines[index].lower() for index in page}:
+            pages_seen[key] = pages_seen.get(key, 0) + 1
+
+    furniture = set()
+    seen = set()
+    for index in (index for page in edges for index in page):
+        line = lines[index]
+        key = line.lower()
+        if (
+            pages_seen[key] < 2
+            or len(line) > _FURNITURE_MAX_CHARS
+            or line.startswith("- ")
+        ):
+            continue
+        if key in seen:
+            furniture.add(index)
+        seen.add(key)
+
+    kept = [
+        line
+        for index, line in enumerate(lines)
+        if index not in furniture and line != "\f" and not _BOILERPLATE.match(line)
+    ]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+
+
+def _heading(line: str) -> str:
+    """Return the canonical section name if line is a heading, else ""."""
+
+    candidate = line.strip().rstrip(":").strip().lower()
+    if len(candidate) > 40:
+        return ""
+    return _HEADING_LOOKUP.get(candidate, "")
+
+
+def split_sections(text: str) -> Dict[str, str]:
+    """Split normalized text into known sections.
+
+    Text before the first heading is stored under "header".
+    """
+
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for line in text.split("\n"):
+        name = _heading(line)
+        if name:
+            current = name
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return {
+        name: "\n".join(lines).strip()
+        for name, lines in sections.items()
+        if "".join(lines).strip()
+    }
+
+
+def extract_skills(sections: Dict[str, str]) -> List[str]:
+    """Pull individual skill names from the Skills section.
+
+    Handles "Languages: Python, Go" style lines by dropping the label.
+    """
+
+    skills: List[str] = []
+    seen = set()
+    for line in sections.get("skills", "").split("\n"):
+        if ":" in line:
+            line = line.split(":", 1)[1]
+        for item in _SKILL_SEPARATORS.split(line):
+            skill = item.strip(" -.\t")
+            if 1 < len(skill) <= 40 and skill.lower() not in seen:
+                seen.add(skill.lower())
+                skills.append(skill)
+    return skills
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """Split text into chunks of at most max_chars on paragraph boundaries.
+
+    Paragraphs longer than max_chars are split on line boundaries, then hard
+    cut as a last resort.
+    """
+
+    chunks: List[str] = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        pieces = [paragraph]
+        if len(paragraph) > max_chars:
+            pieces = paragraph.split("\n")
+        for piece in pieces:
+            while len(piece) > max_chars:
+                chunks.append(piece[:max_chars])
+                piece = piece[max_chars:]
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,210 @@
+"""Deterministic, vectorized role-fit scoring.
+
+Each role in data/role_profiles.tsv lists weighted core skills (taxonomy IDs):
+
+    id<TAB>title<TAB>alias|alias<TAB>skill_id:weight|skill_id:weight
+
+Profiles are encoded as a binary profile-by-skill matrix and scored against
+the role-by-skill weight matrix in a single NumPy product, so a cohort of
+thousands of profiles against dozens of roles costs one matmul. For each
+(profile, role) pair the scorer reports:
+- fit_score: weighted coverage of the role's core skills, 0-100
+- overlap: the core skills the profile has, heaviest first
+- gaps: the core skills it lacks, heaviest first
+
+Usage:
+    from app.utils.role_fit import score_role_fit
+
+    score_role_fit(["Python", "SQL"], ["Backend Engineer"])
+"""
+
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.helpers import (
+    AliasIndex,
+    SkillTaxonomy,
+    get_skill_taxonomy,
+    iter_tsv_rows,
+    split_aliases,
+)
+from config import settings
+
+# (skills, target_roles) for one profile.
+Profile = Tuple[Sequence[str], Sequence[str]]
+
+
+def _parse_requirements(value: str) -> Dict[str, float]:
+    """Parse "python:3|sql:2" into {"python": 3.0, "sql": 2.0}."""
+
+    requirements: Dict[str, float] = {}
+    for item in split_aliases(value):
+        skill_id, _, weight = item.partition(":")
+        try:
+            requirements[skill_id.strip()] = float(weight) if weight else 1.0
+        except ValueError:
+            continue
+    return requirements
+
+
+class RoleCatalog:
+    """Role requirement matrix plus a title/alias index."""
+
+    def __init__(
+        self,
+        roles: List[Tuple[str, str, List[str], Dict[str, float]]],
+        taxonomy: SkillTaxonomy,
+    ) -> None:
+        self.taxonomy = taxonomy
+        self.titles = [title for _, title, _, _ in roles]
+        self._rows: Dict[str, int] = {}
+        self._index = AliasIndex()
+        for row, (role_id, title, aliases, _) in enumerate(roles):
+            self._rows[role_id] = row
+            self._index.add(role_id, [role_id, title, *aliases])
+
+        # Only skills some role requires get a column.
+        self.skill_ids = sorted({s for _, _, _, req in roles for s in req})
+        self._columns = {skill_id: col for col, skill_id in enumerate(self.skill_ids)}
+
+        self.weights = np.zeros((len(roles), len(self.skill_ids)), dtype=np.float32)
+        for row, (_, _, _, requirements) in enumerate(roles):
+            for skill_id, weight in requirements.items():
+                self.weights[row, self._columns[skill_id]] = weight
+        self.required = (self.weights > 0).astype(np.float32)
+        self.totals = np.maximum(self.weights.sum(axis=1), 1e-9)
+
+        # Core-skill columns of each role, heaviest first.
+        self._order = [
+            np.array(
+                sorted(np.flatnonzero(row), key=lambda col, row=row: -row[col]),
+                dtype=np.intp,
+            )
+            for row in self.weights
+        ]
+        self.role_row = lru_cache(maxsize=1024)(self._role_row)
+
+    @classmethod
+    def load(cls, path: Path, taxonomy: SkillTaxonomy) -> "RoleCatalog":
+        """Build the catalog from a TSV file (empty if the file is missing)."""
+
+        roles = []
+        if path.is_file():
+            for columns in iter_tsv_rows(path):
+                columns += [""] * (4 - len(columns))
+                role_id, title, aliases, requirements = columns[:4]
+                roles.append(
+                    (
+                        role_id,
+                        title or role_id,
+                        split_aliases(aliases),
+                        _parse_requirements(requirements),
+                    )
+                )
+        return cls(roles, taxonomy)
+
+    def _role_row(self, title: str) -> Optional[int]:
+        """Matrix row for a free-text role title, or None if unknown."""
+
+        role_id = self._index.get(title)
+        return self._rows.get(role_id) if role_id else None
+
+    def encode(self, skill_sets: Sequence[Sequence[str]]) -> np.ndarray:
+        """Binary profile-by-skill matrix over the catalog's skill columns."""
+
+        matrix = np.zeros((len(skill_sets), len(self.skill_ids)), dtype=np.float32)
+        for i, skills in enumerate(skill_sets):
+            for skill in skills:
+                column = self._columns.get(self.taxonomy.lookup(skill) or "")
+                if column is not None:
+                    matrix[i, column] = 1.0
+        return matrix
+
+    def _names(self, columns: np.ndarray) -> List[str]:
+        """Display names for skill columns."""
+
+        return [
+            self.taxonomy.names.get(self.skill_ids[c], self.skill_ids[c])
+            for c in columns[: settings.ROLE_FIT_MAX_LIST]
+        ]
+
+    def score(self, profiles: Sequence[Profile]) -> List[List[Dict[str, Any]]]:
+        """Score every profile against its target roles in one batch.
+
+        Profiles without target roles are scored against every catalog role
+        (best first). Unknown role titles get fit_score None.
+        """
+
+        if not profiles:
+            return []
+        users = self.encode([skills for skills, _ in profiles])
+        coverage = (users @ self.weights.T) / self.totals
+        matched = users @ self.required.T
+
+        results: List[List[Dict[str, Any]]] = []
+        for i, (_, target_roles) in enumerate(profiles):
+            if target_roles:
+                pairs = [(title, self.role_row(title)) for title in target_roles]
+            else:
+                best = np.argsort(-coverage[i], kind="stable")
+                pairs = [(self.titles[r], int(r)) for r in best]
+
+            scored = []
+            for title, row in pairs:
+                if row is None:
+                    scored.append({"role": title, "matched_role": None, "fit_score": None})
+                    continue
+                order = self._order[row]
+                has = users[i, order] > 0
+                scored.append(
+                    {
+                        "role": title,
+                        "matched_role": self.titles[row],
+                        "fit_score": int(round(float(coverage[i, row]) * 100)),
+                        "matched": int(matched[i, row]),
+                        "required": int(order.size),
+                        "overlap": self._names(order[has]),
+                        "gaps": self._names(order[~has]),
+                    }
+                )
+            results.append(scored)
+        return results
+
+
+_catalog: Optional[RoleCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_role_catalog() -> RoleCatalog:
+    """Return the process-wide role catalog, loading it on first use."""
+
+    global _catalog
+
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = RoleCatalog.load(
+                    Path(settings.ROLE_PROFILES_PATH), get_skill_taxonomy()
+                )
+    return _catalog
+
+
+def score_role_fit_batch(profiles: Sequence[Profile]) -> List[List[Dict[str, Any]]]:
+    """Score many (skills, target_roles) profiles in one matrix operation."""
+
+    return get_role_catalog().score(profiles)
+
+
+def score_role_fit(
+    skills: Sequence[str],
+    target_roles: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Score one skill set against target roles (all roles if none given)."""
+
+    return score_role_fit_batch([(skills, target_roles or [])])[0]
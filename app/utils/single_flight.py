@@ -0,0 +1,120 @@
+"""Single-flight coalescing of identical in-flight async computations.
+
+The first caller for a key starts the computation; callers arriving with the
+same key while it runs attach to it and receive a copy of its result (or its
+exception). Nothing is kept once it finishes, so unlike the response cache
+this only covers concurrent stampedes, e.g. a cohort opening the same link.
+
+The shared work runs as its own task: a caller that is cancelled (client
+disconnect, a discarded speculative draft) stops waiting without cancelling
+the computation for the others. Once every caller has gone, the computation
+is cancelled too, so abandoned LLM calls stop spending tokens.
+
+Usage:
+    from app.utils.single_flight import SingleFlight
+
+    plans = SingleFlight("plan")
+    result, coalesced = await plans.run(key, lambda: compute(payload))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from app.utils.metrics import COALESCED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Per-key deduplication of concurrent async calls.
+
+    clone copies the shared result for each attached caller, so callers can
+    mutate their copy (e.g. stamp metadata) without affecting the others.
+    """
+
+    def __init__(
+        self, name: str, clone: Callable[[Any], Any] = copy.deepcopy
+    ) -> None:
+        self.name = name
+        self._clone = clone
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        # Callers currently awaiting each shared task.
+        self._waiters: Dict["asyncio.Task[Any]", int] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, label: str, field: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(label, {"leaders": 0, "coalesced": 0})
+            stats[field] += 1
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away.
+            task.exception()
+
+    def _running(self, key: str) -> Optional["asyncio.Task[Any]"]:
+        task = self._inflight.get(key)
+        # Tasks from another event loop (e.g. a previous asyncio.run) can't
+        # be awaited here.
+        if task is None or task.done():
+            return None
+        if task.get_loop() is not asyncio.get_running_loop():
+            return None
+        return task
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[T]],
+        label: Optional[str] = None,
+    ) -> Tuple[T, bool]:
+        """Run factory() once per key among concurrent callers.
+
+        Returns (result, coalesced); coalesced is True for callers that
+        attached to another caller's computation. label breaks the stats
+        down (e.g. by agent); it defaults to the flight's name.
+        """
+
+        label = label or self.name
+        task = self._running(key)
+        if task is not None:
+            self._count(label, "coalesced")
+            COALESCED.inc(scope=label)
+            return self._clone(await self._wait(key, task)), True
+
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        self._count(label, "leaders")
+        return await self._wait(key, task), False
+
+    async def _wait(self, key: str, task: "asyncio.Task[T]") -> T:
+        """Await the shared task; cancel it if the last caller goes away."""
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody is left to use the result; late callers start
+                    # a fresh computation instead of joining a cancelled one.
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Leader/coalesced counts per label plus current in-flight keys."""
+
+        with self._lock:
+            labels = {label: dict(stats) for label, stats in self._stats.items()}
+        return {"in_flight": len(self._inflight), "labels": labels}
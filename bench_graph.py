@@ -0,0 +1,338 @@
+"""Offline benchmark for the career planning graph and API.
+
+Plans run against the deterministic fake LLM in app/llm/fake_llm.py, so no
+GROQ_API_KEY is needed and the numbers show orchestration cost (graph
+execution, prompt building, parsing, state handling, HTTP layer) on top of a
+known, simulated model latency. Run with --latency 0 to see the overhead
+alone.
+
+Reports throughput, latency percentiles (p50/p95/p99), per-request memory
+(tracemalloc, on a short sequential pass), per-node timings and LLM parse
+outcomes as JSON, for regression tracking.
+
+Usage:
+    python bench_graph.py --target graph --requests 200 --concurrency 16
+    python bench_graph.py --target api --endpoint stream --latency 0.3 \\
+        --jitter lognormal --malformed-rate 0.05 --output bench.json
+"""
+
+import os
+
+# Benchmark orchestration, not Groq quotas or cache hits: unless set in the
+# environment, rate limiting, the response cache, checkpoints and market
+# snapshots are off.
+for _name, _value in {
+    "GROQ_REQUESTS_PER_MINUTE": "0",
+    "GROQ_TOKENS_PER_MINUTE": "0",
+    "LLM_CACHE_ENABLED": "0",
+    "CHECKPOINT_SQLITE_PATH": "",
+    "MARKET_SNAPSHOTS_ENABLED": "0",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.agents.runtime import agent_stats
+from app.api.main import app
+from app.api.planner import build_initial_state
+from app.api.schemas import CareerPlanRequest
+from app.graph.graph import build_graph
+from app.llm.fake_llm import FakeChatModel, install_fake_llm
+from app.llm.llm import reset_llm_clients
+from app.utils.metrics import LLM_PARSE, NODE_SECONDS, reset_metrics
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+RunOne = Callable[[int], Awaitable[None]]
+
+_SKILL_POOL = [
+    "Python", "SQL", "FastAPI", "Docker", "Kubernetes", "AWS", "React",
+    "TypeScript", "PostgreSQL", "Terraform", "Pandas", "Git", "Linux", "Go",
+]
+_ROLE_POOL = [
+    "Backend Engineer", "Data Engineer", "DevOps Engineer",
+    "Machine Learning Engineer", "Frontend Engineer", "Platform Engineer",
+]
+
+
+def make_payload(index: int) -> CareerPlanRequest:
+    """Deterministic, varied request for benchmark item index."""
+
+    offset = index % len(_SKILL_POOL)
+    skills = (_SKILL_POOL[offset:] + _SKILL_POOL[:offset])[: 4 + index % 5]
+    roles = [_ROLE_POOL[index % len(_ROLE_POOL)]]
+    if index % 3 == 0:
+        roles.append(_ROLE_POOL[(index + 1) % len(_ROLE_POOL)])
+    return CareerPlanRequest(
+        user_profile={
+            "resume_text": f"Engineer #{index} with {len(skills)} listed skills.",
+            "experience_years": index % 10,
+        },
+        skills=skills,
+        target_roles=roles,
+    )
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated percentile (q in 0-100) of sorted values."""
+
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1] if ordered else 0.0,
+    }
+
+
+async def _run_load(
+    run_one: RunOne, requests: int, concurrency: int, first_index: int
+) -> Dict[str, Any]:
+    """Run requests with a fixed worker pool; collect latencies and errors."""
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(first_index, first_index + requests):
+        queue.put_nowait(index)
+
+    async def worker() -> None:
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                await run_one(index)
+            except Exception as exc:  # counted, not fatal
+                name = type(exc).__name__
+                errors[name] = errors.get(name, 0) + 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_seconds": _latency_summary(latencies),
+    }
+
+
+async def _memory_pass(
+    run_one: RunOne, samples: int, first_index: int
+) -> Dict[str, Any]:
+    """Peak traced allocation per request, one request at a time."""
+
+    if samples <= 0:
+        return {}
+    peaks: List[int] = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for index in range(first_index, first_index + samples):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await run_one(index)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+    ordered = sorted(peaks)
+    return {
+        "samples": samples,
+        "peak_bytes_mean": sum(ordered) / len(ordered),
+        "peak_bytes_p95": percentile([float(p) for p in ordered], 95),
+        "peak_bytes_max": ordered[-1],
+    }
+
+
+def _graph_runner() -> RunOne:
+    """Run plans straight through a compiled graph (no HTTP, no checkpoints)."""
+
+    graph = build_graph()
+
+    async def run_one(index: int) -> None:
+        await graph.ainvoke(build_initial_state(make_payload(index)))
+
+    return run_one
+
+
+def _api_runner(client: httpx.AsyncClient, endpoint: str) -> RunOne:
+    """POST plans to the in-process FastAPI app."""
+
+    path = "/career-plan/stream" if endpoint == "stream" else "/career-plan"
+
+    async def run_one(index: int) -> None:
+        body = make_payload(index).model_dump(mode="json", exclude_none=True)
+        if endpoint == "stream":
+            async with client.stream("POST", path, json=body) as response:
+                response.raise_for_status()
+                async for _ in response.aiter_lines():
+                    pass
+        else:
+            response = await client.post(path, json=body)
+            response.raise_for_status()
+
+    return run_one
+
+
+def _node_timings() -> Dict[str, Dict[str, float]]:
+    """Mean seconds and count per graph node from the metrics registry."""
+
+    timings: Dict[str, Dict[str, float]] = {}
+    for (node, status), (count, total) in sorted(NODE_SECONDS.summary().items()):
+        timings[f"{node}:{status}"] = {
+            "count": count,
+            "mean_seconds": total / count if count else 0.0,
+        }
+    return timings
+
+
+def _parse_outcomes() -> Dict[str, float]:
+    """Agent parse outcomes (agent:outcome -> count)."""
+
+    return {
+        f"{agent}:{outcome}": value
+        for (agent, outcome), value in sorted(LLM_PARSE.summary().items())
+    }
+
+
+def _build_seconds(iterations: int = 20) -> float:
+    """Mean time to build and compile the StateGraph."""
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        build_graph()
+    return (time.perf_counter() - started) / iterations
+
+
+async def _bench_target(target: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Warm up, run the timed load, then the memory pass for one target."""
+
+    async def run(run_one: RunOne) -> Dict[str, Any]:
+        await _run_load(run_one, args.warmup, args.concurrency, 0)
+        reset_metrics()
+        result = await _run_load(
+            run_one, args.requests, args.concurrency, args.warmup
+        )
+        result["nodes"] = _node_timings()
+        result["parse_outcomes"] = _parse_outcomes()
+        result["memory"] = await _memory_pass(
+            run_one, args.memory_samples, args.warmup + args.requests
+        )
+        return result
+
+    if target == "graph":
+        return await run(_graph_runner())
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            result = await run(_api_runner(client, args.endpoint))
+    result["endpoint"] = args.endpoint
+    return result
+
+
+async def _bench_targets(
+    targets: Tuple[str, ...], args: argparse.Namespace
+) -> Dict[str, Any]:
+    return {target: await _bench_target(target, args) for target in targets}
+
+
+def _max_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python bench_graph.py")
+    parser.add_argument("--target", choices=("graph", "api", "both"), default="both")
+    parser.add_argument("--endpoint", choices=("plan", "stream"), default="plan")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--memory-samples", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM seconds.")
+    parser.add_argument(
+        "--jitter", choices=("none", "uniform", "lognormal"), default="none"
+    )
+    parser.add_argument("--jitter-scale", type=float, default=0.5)
+    parser.add_argument("--ttft-fraction", type=float, default=0.3)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--malformed-kind", choices=("truncated", "garbage", "mixed"), default="mixed"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the JSON results to this file.")
+    args = parser.parse_args(argv)
+
+    fake = FakeChatModel(
+        latency_seconds=args.latency,
+        jitter=args.jitter,
+        jitter_scale=args.jitter_scale,
+        ttft_fraction=args.ttft_fraction,
+        malformed_rate=args.malformed_rate,
+        malformed_kind=args.malformed_kind,
+        seed=args.seed,
+    )
+    install_fake_llm(fake)
+
+    targets = ("graph", "api") if args.target == "both" else (args.target,)
+    results: Dict[str, Any] = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "build_graph_seconds": _build_seconds(),
+    }
+    try:
+        results.update(asyncio.run(_bench_targets(targets, args)))
+    finally:
+        reset_llm_clients()
+    results["agents"] = agent_stats()
+    results["max_rss_bytes"] = _max_rss_bytes()
+
+    text = json.dumps(results, indent=2, default=str)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""Runtime settings for the AI Career Strategy Planner.
+
+Values are read once from the environment (a local .env file is supported via
+python-dotenv) when this module is first imported.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Load environment variables from a local .env file if present.
+load_dotenv()
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to the default when unset/invalid."""
+
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to the default when unset/invalid."""
+
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting ("1", "true", "yes", "on" are truthy)."""
+
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+# LLM defaults. The model can still be overridden per call via get_llm().
+DEFAULT_MODEL = os.getenv("GROQ_DEFAULT_MODEL", "llama-3.3-70b-versatile")
+
+# Model routing tiers: "fast" for structured extraction, "quality" where the
+# reasoning matters. Agents are mapped to a tier (or a model ID) below, and a
+# request can override either per agent.
+MODEL_TIERS = {
+    "fast": os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant"),
+    "quality": os.getenv("GROQ_QUALITY_MODEL", DEFAULT_MODEL),
+}
+AGENT_MODEL_TIERS = {
+    "skill": os.getenv("SKILL_MODEL_TIER", "fast"),
+    "market": os.getenv("MARKET_MODEL_TIER", "fast"),
+    "strategy": os.getenv("STRATEGY_MODEL_TIER", "quality"),
+    "roadmap": os.getenv("ROADMAP_MODEL_TIER", "quality"),
+}
+# Model IDs a request may pin in model_overrides besides the tier names:
+# the configured models plus GROQ_ALLOWED_MODELS (comma-separated). Each
+# distinct model gets its own client and metric series, so the set is fixed.
+ALLOWED_MODELS = frozenset(
+    {DEFAULT_MODEL, *MODEL_TIERS.values()}
+    | {MODEL_TIERS.get(choice, choice) for choice in AGENT_MODEL_TIERS.values()}
+    | {
+        model.strip()
+        for model in os.getenv("GROQ_ALLOWED_MODELS", "").split(",")
+        if model.strip()
+    }
+)
+
+# Route a model's agents to the fast tier for MODEL_FALLBACK_COOLDOWN seconds
+# once its error rate or mean queue time over the last MODEL_FALLBACK_WINDOW
+# calls crosses these thresholds (0 disables a check).
+MODEL_FALLBACK_WINDOW = _env_int("MODEL_FALLBACK_WINDOW", 20)
+MODEL_FALLBACK_ERROR_RATE = _env_float("MODEL_FALLBACK_ERROR_RATE", 0.5)
+MODEL_FALLBACK_QUEUE_SECONDS = _env_float("MODEL_FALLBACK_QUEUE_SECONDS", 10.0)
+MODEL_FALLBACK_COOLDOWN = _env_float("MODEL_FALLBACK_COOLDOWN", 60.0)
+
+# Shared keep-alive HTTP pool used by every ChatGroq client in the process.
+LLM_POOL_MAX_CONNECTIONS = _env_int("LLM_POOL_MAX_CONNECTIONS", 100)
+LLM_POOL_MAX_KEEPALIVE = _env_int("LLM_POOL_MAX_KEEPALIVE", 20)
+LLM_POOL_KEEPALIVE_EXPIRY = _env_float("LLM_POOL_KEEPALIVE_EXPIRY", 60.0)
+LLM_REQUEST_TIMEOUT = _env_float("LLM_REQUEST_TIMEOUT", 60.0)
+
+# Agent response cache (in-memory LRU + TTL, optional SQLite persistence).
+LLM_CACHE_ENABLED = _env_bool("LLM_CACHE_ENABLED", True)
+LLM_CACHE_MAX_ENTRIES = _env_int("LLM_CACHE_MAX_ENTRIES", 1024)
+LLM_CACHE_TTL_SECONDS = _env_float("LLM_CACHE_TTL_SECONDS", 6 * 3600.0)
+LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH", "")
+
+# Structured output: "json_object" (Groq JSON mode), "json_schema" (the
+# agent's Pydantic schema; only some Groq models accept it) or "off".
+# Streamed completions only send it when LLM_JSON_MODE_STREAM is set: not
+# every model supports response_format together with streaming, and Groq
+# only validates the output once it is complete, so a rejection arrives after
+# its fields were already streamed to the client. Without it, streamed output
+# goes through local repair and the (JSON mode) re-ask instead.
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "json_object")
+LLM_JSON_MODE_STREAM = _env_bool("LLM_JSON_MODE_STREAM", False)
+# Output that fails parsing even after local repair gets one re-ask on this
+# tier (see MODEL_TIERS) with the validation error; at most this many chars of
+# the bad output are sent back.
+LLM_REASK_ENABLED = _env_bool("LLM_REASK_ENABLED", True)
+LLM_REASK_TIER = os.getenv("LLM_REASK_TIER", "fast")
+LLM_REASK_MAX_CHARS = _env_int("LLM_REASK_MAX_CHARS", 12000)
+
+# USD per million prompt/completion tokens, for the cost metric on /metrics
+# (models not listed count as free).
+LLM_TOKEN_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+# Groq request/token budget shared by every agent call in the process
+# (0 = off). The defaults match Groq's free-tier limits for the 70B model and
+# are corrected at runtime from the x-ratelimit-* response headers.
+GROQ_REQUESTS_PER_MINUTE = _env_float("GROQ_REQUESTS_PER_MINUTE", 30.0)
+GROQ_TOKENS_PER_MINUTE = _env_float("GROQ_TOKENS_PER_MINUTE", 12000.0)
+GROQ_REQUEST_BURST = _env_int("GROQ_REQUEST_BURST", 0)
+LLM_EXPECTED_COMPLETION_TOKENS = _env_int("LLM_EXPECTED_COMPLETION_TOKENS", 800)
+
+# Retries with jittered exponential backoff, bounded by a per-call deadline.
+LLM_MAX_RETRIES = _env_int("LLM_MAX_RETRIES", 4)
+LLM_BACKOFF_BASE = _env_float("LLM_BACKOFF_BASE", 0.5)
+LLM_BACKOFF_MAX = _env_float("LLM_BACKOFF_MAX", 20.0)
+LLM_CALL_DEADLINE = _env_float("LLM_CALL_DEADLINE", 90.0)
+
+# Single-flight: concurrent identical plans (POST /career-plan) and agent
+# calls share one in-flight computation instead of each calling Groq.
+SINGLE_FLIGHT_ENABLED = _env_bool("SINGLE_FLIGHT_ENABLED", True)
+
+# Maximum in-flight LLM calls per agent.
+AGENT_MAX_CONCURRENCY = _env_int("AGENT_MAX_CONCURRENCY", 16)
+
+# Batch planning.
+BATCH_MAX_CONCURRENCY = _env_int("BATCH_MAX_CONCURRENCY", 8)
+BATCH_MAX_ITEMS = _env_int("BATCH_MAX_ITEMS", 500)
+
+# Bearer token for admin endpoints that can trigger LLM spend
+# (POST /graph/reload, POST /market/snapshots/refresh). Unset disables them.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# LangGraph checkpoints (SQLite) used by the API to resume failed plans.
+# Only requests that supply a thread_id are stored. Set to an empty string
+# to disable checkpointing.
+CHECKPOINT_SQLITE_PATH = os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite")
+# Checkpoints hold the user's profile, so threads idle for longer than this
+# are deleted (0 keeps them); the API checks every CHECKPOINT_PRUNE_SECONDS.
+CHECKPOINT_TTL_SECONDS = _env_float("CHECKPOINT_TTL_SECONDS", 7 * 24 * 3600)
+CHECKPOINT_PRUNE_SECONDS = _env_float("CHECKPOINT_PRUNE_SECONDS", 3600)
+
+# Large inputs (resume text) are kept out of graph state and checkpoints as
+# interned blob IDs (app/utils/blobs.py). Those of checkpointed runs are
+# persisted next to the checkpoints so resumed plans can find them; set to ""
+# for memory only. Resumes are personal data, so blobs expire after
+# BLOB_TTL_SECONDS and the file keeps at most BLOB_SQLITE_MAX_ENTRIES.
+BLOB_SQLITE_PATH = os.getenv(
+    "BLOB_SQLITE_PATH",
+    f"{CHECKPOINT_SQLITE_PATH}.blobs" if CHECKPOINT_SQLITE_PATH else "",
+)
+BLOB_STORE_MAX_CHARS = _env_int("BLOB_STORE_MAX_CHARS", 50_000_000)
+BLOB_TTL_SECONDS = _env_float("BLOB_TTL_SECONDS", 7 * 24 * 3600)
+BLOB_SQLITE_MAX_ENTRIES = _env_int("BLOB_SQLITE_MAX_ENTRIES", 100_000)
+
+# Input-token budgets for each prompt's variables (0 = no trimming).
+PROMPT_TOKEN_BUDGETS = {
+    "skill_analyzer": _env_int("PROMPT_BUDGET_SKILL_ANALYZER", 3000),
+    "market_intelligence": _env_int("PROMPT_BUDGET_MARKET_INTELLIGENCE", 600),
+    "career_strategy": _env_int("PROMPT_BUDGET_CAREER_STRATEGY", 1500),
+    "roadmap_planner": _env_int("PROMPT_BUDGET_ROADMAP_PLANNER", 1200),
+}
+
+# Resume ingestion: resumes longer than RESUME_MAX_CHARS (after cleanup) are
+# chunked and summarized in parallel with the fast model before analysis.
+# Chunks grow beyond RESUME_CHUNK_CHARS when needed to stay within
+# RESUME_MAX_CHUNKS.
+RESUME_MAX_CHARS = _env_int("RESUME_MAX_CHARS", 6000)
+RESUME_CHUNK_CHARS = _env_int("RESUME_CHUNK_CHARS", 2500)
+RESUME_MAX_CHUNKS = _env_int("RESUME_MAX_CHUNKS", 8)
+RESUME_SUMMARY_WORDS = _env_int("RESUME_SUMMARY_WORDS", 150)
+# A tier name or model ID, like the per-agent routing above.
+RESUME_SUMMARY_MODEL = os.getenv("RESUME_SUMMARY_MODEL", "fast")
+
+# Local skill taxonomy used to canonicalize skills before any agent runs.
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH", os.path.join(_PROJECT_ROOT, "data", "skill_taxonomy.tsv")
+)
+# difflib similarity needed to accept a typo match (0 disables fuzzy matching).
+SKILL_FUZZY_CUTOFF = _env_float("SKILL_FUZZY_CUTOFF", 0.85)
+
+# Deterministic role-fit scoring against data/role_profiles.tsv.
+ROLE_PROFILES_PATH = os.getenv(
+    "ROLE_PROFILES_PATH", os.path.join(_PROJECT_ROOT, "data", "role_profiles.tsv")
+)
+# Longest overlap/gap list reported per role.
+ROLE_FIT_MAX_LIST = _env_int("ROLE_FIT_MAX_LIST", 8)
+# Most profiles accepted by one /role-fit request.
+ROLE_FIT_MAX_PROFILES = _env_int("ROLE_FIT_MAX_PROFILES", 10000)
+# Fast mode: skill analysis comes from the deterministic scores only (no LLM).
+SKILL_ANALYSIS_FAST_MODE = _env_bool("SKILL_ANALYSIS_FAST_MODE", False)
+
+# Speculatively draft the roadmap from the strategy fields it reads
+# (SPECULATED_FIELDS) as soon as they stream, while the rest of the strategy
+# analysis is still generated (async graph runs only). The draft is kept if
+# the final strategy has the same values for those fields.
+ROADMAP_SPECULATION = _env_bool("ROADMAP_SPECULATION", False)
+
+# Precomputed market intelligence (app/graph/market_snapshots.py): a
+# background task keeps role-level market analyses for the most requested
+# role combinations in a local versioned store, and the market node serves
+# them instead of calling the LLM. Off by default because the refresher
+# makes LLM calls as soon as the app starts. Set the path to "" for memory
+# only.
+MARKET_SNAPSHOTS_ENABLED = _env_bool("MARKET_SNAPSHOTS_ENABLED", False)
+MARKET_SNAPSHOT_PATH = os.getenv("MARKET_SNAPSHOT_PATH", "market_snapshots.sqlite")
+# Catalog roles (data/role_profiles.tsv order) kept warm regardless of traffic.
+MARKET_SNAPSHOT_TOP_ROLES = _env_int("MARKET_SNAPSHOT_TOP_ROLES", 10)
+# Lookups before a role combination seen in traffic gets a snapshot.
+MARKET_SNAPSHOT_MIN_SEEN = _env_int("MARKET_SNAPSHOT_MIN_SEEN", 2)
+MARKET_SNAPSHOT_MAX_ENTRIES = _env_int("MARKET_SNAPSHOT_MAX_ENTRIES", 50)
+# Distinct role combinations whose request counts are tracked.
+MARKET_SNAPSHOT_MAX_TRACKED = _env_int("MARKET_SNAPSHOT_MAX_TRACKED", 1000)
+# Snapshots are regenerated after REFRESH and no longer served after MAX_AGE.
+MARKET_SNAPSHOT_REFRESH_SECONDS = _env_float(
+    "MARKET_SNAPSHOT_REFRESH_SECONDS", 7 * 86400.0
+)
+MARKET_SNAPSHOT_MAX_AGE_SECONDS = _env_float(
+    "MARKET_SNAPSHOT_MAX_AGE_SECONDS", 14 * 86400.0
+)
+# How often the refresher looks for missing or due snapshots.
+MARKET_SNAPSHOT_POLL_SECONDS = _env_float("MARKET_SNAPSHOT_POLL_SECONDS", 900.0)
+MARKET_SNAPSHOT_CONCURRENCY = _env_int("MARKET_SNAPSHOT_CONCURRENCY", 2)
+MARKET_SNAPSHOT_KEEP_VERSIONS = _env_int("MARKET_SNAPSHOT_KEEP_VERSIONS", 3)
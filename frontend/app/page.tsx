@@ -2,7 +2,7 @@
 
 import { useMemo, useState } from "react";
 import { motion, useReducedMotion } from "framer-motion";
-import { createCareerPlan } from "@/lib/api";
+import { streamCareerPlan } from "@/lib/api";
 import MarketInsightsCard from "@/components/MarketInsightsCard";
 import SkillAnalysisCard from "@/components/SkillAnalysisCard";
 import StrategyCard from "@/components/StrategyCard";
@@ -53,6 +53,7 @@ export default function Home() {
 
     setLoading(true);
     setError(null);
+    setResult(null);
 
     try {
       const payload = {
@@ -64,8 +65,12 @@ export default function Home() {
         target_roles: targetRole ? [targetRole] : [],
       };
 
-      const data = await createCareerPlan(payload);
-      setResult(data);
+      // Render each section as soon as the backend finishes it.
+      await streamCareerPlan(payload, (section, data) => {
+        setResult(
+          (prev) => ({ ...(prev ?? {}), [section]: data }) as CareerPlanResponse
+        );
+      });
     } catch (err: unknown) {
       setError(
         err instanceof Error
@@ -199,7 +204,7 @@ export default function Home() {
             </div>
           </section>
 
-          {loading && (
+          {loading && !result && (
             <motion.section
               variants={sectionVariants}
               initial="hidden"
@@ -220,26 +225,32 @@ export default function Home() {
             </motion.section>
           )}
 
-          {!loading && result && (
+          {result && (
             <motion.section
               variants={cardContainerVariants}
               initial="hidden"
               animate="visible"
               className="grid gap-6 lg:grid-cols-3"
             >
-              <motion.div variants={cardVariants}>
-                <SkillAnalysisCard data={result.skill_analysis} />
-              </motion.div>
-              <motion.div variants={cardVariants}>
-                <MarketInsightsCard data={result.market_analysis} />
-              </motion.div>
-              <motion.div variants={cardVariants}>
-                <StrategyCard data={result.strategy_analysis} />
-              </motion.div>
+              {result.skill_analysis && (
+                <motion.div variants={cardVariants}>
+                  <SkillAnalysisCard data={result.skill_analysis} />
+                </motion.div>
+              )}
+              {result.market_analysis && (
+                <motion.div variants={cardVariants}>
+                  <MarketInsightsCard data={result.market_analysis} />
+                </motion.div>
+              )}
+              {result.strategy_analysis && (
+                <motion.div variants={cardVariants}>
+                  <StrategyCard data={result.strategy_analysis} />
+                </motion.div>
+              )}
             </motion.section>
           )}
 
-          {!loading && result?.roadmap && (
+          {result?.roadmap && (
             <motion.section
               variants={sectionVariants}
               initial="hidden"
@@ -13,6 +13,17 @@ type CareerPlanResponse = {
   roadmap: Record<string, unknown>;
 };
 
+type CareerPlanSection = keyof CareerPlanResponse;
+
+export type CareerPlanEvent = {
+  event: "partial" | "section" | "done" | "error";
+  section?: CareerPlanSection | null;
+  path?: string | null;
+  value?: unknown;
+  data?: Record<string, unknown>;
+  detail?: string | null;
+};
+
 const API_BASE_URL =
   process.env.NEXT_PUBLIC_API_URL?.replace(/\/$/, "") ||
   "http://localhost:8000";
@@ -37,3 +48,52 @@ export async function createCareerPlan(
     throw new Error("Unexpected error");
   }
 }
+
+export async function streamCareerPlan(
+  payload: CareerPlanRequest,
+  onSection: (section: CareerPlanSection, data: Record<string, unknown>) => void,
+  onPartial?: (section: CareerPlanSection, path: string, value: unknown) => void
+): Promise<Partial<CareerPlanResponse>> {
+  const response = await fetch(`${API_BASE_URL}/career-plan/stream`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(response.statusText || "Request failed");
+  }
+
+  const plan: Partial<CareerPlanResponse> = {};
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  // The stream is NDJSON: one CareerPlanEvent per line.
+  const handleLine = (line: string) => {
+    if (!line.trim()) return;
+    const event = JSON.parse(line) as CareerPlanEvent;
+    if (event.event === "error") {
+      throw new Error(event.detail || "Request failed");
+    }
+    if (event.event === "partial" && event.section && event.path) {
+      onPartial?.(event.section, event.path, event.value);
+    }
+    if (event.event === "section" && event.section) {
+      const data = event.data ?? {};
+      plan[event.section] = data;
+      onSection(event.section, data);
+    }
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop() ?? "";
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer);
+
+  return plan;
+}
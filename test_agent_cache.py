@@ -0,0 +1,73 @@
+"""Response cache behaviour of the agent runtime, against the fake LLM.
+
+Run with: python -m pytest -q test_agent_cache.py
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents.market_agent import MARKET_AGENT
+from app.agents.runtime import arun_agent, run_agent
+from app.llm import cache as cache_module
+from app.llm.fake_llm import FakeChatModel, install_fake_llm
+from app.llm.llm import reset_llm_clients
+from app.utils.metrics import LLM_PARSE
+from config import settings
+
+INPUTS = {"target_roles": ["Backend Engineer"], "skills": ["Python"]}
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    """An empty in-memory response cache for the test."""
+
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_CACHE_SQLITE_PATH", "")
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(cache_module, "_cache", None)
+    yield
+    reset_llm_clients()
+
+
+def _install(**options):
+    install_fake_llm(FakeChatModel(latency_seconds=0.0, **options))
+
+
+def _llm_answers(outcome: str) -> float:
+    return LLM_PARSE.value(agent="market", outcome=outcome)
+
+
+def test_truncated_stream_repaired_locally_is_not_cached(fresh_cache):
+    _install(malformed_rate=1.0, malformed_kind="truncated")
+    before = _llm_answers("repaired")
+
+    async def twice():
+        for _ in range(2):
+            result = await arun_agent(MARKET_AGENT, dict(INPUTS))
+            assert result["in_demand_skills"]
+
+    asyncio.run(twice())
+    # Both calls reached the LLM: the repaired guess was not cached.
+    assert _llm_answers("repaired") - before == 2
+
+
+def test_truncated_invoke_repaired_locally_is_not_cached(fresh_cache):
+    _install(malformed_rate=1.0, malformed_kind="truncated")
+    before = _llm_answers("repaired")
+
+    for _ in range(2):
+        assert run_agent(MARKET_AGENT, dict(INPUTS))["in_demand_skills"]
+    assert _llm_answers("repaired") - before == 2
+
+
+def test_complete_answer_is_cached(fresh_cache):
+    _install()
+    before = _llm_answers("ok")
+
+    async def twice():
+        for _ in range(2):
+            await arun_agent(MARKET_AGENT, dict(INPUTS))
+
+    asyncio.run(twice())
+    assert _llm_answers("ok") - before == 1
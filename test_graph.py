@@ -5,10 +5,10 @@ from app.graph.state import CareerState
 
 
 def main() -> None:
-    # Build the compiled graph (sequential pipeline).
+    # Build the compiled graph (skill/market run concurrently).
     graph = build_graph()
 
-    # Minimal initial state. Node functions will enrich this in-place.
+    # Minimal initial state. Nodes return partial updates that get merged in.
     initial_state: CareerState = {
         "user_profile": {"name": "Test User", "experience_years": 3},
         "skills": ["python", "fastapi"],
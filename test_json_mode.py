@@ -0,0 +1,82 @@
+"""Groq JSON mode rejections in the agent runtime, against the fake LLM.
+
+With JSON mode on, Groq answers malformed output with a 400
+json_validate_failed error instead of returning it. The runtime must repair
+or re-ask like for any bad output, not fail the plan.
+
+Run with: python -m pytest -q test_json_mode.py
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents import runtime
+from app.agents.market_agent import MARKET_AGENT
+from app.agents.runtime import arun_agent, run_agent
+from app.llm.fake_llm import FakeChatModel, install_fake_llm
+from app.llm import rate_limit
+from app.llm.llm import reset_llm_clients
+from app.utils.metrics import LLM_PARSE
+from config import settings
+
+INPUTS = {"target_roles": ["Backend Engineer"], "skills": ["Python"]}
+
+
+@pytest.fixture
+def json_mode(monkeypatch):
+    """JSON mode on for every call; no cache, coalescing or rate limit."""
+
+    monkeypatch.setattr(settings, "LLM_JSON_MODE", "json_object")
+    monkeypatch.setattr(settings, "LLM_JSON_MODE_STREAM", True)
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_ENABLED", False)
+    monkeypatch.setattr(rate_limit, "_limiter", rate_limit.RateLimiter(0, 0))
+    yield
+    reset_llm_clients()
+
+
+def _install(kind: str) -> None:
+    install_fake_llm(
+        FakeChatModel(
+            latency_seconds=0.0,
+            malformed_rate=1.0,
+            malformed_kind=kind,
+            reject_invalid_json=True,
+        )
+    )
+
+
+def _outcomes(*outcomes: str) -> float:
+    return sum(LLM_PARSE.value(agent="market", outcome=o) for o in outcomes)
+
+
+@pytest.mark.parametrize(
+    "kind,outcome", [("truncated", "repaired"), ("garbage", "reasked")]
+)
+def test_rejected_output_is_repaired_or_reasked(json_mode, kind, outcome):
+    _install(kind)
+    before = _outcomes(outcome)
+
+    assert run_agent(MARKET_AGENT, dict(INPUTS))["in_demand_skills"]
+    assert asyncio.run(arun_agent(MARKET_AGENT, dict(INPUTS)))["in_demand_skills"]
+    assert _outcomes(outcome) - before == 2
+
+
+def test_failed_reask_falls_back_to_defaults(json_mode, monkeypatch):
+    _install("garbage")
+
+    class Broken:
+        def invoke(self, messages):
+            raise RuntimeError("re-ask unavailable")
+
+        async def ainvoke(self, messages):
+            raise RuntimeError("re-ask unavailable")
+
+    monkeypatch.setattr(runtime, "_reask_llm", lambda spec: (Broken(), "fake"))
+    before = _outcomes("invalid")
+
+    assert run_agent(MARKET_AGENT, dict(INPUTS)) == MARKET_AGENT.defaults
+    result = asyncio.run(arun_agent(MARKET_AGENT, dict(INPUTS)))
+    assert result == MARKET_AGENT.defaults
+    assert _outcomes("invalid") - before == 2
@@ -0,0 +1,46 @@
+"""Offline JSONL runs (app.api.planner.arun_jsonl).
+
+Run with: python -m pytest -q test_jsonl.py
+"""
+
+import asyncio
+import json
+
+from app.api import planner
+from app.api.schemas import CareerPlanResponse
+
+REQUEST = {
+    "user_profile": {},
+    "skills": ["Python"],
+    "target_roles": ["Backend Engineer"],
+}
+
+
+def test_duplicate_ids_are_planned_once(tmp_path, monkeypatch):
+    planned = []
+
+    async def fake_plan(payload):
+        planned.append(payload.skills)
+        return CareerPlanResponse(
+            skill_analysis={}, market_analysis={}, strategy_analysis={}, roadmap={}
+        )
+
+    monkeypatch.setattr(planner, "arun_plan", fake_plan)
+    lines = [
+        {**REQUEST, "id": "a"},
+        {**REQUEST, "id": "b"},
+        {**REQUEST, "id": "a", "skills": ["Go"]},
+    ]
+    source = tmp_path / "plans.jsonl"
+    source.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    output = tmp_path / "results.jsonl"
+
+    summary = asyncio.run(planner.arun_jsonl(source, output, workers=2))
+
+    assert summary == {"planned": 2, "failed": 1, "skipped": 0}
+    assert planned == [["Python"], ["Python"]]
+    records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert records["a"]["error"] is None
+    assert "Duplicate id 'a'" in records["line-3"]["error"]
+    done = (tmp_path / "results.jsonl.done").read_text().split()
+    assert sorted(done) == ["a", "b"]
@@ -0,0 +1,33 @@
+"""Validation of CareerPlanRequest.model_overrides (app/api/schemas.py).
+
+Run with: python -m pytest -q test_model_overrides.py
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.schemas import CareerPlanRequest
+from config import settings
+
+
+def _request(overrides):
+    return CareerPlanRequest(
+        user_profile={},
+        skills=["Python"],
+        target_roles=["Backend Engineer"],
+        model_overrides=overrides,
+    )
+
+
+def test_tiers_and_configured_models_are_accepted():
+    overrides = {"roadmap": "fast", "default": settings.MODEL_TIERS["quality"]}
+    assert _request(overrides).model_overrides == overrides
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [{"roadmap": "not-a-model"}, {"default": "fast "}, {"planner": "fast"}],
+)
+def test_unknown_agents_and_models_are_rejected(overrides):
+    with pytest.raises(ValidationError):
+        _request(overrides)
@@ -7,29 +7,51 @@ Expected output:
 
 from app.llm.llm import get_llm
 from app.llm.prompts import SKILL_ANALYZER_PROMPT
+from app.utils.role_fit import score_role_fit
 
+# Mock inputs for the skill analyzer.
+RESUME_TEXT = (
+    "Backend engineer with 3 years of Python and FastAPI experience, "
+    "built REST APIs, worked with PostgreSQL, and deployed on AWS."
+)
+SKILLS = ["python", "fastapi", "postgresql", "aws"]
+TARGET_ROLES = ["Backend Engineer", "API Engineer"]
 
-def main() -> None:
-    # Load configured Groq LLM (requires GROQ_API_KEY in env/.env).
-    llm = get_llm()
 
-    # Mock inputs for the skill analyzer.
-    resume_text = (
-        "Backend engineer with 3 years of Python and FastAPI experience, "
-        "built REST APIs, worked with PostgreSQL, and deployed on AWS."
+def build_prompt():
+    """Skill analyzer messages for the mock inputs, with role-fit scores."""
+
+    return SKILL_ANALYZER_PROMPT.format_messages(
+        user_profile={"resume_text": RESUME_TEXT},
+        skills=SKILLS,
+        target_roles=TARGET_ROLES,
+        role_fit_scores=score_role_fit(SKILLS, TARGET_ROLES),
     )
-    skills = ["python", "fastapi", "postgresql", "aws"]
-    target_roles = ["Backend Engineer", "API Engineer"]
-
-    # Build the prompt with structured variables.
-    prompt = SKILL_ANALYZER_PROMPT.format_messages(
-        user_profile={"resume_text": resume_text},
-        skills=skills,
-        target_roles=target_roles,
+
+
+def test_skill_prompt_includes_role_fit_scores() -> None:
+    """The deterministic scores are rendered into the prompt (no LLM call)."""
+
+    human = build_prompt()[-1].content
+    assert "role_fit_scores: [{" in human
+    assert "'fit_score':" in human and "Backend Engineer" in human
+
+
+def test_skill_prompt_defaults_role_fit_scores() -> None:
+    """Callers that predate role-fit scoring still format the prompt."""
+
+    messages = SKILL_ANALYZER_PROMPT.format_messages(
+        user_profile={}, skills=SKILLS, target_roles=TARGET_ROLES
     )
+    assert "role_fit_scores: []" in messages[-1].content
+
+
+def main() -> None:
+    # Load configured Groq LLM (requires GROQ_API_KEY in env/.env).
+    llm = get_llm()
 
     # Invoke the LLM with the prompt and print the raw response.
-    response = llm.invoke(prompt)
+    response = llm.invoke(build_prompt())
     print(response)
 
 
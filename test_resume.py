@@ -0,0 +1,50 @@
+"""Deterministic resume preprocessing (app/utils/resume.py) and chunking.
+
+Run with: python -m pytest -q test_resume.py
+"""
+
+from app.agents.resume_agent import _prepare
+from app.utils.resume import normalize_resume, strip_boilerplate
+from config import settings
+
+
+def _clean(text: str) -> str:
+    return strip_boilerplate(normalize_resume(text))
+
+
+def test_repeated_job_title_is_kept():
+    text = (
+        "Jane Doe\n\nExperience\n"
+        "Backend Engineer\nAcme Corp, 2021-2024\n- Built billing APIs\n\n"
+        "Backend Engineer\nGlobex, 2018-2021\n- Ran the data pipeline\n"
+    )
+    assert _clean(text).count("Backend Engineer") == 2
+
+
+def test_header_and_footer_repeated_across_pages_are_dropped():
+    text = (
+        "Jane Doe - Resume\nExperience\nBackend Engineer\nAcme Corp\n"
+        "jane@example.com\nPage 1 of 2\n"
+        "Jane Doe - Resume\nGlobex\n- Ran the data pipeline\n"
+        "jane@example.com\nPage 2 of 2\n"
+    )
+    cleaned = _clean(text)
+    assert cleaned.count("Jane Doe - Resume") == 1
+    assert cleaned.count("jane@example.com") == 1
+    assert "Page 1" not in cleaned and "Globex" in cleaned
+
+
+def test_form_feed_marks_a_page_break():
+    cleaned = _clean("Jane Doe\nSkills\nPython\n\fJane Doe\nGo\n")
+    assert cleaned.count("Jane Doe") == 1
+    assert "\f" not in cleaned and "Go" in cleaned
+
+
+def test_long_resume_is_chunked_without_dropping_text(monkeypatch):
+    monkeypatch.setattr(settings, "RESUME_MAX_CHUNKS", 3)
+    paragraphs = [f"Project {index}: " + "shipped services " * 40 for index in range(60)]
+    result, chunks = _prepare("\n\n".join(paragraphs))
+
+    assert 1 < len(chunks) <= 3
+    assert "Project 59:" in chunks[-1]
+    assert sum(len(chunk) for chunk in chunks) >= len(result["text"]) - 2 * len(chunks)
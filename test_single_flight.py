@@ -0,0 +1,54 @@
+"""Single-flight coalescing (app/utils/single_flight.py).
+
+Run with: python -m pytest -q test_single_flight.py
+"""
+
+import asyncio
+
+from app.utils.single_flight import SingleFlight
+
+
+def _tracked_work(state):
+    async def work():
+        state["started"] += 1
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        return {"value": 1}
+
+    return work
+
+
+def test_work_survives_while_a_caller_waits():
+    state = {"started": 0, "cancelled": 0}
+
+    async def scenario():
+        flight = SingleFlight("test")
+        work = _tracked_work(state)
+        first = asyncio.ensure_future(flight.run("key", work))
+        second = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == ({"value": 1}, True)
+    assert state == {"started": 1, "cancelled": 0}
+
+
+def test_work_is_cancelled_when_the_last_caller_leaves():
+    state = {"started": 0, "cancelled": 0}
+
+    async def scenario():
+        flight = SingleFlight("test")
+        work = _tracked_work(state)
+        caller = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+        # A later caller starts afresh instead of joining the cancelled work.
+        return await flight.run("key", work)
+
+    assert asyncio.run(scenario()) == ({"value": 1}, False)
+    assert state == {"started": 2, "cancelled": 1}
@@ -0,0 +1,26 @@
+"""Skill canonicalization against data/skill_taxonomy.tsv (app/utils/helpers.py).
+
+Run with: python -m pytest -q test_skill_taxonomy.py
+"""
+
+import pytest
+
+from app.utils.helpers import normalize_skills
+
+
+@pytest.mark.parametrize(
+    "skill, expected",
+    [
+        ("py", "Python"),
+        ("node js", "Node.js"),
+        ("kubernets", "Kubernetes"),
+        ("machine lerning", "Machine Learning"),
+    ],
+)
+def test_aliases_and_typos_map_to_canonical_names(skill, expected):
+    assert normalize_skills([skill]) == [expected]
+
+
+@pytest.mark.parametrize("skill", ["Unix", "TensorFlow.js"])
+def test_distinct_skills_are_not_fuzzy_merged(skill):
+    assert normalize_skills([skill]) == [skill]